@@ -0,0 +1,110 @@
+"""indices de busqueda de texto
+
+Revision ID: 4b7e2d9c1a53
+Revises: 2f6da4c5a6d3
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2d9c1a53"
+down_revision: Union[str, None] = "2f6da4c5a6d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Debe coincidir con app.db.search.TS_CONFIG
+TS_CONFIG = "spanish"
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS rutinas_fts USING fts5("
+    "nombre, descripcion, ejercicios, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ai AFTER INSERT ON rutinas BEGIN "
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "VALUES (new.id, new.nombre, coalesce(new.descripcion, ''), ''); END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_au AFTER UPDATE OF nombre, descripcion ON rutinas BEGIN "
+    "UPDATE rutinas_fts SET nombre = new.nombre, descripcion = coalesce(new.descripcion, '') "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ad AFTER DELETE ON rutinas BEGIN "
+    "DELETE FROM rutinas_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ai AFTER INSERT ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = new.rutina_id) WHERE rowid = new.rutina_id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_au AFTER UPDATE OF nombre, rutina_id ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = old.rutina_id) WHERE rowid = old.rutina_id; "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = new.rutina_id) WHERE rowid = new.rutina_id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ad AFTER DELETE ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = old.rutina_id) WHERE rowid = old.rutina_id; END",
+)
+
+SQLITE_FTS_BACKFILL = (
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "SELECT r.id, r.nombre, coalesce(r.descripcion, ''), "
+    "coalesce((SELECT group_concat(e.nombre, ' ') FROM ejercicios e WHERE e.rutina_id = r.id), '') "
+    "FROM rutinas r"
+)
+
+SQLITE_TRIGGERS = (
+    "rutinas_fts_ai",
+    "rutinas_fts_au",
+    "rutinas_fts_ad",
+    "ejercicios_fts_ai",
+    "ejercicios_fts_au",
+    "ejercicios_fts_ad",
+)
+
+
+def upgrade() -> None:
+    dialecto = op.get_bind().dialect.name
+
+    if dialecto == "postgresql":
+        # pg_trgm permite que ILIKE '%texto%' use un índice GIN en lugar de un scan secuencial
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_rutinas_nombre_trgm",
+            "rutinas",
+            ["nombre"],
+            postgresql_using="gin",
+            postgresql_ops={"nombre": "gin_trgm_ops"},
+        )
+        op.create_index(
+            "ix_ejercicios_nombre_trgm",
+            "ejercicios",
+            ["nombre"],
+            postgresql_using="gin",
+            postgresql_ops={"nombre": "gin_trgm_ops"},
+        )
+        # Índices de texto completo; la expresión es la misma que arma app.db.search
+        op.execute(
+            "CREATE INDEX ix_rutinas_busqueda_tsv ON rutinas USING gin "
+            f"(to_tsvector('{TS_CONFIG}'::regconfig, coalesce(nombre, '') || ' ' || coalesce(descripcion, '')))"
+        )
+        op.execute(
+            "CREATE INDEX ix_ejercicios_nombre_tsv ON ejercicios USING gin "
+            f"(to_tsvector('{TS_CONFIG}'::regconfig, nombre))"
+        )
+    elif dialecto == "sqlite":
+        for sentencia in SQLITE_FTS_DDL:
+            op.execute(sentencia)
+        op.execute(SQLITE_FTS_BACKFILL)
+
+
+def downgrade() -> None:
+    dialecto = op.get_bind().dialect.name
+
+    if dialecto == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_ejercicios_nombre_tsv")
+        op.execute("DROP INDEX IF EXISTS ix_rutinas_busqueda_tsv")
+        op.drop_index("ix_ejercicios_nombre_trgm", table_name="ejercicios")
+        op.drop_index("ix_rutinas_nombre_trgm", table_name="rutinas")
+    elif dialecto == "sqlite":
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS rutinas_fts")
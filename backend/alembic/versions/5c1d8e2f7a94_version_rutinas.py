@@ -0,0 +1,52 @@
+"""version en rutinas
+
+Revision ID: 5c1d8e2f7a94
+Revises: e3a9f1b7c205
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1d8e2f7a94"
+down_revision: Union[str, None] = "e3a9f1b7c205"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copia congelada de los triggers de rutinas_fts de 4b7e2d9c1a53 (la migración no depende del código de la app).
+# En SQLite batch_alter_table reconstruye rutinas y los triggers de esa tabla se pierden; el contenido de
+# rutinas_fts no cambia (copiar las filas y borrar la tabla vieja no dispara triggers), así que alcanza con
+# volver a crearlos
+SQLITE_FTS_TRIGGERS_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ai AFTER INSERT ON rutinas BEGIN "
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "VALUES (new.id, new.nombre, coalesce(new.descripcion, ''), ''); END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_au AFTER UPDATE OF nombre, descripcion ON rutinas BEGIN "
+    "UPDATE rutinas_fts SET nombre = new.nombre, descripcion = coalesce(new.descripcion, '') "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ad AFTER DELETE ON rutinas BEGIN "
+    "DELETE FROM rutinas_fts WHERE rowid = old.id; END",
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "rutinas",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("rutinas") as batch_op:
+        batch_op.drop_column("version")
+    _restaurar_fts()
+
+
+def _restaurar_fts() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for sentencia in SQLITE_FTS_TRIGGERS_DDL:
+            op.execute(sentencia)
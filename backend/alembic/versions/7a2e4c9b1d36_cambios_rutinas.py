@@ -0,0 +1,72 @@
+"""updated_at en rutinas y registro de rutinas eliminadas
+
+Revision ID: 7a2e4c9b1d36
+Revises: 5c1d8e2f7a94
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a2e4c9b1d36"
+down_revision: Union[str, None] = "5c1d8e2f7a94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copia congelada de los triggers de rutinas_fts de 4b7e2d9c1a53 (la migración no depende del código de la app).
+# En SQLite batch_alter_table reconstruye rutinas y los triggers de esa tabla se pierden; el contenido de
+# rutinas_fts no cambia (copiar las filas y borrar la tabla vieja no dispara triggers), así que alcanza con
+# volver a crearlos
+SQLITE_FTS_TRIGGERS_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ai AFTER INSERT ON rutinas BEGIN "
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "VALUES (new.id, new.nombre, coalesce(new.descripcion, ''), ''); END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_au AFTER UPDATE OF nombre, descripcion ON rutinas BEGIN "
+    "UPDATE rutinas_fts SET nombre = new.nombre, descripcion = coalesce(new.descripcion, '') "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ad AFTER DELETE ON rutinas BEGIN "
+    "DELETE FROM rutinas_fts WHERE rowid = old.id; END",
+)
+
+
+def upgrade() -> None:
+    # Se agrega nullable, se completa con la fecha de creación y recién después pasa a NOT NULL
+    op.add_column("rutinas", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE rutinas SET updated_at = fecha_creacion")
+    with op.batch_alter_table("rutinas") as batch_op:
+        batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+    _restaurar_fts()
+    op.create_index("ix_rutinas_updated_at_id", "rutinas", ["updated_at", "id"], unique=False)
+
+    op.create_table(
+        "rutinas_eliminadas",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("rutina_id", sa.Integer(), nullable=False),
+        sa.Column("eliminada_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_rutinas_eliminadas_eliminada_at_rutina_id",
+        "rutinas_eliminadas",
+        ["eliminada_at", "rutina_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rutinas_eliminadas_eliminada_at_rutina_id", table_name="rutinas_eliminadas")
+    op.drop_table("rutinas_eliminadas")
+    op.drop_index("ix_rutinas_updated_at_id", table_name="rutinas")
+    with op.batch_alter_table("rutinas") as batch_op:
+        batch_op.drop_column("updated_at")
+    _restaurar_fts()
+
+
+def _restaurar_fts() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for sentencia in SQLITE_FTS_TRIGGERS_DDL:
+            op.execute(sentencia)
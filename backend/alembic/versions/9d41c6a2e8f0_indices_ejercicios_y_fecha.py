@@ -0,0 +1,29 @@
+"""indices de ejercicios y fecha de rutinas
+
+Revision ID: 9d41c6a2e8f0
+Revises: 4b7e2d9c1a53
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d41c6a2e8f0"
+down_revision: Union[str, None] = "4b7e2d9c1a53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_rutinas_fecha_creacion_id", "rutinas", ["fecha_creacion", "id"], unique=False)
+    op.create_index("ix_ejercicios_rutina_id_orden", "ejercicios", ["rutina_id", "orden"], unique=False)
+    op.create_index("ix_ejercicios_dia_semana_rutina_id", "ejercicios", ["dia_semana", "rutina_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ejercicios_dia_semana_rutina_id", table_name="ejercicios")
+    op.drop_index("ix_ejercicios_rutina_id_orden", table_name="ejercicios")
+    op.drop_index("ix_rutinas_fecha_creacion_id", table_name="rutinas")
@@ -0,0 +1,68 @@
+"""sesiones de entrenamiento y series realizadas
+
+Revision ID: b3d6f0a8c417
+Revises: 7a2e4c9b1d36
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3d6f0a8c417"
+down_revision: Union[str, None] = "7a2e4c9b1d36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sesiones_entrenamiento",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("rutina_id", sa.Integer(), nullable=True),
+        sa.Column("performed_at", sa.DateTime(), nullable=False),
+        sa.Column("duracion_minutos", sa.Integer(), nullable=True),
+        sa.Column("notas", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_sesiones_entrenamiento_usuario_id_performed_at",
+        "sesiones_entrenamiento",
+        ["usuario_id", "performed_at"],
+        unique=False,
+    )
+    op.create_table(
+        "series_realizadas",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("sesion_id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("ejercicio_id", sa.Integer(), nullable=True),
+        sa.Column("nombre", sa.String(length=120), nullable=False),
+        sa.Column("numero", sa.Integer(), nullable=False),
+        sa.Column("repeticiones", sa.Integer(), nullable=False),
+        sa.Column("peso", sa.Float(), nullable=True),
+        sa.Column("performed_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["sesion_id"], ["sesiones_entrenamiento.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_series_realizadas_usuario_id_performed_at",
+        "series_realizadas",
+        ["usuario_id", "performed_at"],
+        unique=False,
+    )
+    op.create_index("ix_series_realizadas_sesion_id", "series_realizadas", ["sesion_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_series_realizadas_sesion_id", table_name="series_realizadas")
+    op.drop_index("ix_series_realizadas_usuario_id_performed_at", table_name="series_realizadas")
+    op.drop_table("series_realizadas")
+    op.drop_index("ix_sesiones_entrenamiento_usuario_id_performed_at", table_name="sesiones_entrenamiento")
+    op.drop_table("sesiones_entrenamiento")
@@ -0,0 +1,105 @@
+"""rollups de volumen por rutina y por día
+
+Revision ID: d5e8a1c3f690
+Revises: b3d6f0a8c417
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5e8a1c3f690"
+down_revision: Union[str, None] = "b3d6f0a8c417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIAS = ("LUNES", "MARTES", "MIERCOLES", "JUEVES", "VIERNES", "SABADO", "DOMINGO")
+
+
+def _sumas() -> list[sa.Column]:
+    return [
+        sa.Column("ejercicios", sa.Integer(), nullable=False),
+        sa.Column("series", sa.Integer(), nullable=False),
+        sa.Column("repeticiones", sa.Integer(), nullable=False),
+        sa.Column("volumen", sa.Float(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # El tipo dia_semana_enum ya existe en PostgreSQL (lo creó la tabla ejercicios)
+    if op.get_bind().dialect.name == "postgresql":
+        dia_semana = postgresql.ENUM(*DIAS, name="dia_semana_enum", create_type=False)
+    else:
+        dia_semana = sa.Enum(*DIAS, name="dia_semana_enum", create_constraint=True)
+
+    op.create_table(
+        "estadisticas_rutinas_dias",
+        *_sumas(),
+        sa.Column("rutina_id", sa.Integer(), nullable=False),
+        sa.Column("dia_semana", dia_semana, nullable=False),
+        sa.ForeignKeyConstraint(["rutina_id"], ["rutinas.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("rutina_id", "dia_semana"),
+    )
+    op.create_index(
+        "ix_estadisticas_rutinas_dias_dia_semana_volumen",
+        "estadisticas_rutinas_dias",
+        ["dia_semana", "volumen", "rutina_id"],
+        unique=False,
+    )
+    op.create_table(
+        "estadisticas_rutinas",
+        *_sumas(),
+        sa.Column("rutina_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["rutina_id"], ["rutinas.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("rutina_id"),
+    )
+    op.create_index("ix_estadisticas_rutinas_volumen", "estadisticas_rutinas", ["volumen", "rutina_id"], unique=False)
+    op.create_table(
+        "estadisticas_dias",
+        *_sumas(),
+        sa.Column("dia_semana", dia_semana, nullable=False),
+        sa.Column("rutinas", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("dia_semana"),
+    )
+
+    # Rollups iniciales desde los ejercicios existentes; estadisticas_dias siempre tiene los 7 días
+    op.execute(
+        "INSERT INTO estadisticas_rutinas_dias (rutina_id, dia_semana, ejercicios, series, repeticiones, volumen) "
+        "SELECT rutina_id, dia_semana, count(*), sum(series), sum(series * repeticiones), "
+        "coalesce(sum(series * repeticiones * peso), 0) "
+        "FROM ejercicios WHERE dia_semana IS NOT NULL GROUP BY rutina_id, dia_semana"
+    )
+    op.execute(
+        "INSERT INTO estadisticas_rutinas (rutina_id, ejercicios, series, repeticiones, volumen) "
+        "SELECT rutina_id, sum(ejercicios), sum(series), sum(repeticiones), sum(volumen) "
+        "FROM estadisticas_rutinas_dias GROUP BY rutina_id"
+    )
+    op.execute(
+        "INSERT INTO estadisticas_dias (dia_semana, rutinas, ejercicios, series, repeticiones, volumen) "
+        "SELECT dia_semana, count(*), sum(ejercicios), sum(series), sum(repeticiones), sum(volumen) "
+        "FROM estadisticas_rutinas_dias GROUP BY dia_semana"
+    )
+    bind = op.get_bind()
+    existentes = {fila[0] for fila in bind.execute(sa.text("SELECT dia_semana FROM estadisticas_dias"))}
+    for dia in DIAS:
+        if dia not in existentes:
+            bind.execute(
+                sa.text(
+                    "INSERT INTO estadisticas_dias (dia_semana, rutinas, ejercicios, series, repeticiones, volumen) "
+                    "VALUES (:dia, 0, 0, 0, 0, 0)"
+                ),
+                {"dia": dia},
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("estadisticas_dias")
+    op.drop_index("ix_estadisticas_rutinas_volumen", table_name="estadisticas_rutinas")
+    op.drop_table("estadisticas_rutinas")
+    op.drop_index("ix_estadisticas_rutinas_dias_dia_semana_volumen", table_name="estadisticas_rutinas_dias")
+    op.drop_table("estadisticas_rutinas_dias")
@@ -0,0 +1,30 @@
+"""token_version en usuarios
+
+Revision ID: e3a9f1b7c205
+Revises: 9d41c6a2e8f0
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a9f1b7c205"
+down_revision: Union[str, None] = "9d41c6a2e8f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "usuarios",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("usuarios") as batch_op:
+        batch_op.drop_column("token_version")
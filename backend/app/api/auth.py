@@ -1,10 +1,15 @@
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
-from app.api.deps import get_current_user
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.api.deps import get_current_user, invalidar_usuario
+from app.core.security import (
+    create_access_token,
+    get_password_hash_async,
+    verify_and_update_password_async,
+)
 from app.db.session import get_session
 from app.models import Usuario
 from app.schemas.usuario import Token, UsuarioCreate, UsuarioLogin, UsuarioRead
@@ -14,31 +19,46 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+# register y login son async: el hash bcrypt corre en el pool acotado de app.core.security
+# y las consultas a la base se delegan al threadpool con run_in_threadpool, así ningún hilo
+# del threadpool queda bloqueado esperando a bcrypt
+
+
 @router.post("/register", response_model=UsuarioRead, status_code=status.HTTP_201_CREATED)
-def register_usuario(payload: UsuarioCreate, session: Session = Depends(get_session)) -> Usuario:
+async def register_usuario(payload: UsuarioCreate, session: Session = Depends(get_session)) -> Usuario:
     logger.info("Registrando nuevo usuario: %s", payload.email)
-    existing = session.exec(select(Usuario).where(Usuario.email == payload.email)).first()
+    existing = await run_in_threadpool(_buscar_usuario_por_email, session, payload.email)
     if existing:
         logger.warning("Intento de registro con email existente: %s", payload.email)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El email ya está registrado")
 
-    usuario = Usuario(nombre=payload.nombre, email=payload.email, password_hash=get_password_hash(payload.password))
-    session.add(usuario)
-    session.commit()
-    session.refresh(usuario)
+    password_hash = await get_password_hash_async(payload.password)
+    usuario = Usuario(nombre=payload.nombre, email=payload.email, password_hash=password_hash)
+    await run_in_threadpool(_guardar_usuario, session, usuario)
     logger.info("Usuario registrado correctamente con id %s", usuario.id)
     return usuario
 
 
 @router.post("/login", response_model=Token)
-def login_usuario(payload: UsuarioLogin, session: Session = Depends(get_session)) -> Token:
+async def login_usuario(payload: UsuarioLogin, session: Session = Depends(get_session)) -> Token:
     logger.info("Intento de login para %s", payload.email)
-    usuario = session.exec(select(Usuario).where(Usuario.email == payload.email)).first()
-    if not usuario or not verify_password(payload.password, usuario.password_hash):
+    usuario = await run_in_threadpool(_buscar_usuario_por_email, session, payload.email)
+    valido, nuevo_hash = (
+        await verify_and_update_password_async(payload.password, usuario.password_hash)
+        if usuario
+        else (False, None)
+    )
+    if not usuario or not valido:
         logger.warning("Credenciales invalidas para %s", payload.email)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-    token = create_access_token(usuario.id)
+    if nuevo_hash:
+        # El hash tenía un costo distinto al configurado: se reemplaza ahora que conocemos la contraseña
+        usuario.password_hash = nuevo_hash
+        await run_in_threadpool(_guardar_usuario, session, usuario)
+        logger.info("Hash de contraseña actualizado para usuario id %s", usuario.id)
+
+    token = create_access_token(usuario.id, usuario.token_version)
     logger.info("Login exitoso para usuario id %s", usuario.id)
     return Token(access_token=token)
 
@@ -46,3 +66,33 @@ def login_usuario(payload: UsuarioLogin, session: Session = Depends(get_session)
 @router.get("/me", response_model=UsuarioRead)
 def me(current_user: Usuario = Depends(get_current_user)) -> Usuario:
     return current_user
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_usuario(
+    current_user: Usuario = Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> None:
+    # Revoca todos los tokens emitidos hasta ahora subiendo la versión del usuario
+    usuario = session.get(Usuario, current_user.id)
+    if not usuario:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
+    usuario.token_version += 1
+    session.add(usuario)
+    session.commit()
+    invalidar_usuario(usuario.id, usuario.token_version)
+    logger.info("Tokens revocados para usuario id %s", usuario.id)
+
+
+def _buscar_usuario_por_email(session: Session, email: str) -> Usuario | None:
+    usuario = session.exec(select(Usuario).where(Usuario.email == email)).first()
+    # Devuelve la conexión al pool antes de esperar a bcrypt; si no, una ráfaga de logins
+    # encolados en el executor retiene todas las conexiones y bloquea al resto de la API
+    session.close()
+    return usuario
+
+
+def _guardar_usuario(session: Session, usuario: Usuario) -> None:
+    session.add(usuario)
+    session.commit()
+    session.refresh(usuario)
@@ -1,8 +1,10 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlmodel import Session
 
+from app.core.cache import TTLCache
+from app.core.cache_respuestas import crear_backend_compartido
 from app.core.config import get_settings
 from app.db.session import get_session
 from app.models import Usuario
@@ -11,6 +13,43 @@ from app.schemas.usuario import TokenPayload
 security_scheme = HTTPBearer(auto_error=False)
 settings = get_settings()
 
+# Copias desacopladas de la sesión de los usuarios autenticados recientemente.
+# Evitan leer la base en cada request; invalidar_usuario() las descarta al revocar tokens.
+# La caché es de cada proceso: con varios workers, el logout solo la vacía en el que lo atendió.
+# Sin CACHE_BACKEND, los demás aceptan el token revocado hasta USER_CACHE_TTL_SECONDS
+_usuarios_cache: TTLCache[int, Usuario] = TTLCache(
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    maxsize=settings.user_cache_maxsize,
+)
+# Con CACHE_BACKEND=redis el logout publica la nueva token_version y cada proceso la compara con su copia
+# (una lectura de Redis por request en vez de una de la base). La clave vive lo mismo que la caché local:
+# después de ese plazo ninguna copia anterior al logout sigue en uso
+_versiones_compartidas = crear_backend_compartido(settings)
+
+
+def _clave_version(usuario_id: int) -> str:
+    return f"token_version:{usuario_id}"
+
+
+def invalidar_usuario(usuario_id: int, token_version: int) -> None:
+    _usuarios_cache.pop(usuario_id)
+    if _versiones_compartidas is not None and settings.user_cache_ttl_seconds > 0:
+        _versiones_compartidas.set(
+            _clave_version(usuario_id), str(token_version).encode("ascii"), settings.user_cache_ttl_seconds
+        )
+
+
+def _usuario_en_cache(usuario_id: int) -> Usuario | None:
+    usuario = _usuarios_cache.get(usuario_id)
+    if usuario is None or _versiones_compartidas is None:
+        return usuario
+    # La copia local quedó vieja si otro proceso revocó los tokens: se vuelve a leer de la base
+    version = _versiones_compartidas.get(_clave_version(usuario_id))
+    if version is not None and int(version) != usuario.token_version:
+        _usuarios_cache.pop(usuario_id)
+        return None
+    return usuario
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security_scheme),
@@ -18,8 +57,23 @@ def get_current_user(
 ) -> Usuario:
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
+    return _usuario_del_token(credentials.credentials, session)
 
-    token = credentials.credentials
+
+def get_current_user_stream(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security_scheme),
+    access_token: str | None = Query(default=None, description="JWT para EventSource, que no puede enviar headers"),
+    session: Session = Depends(get_session),
+) -> Usuario:
+    # Solo para GET /rutinas/stream: el EventSource del navegador no manda Authorization, así que el token
+    # también se acepta en la query (con la misma validación de versión que el header)
+    token = credentials.credentials if credentials is not None else access_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
+    return _usuario_del_token(token, session)
+
+
+def _usuario_del_token(token: str, session: Session) -> Usuario:
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
         token_data = TokenPayload(**payload)
@@ -29,8 +83,21 @@ def get_current_user(
     if token_data.sub is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
-    usuario = session.get(Usuario, token_data.sub)
-    if not usuario:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
+    # Camino rápido: usuario en caché con la misma versión de token, sin ir a la base
+    usuario = _usuario_en_cache(token_data.sub)
+    if usuario is not None and token_data.ver > usuario.token_version:
+        # Token emitido después de un logout atendido por otro proceso: la copia local quedó vieja
+        # y se vuelve a leer de la base (un token más viejo que la copia sí está revocado)
+        _usuarios_cache.pop(token_data.sub)
+        usuario = None
+    if usuario is None:
+        usuario = session.get(Usuario, token_data.sub)
+        if not usuario:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
+        usuario = Usuario.model_validate(usuario)
+        _usuarios_cache.set(token_data.sub, usuario)
+
+    if token_data.ver != usuario.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revocado")
 
     return usuario
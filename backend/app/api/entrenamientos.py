@@ -0,0 +1,188 @@
+# este archivo define las rutas para registrar y consultar los entrenamientos realizados
+# cada sesión llega completa (con todas sus series) en un solo request y se guarda con dos INSERT:
+# la sesión con RETURNING y las series en un executemany de Core, sin objetos ORM por fila
+# las tablas solo reciben filas nuevas; el historial de cada usuario se lee con rangos sobre
+# (usuario_id, performed_at) y paginación por cursor, nunca recorriendo las filas de otros usuarios
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, cast
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert, literal, tuple_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlmodel import Session, select
+
+from app.api.deps import get_current_user
+from app.api.paginacion import decode_cursor, encode_cursor
+from app.db.session import get_session
+from app.models import Ejercicio, Rutina, SerieRealizada, SesionEntrenamiento, Usuario
+from app.schemas.entrenamiento import (
+    DEFAULT_PAGE_SIZE_HISTORIAL,
+    MAX_PAGE_SIZE_HISTORIAL,
+    SerieRead,
+    SeriesPaginadas,
+    SesionCreada,
+    SesionCreate,
+    SesionesPaginadas,
+    SesionRead,
+    fecha_utc,
+)
+
+router = APIRouter(
+    prefix="/entrenamientos",
+    tags=["entrenamientos"],
+    dependencies=[Depends(get_current_user)],
+)
+
+
+@router.post("/sesiones", response_model=SesionCreada, status_code=status.HTTP_201_CREATED)
+def registrar_sesion(
+    payload: SesionCreate,
+    usuario: Usuario = Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> SesionCreada:
+    # Las series que siguen el plan guardan el nombre actual del ejercicio (una consulta para todos)
+    ids_ejercicios = {serie.ejercicio_id for serie in payload.series if serie.ejercicio_id is not None}
+    nombres: dict[int, str] = {}
+    rutina_de: dict[int, int] = {}
+    if ids_ejercicios:
+        ejercicio_id = cast(InstrumentedAttribute[Any], Ejercicio.id)
+        for id_ejercicio, nombre, id_rutina in session.exec(
+            select(ejercicio_id, Ejercicio.nombre, Ejercicio.rutina_id).where(ejercicio_id.in_(ids_ejercicios))
+        ).all():
+            nombres[id_ejercicio] = nombre
+            rutina_de[id_ejercicio] = id_rutina
+        faltantes = sorted(ids_ejercicios - nombres.keys())
+        if faltantes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Ejercicios no encontrados: {', '.join(map(str, faltantes))}",
+            )
+    if payload.rutina_id is not None:
+        # Las series del plan deben ser ejercicios de la rutina indicada: una sesión no registra series
+        # contra ejercicios de otra rutina
+        ajenos = sorted(id_ejercicio for id_ejercicio, id_rutina in rutina_de.items() if id_rutina != payload.rutina_id)
+        if ajenos:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Ejercicios que no pertenecen a la rutina {payload.rutina_id}: {', '.join(map(str, ajenos))}",
+            )
+        # Si algún ejercicio es de esa rutina, ya se sabe que existe y no hace falta consultarla
+        rutina_id = cast(InstrumentedAttribute[Any], Rutina.id)
+        if not rutina_de and session.exec(select(rutina_id).where(rutina_id == payload.rutina_id)).first() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
+
+    sesion_id = session.execute(
+        insert(SesionEntrenamiento)
+        .values(
+            usuario_id=usuario.id,
+            rutina_id=payload.rutina_id,
+            performed_at=payload.performed_at,
+            duracion_minutos=payload.duracion_minutos,
+            notas=payload.notas,
+        )
+        .returning(SesionEntrenamiento.id)
+    ).scalar_one()
+    series = [
+        {
+            "sesion_id": sesion_id,
+            "usuario_id": usuario.id,
+            "ejercicio_id": serie.ejercicio_id,
+            "nombre": serie.nombre or nombres[cast(int, serie.ejercicio_id)],
+            "numero": numero,
+            "repeticiones": serie.repeticiones,
+            "peso": serie.peso,
+            "performed_at": serie.performed_at or payload.performed_at,
+        }
+        for numero, serie in enumerate(payload.series, start=1)
+    ]
+    session.execute(insert(SerieRealizada.__table__), series)  # type: ignore[attr-defined]
+    session.commit()
+    return SesionCreada(id=sesion_id, series_registradas=len(series))
+
+
+@router.get("/sesiones", response_model=SesionesPaginadas)
+def listar_sesiones(
+    desde: datetime | None = Query(default=None, description="Sesiones desde esta fecha (incluida)"),
+    hasta: datetime | None = Query(default=None, description="Sesiones anteriores a esta fecha"),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
+    page_size: int = Query(default=DEFAULT_PAGE_SIZE_HISTORIAL, ge=1, le=MAX_PAGE_SIZE_HISTORIAL),
+    usuario: Usuario = Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> SesionesPaginadas:
+    # Una página de sesiones por rango sobre (usuario_id, performed_at) y las series de todas en otra consulta
+    statement = _rango_usuario(select(SesionEntrenamiento), SesionEntrenamiento, usuario, desde, hasta, cursor)
+    sesiones, next_cursor = _recortar(list(session.exec(statement.limit(page_size + 1)).all()), page_size)
+
+    series_por_sesion: dict[int, list[SerieRealizada]] = defaultdict(list)
+    if sesiones:
+        sesion_id = cast(InstrumentedAttribute[Any], SerieRealizada.sesion_id)
+        for serie in session.exec(
+            select(SerieRealizada)
+            .where(sesion_id.in_([sesion.id for sesion in sesiones]))
+            .order_by(sesion_id, SerieRealizada.numero)
+        ).all():
+            series_por_sesion[serie.sesion_id].append(serie)
+
+    items = [
+        SesionRead(
+            id=cast(int, sesion.id),
+            performed_at=sesion.performed_at,
+            rutina_id=sesion.rutina_id,
+            duracion_minutos=sesion.duracion_minutos,
+            notas=sesion.notas,
+            series=[SerieRead.model_validate(serie) for serie in series_por_sesion[cast(int, sesion.id)]],
+        )
+        for sesion in sesiones
+    ]
+    return SesionesPaginadas(items=items, next_cursor=next_cursor)
+
+
+@router.get("/series", response_model=SeriesPaginadas)
+def listar_series(
+    desde: datetime | None = Query(default=None, description="Series desde esta fecha (incluida)"),
+    hasta: datetime | None = Query(default=None, description="Series anteriores a esta fecha"),
+    ejercicio_id: int | None = Query(default=None, description="Solo las series de este ejercicio del plan"),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
+    page_size: int = Query(default=DEFAULT_PAGE_SIZE_HISTORIAL, ge=1, le=MAX_PAGE_SIZE_HISTORIAL),
+    usuario: Usuario = Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> SeriesPaginadas:
+    # Historial de series (p. ej. la progresión de un ejercicio) sin pasar por las sesiones
+    statement = _rango_usuario(select(SerieRealizada), SerieRealizada, usuario, desde, hasta, cursor)
+    if ejercicio_id is not None:
+        statement = statement.where(SerieRealizada.ejercicio_id == ejercicio_id)
+    series, next_cursor = _recortar(list(session.exec(statement.limit(page_size + 1)).all()), page_size)
+    return SeriesPaginadas(items=[SerieRead.model_validate(serie) for serie in series], next_cursor=next_cursor)
+
+
+def _rango_usuario(
+    statement: Any,
+    modelo: type[SesionEntrenamiento] | type[SerieRealizada],
+    usuario: Usuario,
+    desde: datetime | None,
+    hasta: datetime | None,
+    cursor: str | None,
+) -> Any:
+    # Igualdad en usuario_id y rango en performed_at: recorre solo el tramo del índice de ese usuario,
+    # de lo más reciente a lo más antiguo
+    performed_at = cast(InstrumentedAttribute[Any], modelo.performed_at)
+    modelo_id = cast(InstrumentedAttribute[Any], modelo.id)
+    statement = statement.where(modelo.usuario_id == usuario.id)
+    if desde is not None:
+        statement = statement.where(performed_at >= fecha_utc(desde))
+    if hasta is not None:
+        statement = statement.where(performed_at < fecha_utc(hasta))
+    if cursor:
+        fecha_cursor, id_cursor = decode_cursor(cursor)
+        statement = statement.where(tuple_(performed_at, modelo_id) < tuple_(literal(fecha_cursor), literal(id_cursor)))
+    return statement.order_by(performed_at.desc(), modelo_id.desc())
+
+
+def _recortar(filas: list[Any], page_size: int) -> tuple[list[Any], str | None]:
+    if len(filas) <= page_size:
+        return filas, None
+    filas = filas[:page_size]
+    return filas, encode_cursor(filas[-1].performed_at, filas[-1].id)
+
@@ -0,0 +1,23 @@
+# este archivo arma y lee los cursores de la paginación por clave (fecha, id) que usan los listados
+# el cursor es el JSON {"f": fecha ISO, "id": id} en base64 url-safe sin relleno: opaco para el cliente
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(fecha: datetime, fila_id: int) -> str:
+    raw = json.dumps({"f": fecha.isoformat(), "id": fila_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(data["f"]), int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido") from None
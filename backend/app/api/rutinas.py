@@ -2,26 +2,80 @@
 # incluye operaciones para listar, obtener, crear, actualizar y eliminar rutinas
 # utiliza FastAPI junto con SQLModel para interactuar con la base de datos
 
-from typing import Any, Sequence, Union, cast
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from string import Formatter
+from typing import Any, AsyncIterator, Iterator, Sequence, Union, cast
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func
+from anyio import from_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    case,
+    func,
+    insert,
+    literal,
+    literal_column,
+    text,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy import cast as cast_sql
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
-from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import InstrumentedAttribute, set_committed_value
 from sqlmodel import Session, select
 
-from app.api.deps import get_current_user
-from app.db.session import get_session
-from app.models import DiaSemana, Ejercicio, Rutina
+from app.api.deps import get_current_user, get_current_user_stream
+from app.api.paginacion import decode_cursor, encode_cursor
+from app.core.cache import TTLCache
+from app.core.cache_respuestas import crear_cache_respuestas
+from app.core.config import get_settings
+from app.core.eventos import DifusorEventos, EventoRutina
+from app.db import catalogo, estadisticas
+from app.db.loading import rutina_con_ejercicios, rutina_sin_relaciones
+from app.db.search import get_backend_busqueda
+from app.db.session import engine, get_session
+from app.models import DiaSemana, Ejercicio, Rutina, RutinaEliminada
 from app.schemas.rutina import (
+    CountMode,
+    DEFAULT_RUTINAS_ESTADISTICAS,
     EjercicioCreate,
+    EjercicioRead,
+    EjercicioUpdate,
+    FormatoCatalogo,
+    MAX_CAMBIOS,
+    MAX_RUTINAS_BATCH,
+    MAX_RUTINAS_ESTADISTICAS,
+    RutinaBatchResponse,
+    RutinaCambiosResponse,
     RutinaCreate,
+    RutinaDuplicateBatchPayload,
+    RutinaDuplicateBatchResponse,
     RutinaDuplicatePayload,
+    RutinaEstadisticasResponse,
+    RutinaImportResponse,
     RutinaPaginatedResponse,
     RutinaRead,
+    RutinaResumen,
+    RutinaResumenPaginatedResponse,
+    RutinaSearchResponse,
     RutinaUpdate,
+    VolumenBase,
+    VolumenDia,
+    VolumenRutina,
+    VolumenSemanal,
 )
+from app.schemas import serializacion
+from app.schemas.serializacion import SeleccionCampos
 
 def _rutina_ejercicios_attr() -> InstrumentedAttribute[Any]:
     return cast(InstrumentedAttribute[Any], Rutina.ejercicios)
@@ -34,6 +88,10 @@ def _rutina_nombre_attr() -> InstrumentedAttribute[Any]:
 def _rutina_fecha_attr() -> InstrumentedAttribute[Any]:
     return cast(InstrumentedAttribute[Any], Rutina.fecha_creacion)
 
+
+def _rutina_id_attr() -> InstrumentedAttribute[Any]:
+    return cast(InstrumentedAttribute[Any], Rutina.id)
+
 router = APIRouter(
     prefix="/rutinas",
     tags=["rutinas"],
@@ -42,6 +100,9 @@ router = APIRouter(
 # Router para las operaciones de rutinas
 # Todas las rutas estarán bajo el prefijo /rutinas
 # Las rutas estarán etiquetadas con "rutinas" para documentación
+# GET /rutinas/stream va en un router aparte: además del header acepta ?access_token= (EventSource no
+# manda headers). main.py lo incluye antes que router para que /stream no caiga en /{rutina_id}
+router_stream = APIRouter(prefix="/rutinas", tags=["rutinas"])
 
 ## Todos los handlers dependen de get_session, el generador de sesiones SQLModel definido en app.db.session, así que FastAPI abre una sesión por request y la cierra al final.
 ## Para convertir objetos de base de datos a JSON, cada endpoint usa los esquemas de app.schemas.rutina (RutinaRead, RutinaCreate, etc.), lo que asegura que la respuesta tenga siempre la forma esperada y valida la entrada de forma automática.
@@ -50,69 +111,535 @@ router = APIRouter(
 
 DEFAULT_PAGE_SIZE = 9
 MAX_PAGE_SIZE = 50
+MAX_RESULTADOS_BUSQUEDA = 50
+# Columnas NOT NULL de ejercicios: PATCH no permite vaciarlas
+CAMPOS_EJERCICIO_OBLIGATORIOS = frozenset({"nombre", "dia_semana", "series", "repeticiones", "orden"})
+# Campos de un ejercicio que cambian los rollups de volumen (app.db.estadisticas)
+CAMPOS_EJERCICIO_VOLUMEN = frozenset({"dia_semana", "series", "repeticiones", "peso"})
+# Columnas que se copian al duplicar (todo salvo id y rutina_id)
+COLUMNAS_EJERCICIO_COPIADAS = ("nombre", "dia_semana", "series", "repeticiones", "peso", "notas", "orden")
+MAX_LARGO_NOMBRE = 120
+# El token de la última página de cambios no pasa de ahora - este margen: una escritura que tomó su
+# updated_at antes pero confirmó después de la lectura entra igual en el próximo pedido
+MARGEN_CAMBIOS = timedelta(seconds=5)
+# Las respuestas dependen del usuario autenticado y se revalidan siempre con If-None-Match
+CACHE_CONTROL = "private, no-cache"
 
+settings = get_settings()
 
-@router.get("/", response_model=RutinaPaginatedResponse) # Lista todas las rutinas con filtros opcionales
-def list_rutinas(
-    search: str | None = Query(default=None, description="Filtra por nombre de rutina"),
+# Totales por filtro (search, dia_semana); se vacía en cada escritura sobre rutinas
+_conteos_cache: TTLCache[tuple[str | None, DiaSemana | None], int] = TTLCache(
+    ttl_seconds=settings.count_cache_ttl_seconds,
+)
+
+
+# JSON de RutinaRead por id (GET /rutinas/{id}); se invalida en cada escritura sobre la rutina
+rutinas_cache = crear_cache_respuestas(settings, prefijo="rutina")
+
+
+# Eventos de escrituras para los clientes de GET /rutinas/stream
+difusor = DifusorEventos(capacidad_cola=settings.sse_queue_size)
+# Espera sugerida al navegador antes de reconectar un stream cortado
+SSE_RETRY_MS = 3000
+
+
+@dataclass
+class ParametrosListado:
+    search: str | None
+    dia_semana: DiaSemana | None
+    page: int
+    cursor: str | None
+    page_size: int
+    count: CountMode
+
+
+def get_parametros_listado(
+    search: str | None = Query(
+        default=None,
+        description="Filtra por texto en nombre, descripción o nombres de ejercicios",
+    ),
     dia_semana: DiaSemana | None = Query(
         default=None,
         description="Devuelve solo rutinas que contengan ejercicios en ese día",
     ),
     page: int = Query(default=1, ge=1, description="Número de página (1-indexed)"),
+    cursor: str | None = Query(
+        default=None,
+        description="Cursor opaco devuelto en next_cursor; si se envía se ignora page",
+    ),
     page_size: int = Query(
         default=DEFAULT_PAGE_SIZE,
         ge=1,
         le=MAX_PAGE_SIZE,
         description="Cantidad de rutinas por página",
     ),
-    session: Session = Depends(get_session),
-) -> RutinaPaginatedResponse:
-    statement = select(Rutina)
+    count: CountMode = Query(
+        default=CountMode.EXACT,
+        description="Cómo calcular total: exact, estimated o none",
+    ),
+) -> ParametrosListado:
+    # Parámetros comunes a los listados completos y resumidos
+    return ParametrosListado(
+        search=search.strip() if search else None,
+        dia_semana=dia_semana,
+        page=page,
+        cursor=cursor,
+        page_size=page_size,
+        count=count,
+    )
 
-    if search:
-        criterio = f"%{search.strip()}%"
-        statement = statement.where(_rutina_nombre_attr().ilike(criterio))
 
-    if dia_semana:
-        statement = statement.join(_rutina_ejercicios_attr()).where(Ejercicio.dia_semana == dia_semana).distinct()
+def get_seleccion_campos(
+    fields: str | None = Query(
+        default=None,
+        description="Campos a devolver de cada rutina, p. ej. nombre,ejercicios.nombre (por defecto todos)",
+    ),
+) -> SeleccionCampos | None:
+    if fields is None:
+        return None
+    try:
+        return serializacion.parsear_campos(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
 
-    offset = (page - 1) * page_size
 
-    count_subquery = statement.order_by(None).subquery()
-    total = session.exec(select(func.count()).select_from(count_subquery)).one()
+def get_ids_batch(
+    ids: list[str] = Query(
+        ...,
+        description=f"Ids separados por coma (ids=3,1,7) o repetidos (ids=3&ids=1); hasta {MAX_RUTINAS_BATCH}",
+    ),
+) -> list[int]:
+    # Sin repetidos y en el orden del primer pedido de cada id
+    try:
+        pedidos = [int(parte) for valor in ids for parte in valor.split(",") if parte.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids debe ser una lista de enteros") from None
+    unicos = list(dict.fromkeys(pedidos))
+    if not unicos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids no puede estar vacío")
+    if len(unicos) > MAX_RUTINAS_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Se pueden pedir hasta {MAX_RUTINAS_BATCH} rutinas por request",
+        )
+    return unicos
 
-    paginated_statement = (
-        statement
-        .options(selectinload(_rutina_ejercicios_attr()))
-        .order_by(_rutina_fecha_attr().desc())
-        .offset(offset)
-        .limit(page_size)
-    )
 
-    rutinas = session.exec(paginated_statement).all()
-    total_pages = (total + page_size - 1) // page_size if total else 0
+@router.get("/", response_model=RutinaPaginatedResponse) # Lista todas las rutinas con filtros opcionales
+def list_rutinas(
+    response: Response,
+    params: ParametrosListado = Depends(get_parametros_listado),
+    if_none_match: str | None = Header(default=None),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: Session = Depends(get_session),
+) -> RutinaPaginatedResponse | Response:
+    statement = _filtrar_rutinas(select(Rutina), params)
+    total, total_estimado = _contar_rutinas(session, statement, params)
+
+    if if_none_match:
+        # Revalidación: solo (id, version) de la página, sin ejercicios ni serialización
+        versiones = _filtrar_rutinas(select(_rutina_id_attr(), Rutina.version, _rutina_fecha_attr()), params)
+        filas = session.exec(_paginar_rutinas(versiones, params)).all()
+        etag = _etag_listado(filas[: params.page_size], total, total_estimado, len(filas) > params.page_size)
+        etag = _etag_con_campos(etag, campos)
+        if _coincide_etag(if_none_match, etag):
+            return _no_modificado(etag)
 
+    # Si fields no pide ejercicios, no se hace la consulta de ejercicios
+    carga = rutina_sin_relaciones() if campos is not None and campos.ejercicio is None else rutina_con_ejercicios()
+    paginated_statement = _paginar_rutinas(statement.options(*carga), params)
+    rutinas, next_cursor = _recortar_pagina(list(session.exec(paginated_statement).all()), params.page_size)
+
+    etag = _etag_con_campos(_etag_listado(rutinas, total, total_estimado, next_cursor is not None), campos)
+    metadatos = _metadatos_pagina(total, total_estimado, params)
+    if campos is not None or settings.fast_json_responses:
+        # Devuelve los bytes ya armados: FastAPI no revalida contra response_model
+        # (una respuesta parcial tampoco cumpliría RutinaRead)
+        cuerpo = serializacion.listado_json(rutinas, {**metadatos, "next_cursor": next_cursor}, campos)
+        return _respuesta_json(cuerpo, etag)
+
+    _agregar_etag(response, etag)
     return RutinaPaginatedResponse(
         items=rutinas,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
+        next_cursor=next_cursor,
+        **metadatos,
     ) # Devuelve la lista paginada y metadatos
 
 
-@router.get("/{rutina_id}", response_model=RutinaRead)
-def get_rutina(rutina_id: int, session: Session = Depends(get_session)) -> Rutina:
+@router.get("/resumen", response_model=RutinaResumenPaginatedResponse)
+def list_rutinas_resumen(
+    params: ParametrosListado = Depends(get_parametros_listado),
+    session: Session = Depends(get_session),
+) -> RutinaResumenPaginatedResponse:
+    # Versión liviana del listado para las tarjetas: no trae ejercicios, solo su cantidad y los días
+    columnas = select(
+        _rutina_id_attr(),
+        _rutina_nombre_attr(),
+        Rutina.descripcion,
+        _rutina_fecha_attr(),
+    )
+    statement = _filtrar_rutinas(columnas, params)
+    total, total_estimado = _contar_rutinas(session, statement, params)
+
+    # Primero se recorta la página de rutinas y recién después se agregan sus ejercicios
+    pagina = _paginar_rutinas(statement, params).subquery("pagina")
+    ejercicio_rutina_id = cast(InstrumentedAttribute[Any], Ejercicio.rutina_id)
+    ejercicio_dia = cast(InstrumentedAttribute[Any], Ejercicio.dia_semana)
+    resumen_statement = (
+        select(
+            pagina,
+            func.count(cast(InstrumentedAttribute[Any], Ejercicio.id)).label("cantidad_ejercicios"),
+            *[
+                func.max(case((ejercicio_dia == dia, 1), else_=0)).label(dia.value)
+                for dia in DiaSemana
+            ],
+        )
+        .select_from(pagina)
+        .outerjoin(Ejercicio, ejercicio_rutina_id == pagina.c.id)
+        .group_by(*pagina.c)
+        .order_by(pagina.c.fecha_creacion.desc(), pagina.c.id.desc())
+    )
+    filas, next_cursor = _recortar_pagina(list(session.exec(resumen_statement).all()), params.page_size)
+
+    items = [
+        RutinaResumen(
+            id=fila.id,
+            nombre=fila.nombre,
+            descripcion=fila.descripcion,
+            fecha_creacion=fila.fecha_creacion,
+            cantidad_ejercicios=fila.cantidad_ejercicios,
+            dias=[dia for dia in DiaSemana if getattr(fila, dia.value)],
+        )
+        for fila in filas
+    ]
+    return RutinaResumenPaginatedResponse(
+        items=items,
+        next_cursor=next_cursor,
+        **_metadatos_pagina(total, total_estimado, params),
+    )
+
+
+@router.get("/buscar", response_model=RutinaSearchResponse)
+def buscar_rutinas(
+    q: str = Query(..., min_length=1, max_length=120, description="Texto a buscar"),
+    dia_semana: DiaSemana | None = Query(default=None, description="Restringe a rutinas con ejercicios ese día"),
+    limit: int = Query(default=20, ge=1, le=MAX_RESULTADOS_BUSQUEDA, description="Cantidad máxima de resultados"),
+    session: Session = Depends(get_session),
+) -> RutinaSearchResponse | Response:
+    # Resultados ordenados por relevancia (nombre > ejercicios), usando el índice de texto del motor
+    coincidencias = get_backend_busqueda(engine).coincidencias(q)
+    if coincidencias is None:
+        return RutinaSearchResponse(resultados=[])
+
+    ranking = coincidencias.subquery("ranking")
     statement = (
         select(Rutina)
-        .options(selectinload(_rutina_ejercicios_attr()))
-        .where(Rutina.id == rutina_id)
+        .join(ranking, ranking.c.rutina_id == _rutina_id_attr())
+        .options(*rutina_con_ejercicios())
+        .order_by(ranking.c.rank.desc(), _rutina_fecha_attr().desc(), _rutina_id_attr().desc())
+        .limit(limit)
+    )
+    if dia_semana:
+        statement = statement.where(_rutina_ejercicios_attr().any(Ejercicio.dia_semana == dia_semana))
+
+    rutinas = session.exec(statement).all()
+    if settings.fast_json_responses:
+        return Response(content=serializacion.busqueda_json(rutinas), media_type="application/json")
+    return RutinaSearchResponse(resultados=[RutinaRead.model_validate(rutina) for rutina in rutinas])
+
+
+@router.get("/batch", response_model=RutinaBatchResponse)
+def get_rutinas_batch(
+    ids: list[int] = Depends(get_ids_batch),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: Session = Depends(get_session),
+) -> RutinaBatchResponse | Response:
+    # Varias rutinas por id en un request: un SELECT ... WHERE id IN (...) más una carga de ejercicios
+    # para todas; los ids inexistentes se informan en faltantes en lugar de devolver 404
+    carga = rutina_sin_relaciones() if campos is not None and campos.ejercicio is None else rutina_con_ejercicios()
+    encontradas = {
+        rutina.id: rutina
+        for rutina in session.exec(select(Rutina).where(_rutina_id_attr().in_(ids)).options(*carga)).all()
+    }
+    rutinas = [encontradas[rutina_id] for rutina_id in ids if rutina_id in encontradas]
+    faltantes = [rutina_id for rutina_id in ids if rutina_id not in encontradas]
+    if campos is not None or settings.fast_json_responses:
+        return Response(content=serializacion.batch_json(rutinas, faltantes, campos), media_type="application/json")
+    return RutinaBatchResponse(
+        resultados=[RutinaRead.model_validate(rutina) for rutina in rutinas],
+        faltantes=faltantes,
+    )
+
+
+@router.get("/cambios", response_model=RutinaCambiosResponse)
+def list_cambios(
+    since: str | None = Query(
+        default=None,
+        description="next_token de la respuesta anterior; sin token devuelve todo el catálogo",
+    ),
+    limit: int = Query(default=100, ge=1, le=MAX_CAMBIOS, description="Cambios por página"),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: Session = Depends(get_session),
+) -> RutinaCambiosResponse | Response:
+    # Sincronización incremental: rutinas con (updated_at, id) posterior al token y bajas del registro
+    # rutinas_eliminadas, ambas en orden por un rango sobre su índice y mezcladas en una sola secuencia
+    desde = decode_cursor(since) if since else None
+    carga = rutina_sin_relaciones() if campos is not None and campos.ejercicio is None else rutina_con_ejercicios()
+    updated_at = cast(InstrumentedAttribute[Any], Rutina.updated_at)
+    actualizadas_statement = (
+        select(Rutina).options(*carga).order_by(updated_at, _rutina_id_attr()).limit(limit + 1)
+    )
+    eventos: list[tuple[datetime, int, Rutina | None]] = []
+    if desde is not None:
+        posicion = tuple_(literal(desde[0]), literal(desde[1]))
+        actualizadas_statement = actualizadas_statement.where(tuple_(updated_at, _rutina_id_attr()) > posicion)
+        # Sin token no hacen falta bajas: el cliente todavía no tiene ninguna rutina
+        eliminada_at = cast(InstrumentedAttribute[Any], RutinaEliminada.eliminada_at)
+        eliminada_id = cast(InstrumentedAttribute[Any], RutinaEliminada.rutina_id)
+        bajas = session.exec(
+            select(eliminada_at, eliminada_id)
+            .where(tuple_(eliminada_at, eliminada_id) > posicion)
+            .order_by(eliminada_at, eliminada_id)
+            .limit(limit + 1)
+        ).all()
+        eventos.extend((fecha, rutina_id, None) for fecha, rutina_id in bajas)
+    eventos.extend((rutina.updated_at, cast(int, rutina.id), rutina) for rutina in session.exec(actualizadas_statement).all())
+    eventos.sort(key=lambda evento: (evento[0], evento[1]))
+    pagina, hay_mas = eventos[:limit], len(eventos) > limit
+
+    # Último estado de cada id en la página (un id reutilizado puede tener baja y alta)
+    ultimos: dict[int, Rutina | None] = {}
+    for _, rutina_id, rutina in pagina:
+        ultimos.pop(rutina_id, None)
+        ultimos[rutina_id] = rutina
+    rutinas = [rutina for rutina in ultimos.values() if rutina is not None]
+    eliminadas = [rutina_id for rutina_id, rutina in ultimos.items() if rutina is None]
+
+    posicion_final = (pagina[-1][0], pagina[-1][1]) if pagina else desde or (datetime.min, 0)
+    if not hay_mas:
+        # Lo más reciente se vuelve a enviar en el próximo pedido (aplicarlo dos veces no cambia nada)
+        posicion_final = min(posicion_final, (datetime.utcnow() - MARGEN_CAMBIOS, 0))
+    next_token = encode_cursor(*posicion_final)
+
+    if campos is not None or settings.fast_json_responses:
+        cuerpo = serializacion.cambios_json(rutinas, eliminadas, next_token, hay_mas, campos)
+        return Response(content=cuerpo, media_type="application/json")
+    return RutinaCambiosResponse(
+        actualizadas=[RutinaRead.model_validate(rutina) for rutina in rutinas],
+        eliminadas=eliminadas,
+        next_token=next_token,
+        hay_mas=hay_mas,
+    )
+
+
+@router.get("/estadisticas", response_model=RutinaEstadisticasResponse)
+def get_estadisticas(
+    limit: int = Query(
+        default=DEFAULT_RUTINAS_ESTADISTICAS,
+        ge=1,
+        le=MAX_RUTINAS_ESTADISTICAS,
+        description="Rutinas del ranking por volumen",
+    ),
+    dia_semana: DiaSemana | None = Query(default=None, description="Ranking por el volumen de este día"),
+    session: Session = Depends(get_session),
+) -> RutinaEstadisticasResponse:
+    # Tres lecturas de los rollups de app.db.estadisticas (ninguna recorre la tabla de ejercicios):
+    # las 7 filas de la distribución semanal, el ranking por índice y el detalle por día del ranking
+    orden_dias = {dia: posicion for posicion, dia in enumerate(DiaSemana)}
+    distribucion = {fila.dia_semana: fila for fila in estadisticas.distribucion_semanal(session)}
+    por_dia = [
+        VolumenSemanal.model_validate(distribucion[dia], from_attributes=True)
+        if dia in distribucion
+        else VolumenSemanal(dia_semana=dia)
+        for dia in DiaSemana
+    ]
+    for dia in por_dia:
+        # Las sumas incrementales de floats arrastran error de redondeo
+        dia.volumen = round(dia.volumen, 2)
+    totales = VolumenBase(
+        ejercicios=sum(dia.ejercicios for dia in por_dia),
+        series=sum(dia.series for dia in por_dia),
+        repeticiones=sum(dia.repeticiones for dia in por_dia),
+        volumen=round(sum(dia.volumen for dia in por_dia), 2),
     )
-    rutina = session.exec(statement).first()
+
+    ranking = estadisticas.ranking_rutinas(session, limit, dia_semana)
+    detalle = estadisticas.por_dia_rutinas(session, [fila.rutina_id for fila in ranking])
+    rutinas = [
+        VolumenRutina(
+            rutina_id=fila.rutina_id,
+            nombre=fila.nombre,
+            ejercicios=fila.ejercicios,
+            series=fila.series,
+            repeticiones=fila.repeticiones,
+            volumen=fila.volumen,
+            por_dia=[
+                VolumenDia.model_validate(dia, from_attributes=True)
+                for dia in sorted(detalle[fila.rutina_id], key=lambda dia: orden_dias[dia.dia_semana])
+            ],
+        )
+        for fila in ranking
+    ]
+    return RutinaEstadisticasResponse(totales=totales, por_dia=por_dia, rutinas=rutinas)
+
+
+@router_stream.get("/stream", dependencies=[Depends(get_current_user_stream)])
+async def stream_rutinas() -> StreamingResponse:
+    # Server-Sent Events con cada alta, cambio y baja de rutinas (id y versión; el detalle se pide
+    # con GET /rutinas/batch). Sin eventos, un comentario cada SSE_HEARTBEAT_SECONDS mantiene viva
+    # la conexión a través de proxies. Al (re)conectar, el cliente se pone al día con GET /rutinas/cambios
+    fin = time.monotonic() + settings.sse_max_connection_seconds
+
+    async def _eventos() -> AsyncIterator[bytes]:
+        # Se suscribe recién al empezar el envío: si la respuesta nunca se recorre (el cliente se fue
+        # antes, o falló algo previo) no queda una suscripción sin liberar
+        suscripcion = difusor.suscribir()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode("utf-8")
+            while (restante := fin - time.monotonic()) > 0:
+                espera = min(settings.sse_heartbeat_seconds, restante)
+                eventos, descartados = await suscripcion.siguientes(espera)
+                if descartados:
+                    yield _mensaje_sse("resync", json.dumps({"descartados": descartados}))
+                for evento in eventos:
+                    yield _mensaje_sse(evento.tipo, evento.datos())
+                if not eventos and not descartados:
+                    yield b": ping\n\n"
+        finally:
+            # También al cortarse la conexión: Starlette cancela el generador
+            difusor.desuscribir(suscripcion)
+
+    return StreamingResponse(
+        _eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+def export_rutinas(
+    formato: FormatoCatalogo = Query(default=FormatoCatalogo.NDJSON, description="ndjson o csv"),
+    search: str | None = Query(default=None, description="Mismo filtro que el listado"),
+    dia_semana: DiaSemana | None = Query(default=None, description="Mismo filtro que el listado"),
+) -> StreamingResponse:
+    # La respuesta se genera por bloques mientras se envía; el generador abre su propia sesión
+    # porque la de get_session se cierra antes de que empiece el streaming
+    params = ParametrosListado(
+        search=search.strip() if search else None,
+        dia_semana=dia_semana,
+        page=1,
+        cursor=None,
+        page_size=MAX_PAGE_SIZE,
+        count=CountMode.NONE,
+    )
+    statement = _filtrar_rutinas(
+        select(_rutina_id_attr(), Rutina.nombre, Rutina.descripcion, Rutina.fecha_creacion),
+        params,
+    )
+    exportar = catalogo.exportar_csv if formato == FormatoCatalogo.CSV else catalogo.exportar_ndjson
+
+    def _contenido() -> Iterator[bytes]:
+        with Session(engine) as session:
+            yield from exportar(session, statement)
+
+    media_type = "text/csv; charset=utf-8" if formato == FormatoCatalogo.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        _contenido(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="rutinas.{formato.value}"'},
+    )
+
+
+@router.post("/import", response_model=RutinaImportResponse)
+async def import_rutinas(
+    request: Request,
+    formato: FormatoCatalogo | None = Query(
+        default=None,
+        description="ndjson o csv; si no se envía se deduce del Content-Type",
+    ),
+    session: Session = Depends(get_session),
+) -> RutinaImportResponse:
+    # El cuerpo se consume a medida que llega: el hilo que valida e inserta pide cada chunk al
+    # event loop, así un catálogo grande nunca se carga entero en memoria
+    if formato is None:
+        content_type = request.headers.get("content-type", "")
+        formato = FormatoCatalogo.CSV if "csv" in content_type else FormatoCatalogo.NDJSON
+    leer = catalogo.leer_csv if formato == FormatoCatalogo.CSV else catalogo.leer_ndjson
+    chunks = request.stream()
+
+    def _cuerpo() -> Iterator[bytes]:
+        while True:
+            try:
+                yield from_thread.run(chunks.__anext__)
+            except StopAsyncIteration:
+                return
+
+    def _importar() -> catalogo.ResultadoImportacion:
+        return catalogo.importar_rutinas(session, leer(catalogo.lineas_desde_bytes(_cuerpo())))
+
+    resultado = await run_in_threadpool(_importar)
+    if resultado.importadas:
+        _conteos_cache.clear()
+        difusor.publicar(EventoRutina("importacion", cantidad=resultado.importadas))
+    return RutinaImportResponse(
+        importadas=resultado.importadas,
+        total_errores=resultado.total_errores,
+        errores=resultado.errores,
+    )
+
+
+@router.get("/{rutina_id}", response_model=RutinaRead)
+def get_rutina(
+    rutina_id: int,
+    if_none_match: str | None = Header(default=None),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: Session = Depends(get_session),
+) -> Response:
+    if if_none_match:
+        no_modificado = revalidar_rutina(session, rutina_id, if_none_match, campos)
+        if no_modificado is not None:
+            return no_modificado
+
+    # Con la rutina en caché no se consulta la base ni se vuelve a serializar;
+    # con fields se recorta la representación completa guardada en la caché
+    entrada = rutinas_cache.obtener_o_cargar(rutina_id, lambda: cargar_rutina_serializada(session, rutina_id))
+    return respuesta_rutina(entrada, campos)
+
+
+def revalidar_rutina(
+    session: Session,
+    rutina_id: int,
+    if_none_match: str,
+    campos: SeleccionCampos | None = None,
+) -> Response | None:
+    # Revalidación: una lectura de la columna version por clave primaria
+    version = session.exec(select(Rutina.version).where(_rutina_id_attr() == rutina_id)).first()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
+    etag = _etag_con_campos(_etag_rutina(rutina_id, version), campos)
+    return _no_modificado(etag) if _coincide_etag(if_none_match, etag) else None
+
+
+def cargar_rutina_serializada(session: Session, rutina_id: int) -> bytes | None:
+    # Entrada de la caché: la línea del ETag seguida del JSON de RutinaRead
+    rutina = session.get(Rutina, rutina_id, options=rutina_con_ejercicios())
     if not rutina:
+        return None
+    etag = _etag_rutina(rutina_id, rutina.version)
+    if settings.fast_json_responses:
+        cuerpo = serializacion.rutina_json(rutina)
+    else:
+        cuerpo = RutinaRead.model_validate(rutina).model_dump_json().encode("utf-8")
+    return etag.encode("ascii") + b"\n" + cuerpo
+
+
+def respuesta_rutina(entrada: bytes | None, campos: SeleccionCampos | None = None) -> Response:
+    if entrada is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
-    return rutina
+    etag, _, cuerpo = entrada.partition(b"\n")
+    if campos is not None:
+        cuerpo = serializacion.recortar_rutina_json(cuerpo, campos)
+    return _respuesta_json(cuerpo, _etag_con_campos(etag.decode("ascii"), campos))
 
 
 @router.post("/", response_model=RutinaRead, status_code=status.HTTP_201_CREATED)
@@ -122,6 +649,9 @@ def create_rutina(payload: RutinaCreate, session: Session = Depends(get_session)
 
     session.add(rutina)
     try:
+        if rutina.ejercicios:
+            session.flush()
+            estadisticas.recalcular(session, [cast(int, rutina.id)], nuevas=True)
         session.commit()
     except IntegrityError as exc:  # pragma: no cover - captura conflictos de clave única
         session.rollback()
@@ -130,7 +660,8 @@ def create_rutina(payload: RutinaCreate, session: Session = Depends(get_session)
             detail="Ya existe una rutina con ese nombre",
         ) from exc
 
-    session.refresh(rutina)
+    _conteos_cache.clear()
+    difusor.publicar(EventoRutina("creada", rutina.id, rutina.version))
     return rutina
 
 
@@ -140,22 +671,40 @@ def update_rutina(
     payload: RutinaUpdate,
     session: Session = Depends(get_session),
 ) -> Rutina:
-    rutina = session.get(Rutina, rutina_id)
+    # Los ejercicios se necesitan tanto para reconciliarlos como para la respuesta
+    rutina = session.get(Rutina, rutina_id, options=rutina_con_ejercicios())
     if not rutina:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
 
-    datos_actualizados = payload.model_dump(exclude_unset=True)
-    ejercicios_payload = datos_actualizados.pop("ejercicios", None)
+    datos_actualizados = payload.model_dump(exclude_unset=True, exclude={"ejercicios"})
 
-    for campo, valor in datos_actualizados.items():
-        setattr(rutina, campo, valor)
+    # Los campos propios van en el mismo UPDATE que incrementa la versión
+    cambios = {campo: valor for campo, valor in datos_actualizados.items() if getattr(rutina, campo) != valor}
+    hubo_cambios = bool(cambios)
+    cambiaron_ejercicios = False
 
-    if ejercicios_payload is not None:
-        rutina.ejercicios.clear()
-        rutina.ejercicios.extend(_build_ejercicios(ejercicios_payload))
+    if payload.ejercicios is not None:
+        # La lista recibida es la versión completa: los campos omitidos vuelven a su valor por defecto
+        ejercicios = [ejercicio.model_dump() for ejercicio in payload.ejercicios]
+        cambiaron_ejercicios = _reconciliar_ejercicios(session, rutina, ejercicios)
+        hubo_cambios = cambiaron_ejercicios or hubo_cambios
 
-    session.add(rutina)
     try:
+        if hubo_cambios:
+            # La versión se incrementa en la base (no leída y escrita desde Python): dos PUT concurrentes
+            # no pueden terminar con la misma versión, y por lo tanto con el mismo ETag, para cuerpos distintos
+            cambios["updated_at"] = datetime.utcnow()
+            cambios["version"] = session.execute(
+                update(Rutina)
+                .where(_rutina_id_attr() == rutina_id)
+                .values(version=Rutina.version + 1, **cambios)
+                .returning(Rutina.version),
+                execution_options={"synchronize_session": False},
+            ).scalar_one()
+            for campo, valor in cambios.items():
+                set_committed_value(rutina, campo, valor)
+        if cambiaron_ejercicios:
+            estadisticas.recalcular(session, [rutina_id])
         session.commit()
     except IntegrityError as exc:  # pragma: no cover
         session.rollback()
@@ -164,18 +713,77 @@ def update_rutina(
             detail="Ya existe una rutina con ese nombre",
         ) from exc
 
-    session.refresh(rutina)
+    _conteos_cache.clear()
+    rutinas_cache.invalidar(rutina_id)
+    if hubo_cambios:
+        difusor.publicar(EventoRutina("actualizada", rutina_id, rutina.version))
     return rutina
 
 
+@router.patch("/{rutina_id}/ejercicios/{ejercicio_id}", response_model=EjercicioRead)
+def update_ejercicio(
+    rutina_id: int,
+    ejercicio_id: int,
+    payload: EjercicioUpdate,
+    session: Session = Depends(get_session),
+) -> Ejercicio:
+    # Edita un solo ejercicio: un SELECT y un UPDATE con las columnas enviadas (más la versión de la rutina)
+    ejercicio = session.get(Ejercicio, ejercicio_id, options=rutina_sin_relaciones())
+    if not ejercicio or ejercicio.rutina_id != rutina_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ejercicio no encontrado")
+
+    cambios = payload.model_dump(exclude_unset=True)
+    nulos = sorted(campo for campo in CAMPOS_EJERCICIO_OBLIGATORIOS if campo in cambios and cambios[campo] is None)
+    if nulos:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Campos que no admiten null: {', '.join(nulos)}",
+        )
+
+    # Como en el PUT, un PATCH que no cambia nada no escribe: la versión (y el ETag) siguen iguales
+    # y la rutina no aparece en GET /rutinas/cambios
+    cambios = {campo: valor for campo, valor in cambios.items() if getattr(ejercicio, campo) != valor}
+    if not cambios:
+        return ejercicio
+
+    for campo, valor in cambios.items():
+        setattr(ejercicio, campo, valor)
+    session.add(ejercicio)
+    # El ejercicio es parte de la representación de la rutina: cambia su ETag
+    version = session.execute(
+        update(Rutina)
+        .where(_rutina_id_attr() == rutina_id)
+        .values(version=Rutina.version + 1, updated_at=datetime.utcnow())
+        .returning(Rutina.version)
+    ).scalar_one()
+    if cambios.keys() & CAMPOS_EJERCICIO_VOLUMEN:
+        estadisticas.recalcular(session, [rutina_id])
+    session.commit()
+
+    # El filtro por día y la búsqueda (que también mira los nombres de ejercicios) cambian los totales
+    if cambios.keys() & {"dia_semana", "nombre"}:
+        _conteos_cache.clear()
+    rutinas_cache.invalidar(rutina_id)
+    difusor.publicar(EventoRutina("actualizada", rutina_id, version))
+    return ejercicio
+
+
 @router.delete("/{rutina_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_rutina(rutina_id: int, session: Session = Depends(get_session)) -> None:
-    rutina = session.get(Rutina, rutina_id)
+    # Los ejercicios los borra la base con ON DELETE CASCADE (passive_deletes), no hace falta cargarlos
+    rutina = session.get(Rutina, rutina_id, options=rutina_sin_relaciones())
     if not rutina:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
 
+    # Sus filas de los rollups se borran en cascada; antes se restan de la distribución semanal
+    estadisticas.descontar(session, [rutina_id])
     session.delete(rutina)
+    # Baja para el feed de cambios, en la misma transacción que el borrado
+    session.add(RutinaEliminada(rutina_id=rutina_id))
     session.commit()
+    _conteos_cache.clear()
+    rutinas_cache.invalidar(rutina_id)
+    difusor.publicar(EventoRutina("eliminada", rutina_id))
 
 
 @router.post("/{rutina_id}/duplicar", response_model=RutinaRead, status_code=status.HTTP_201_CREATED)
@@ -184,31 +792,40 @@ def duplicate_rutina(
     payload: RutinaDuplicatePayload,
     session: Session = Depends(get_session),
 ) -> Rutina:
-    statement = (
-        select(Rutina)
-        .options(selectinload(_rutina_ejercicios_attr()))
-        .where(Rutina.id == rutina_id)
-    )
-    original = session.exec(statement).first()
-    if not original:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
-
-    nueva_rutina = Rutina(nombre=payload.nuevo_nombre, descripcion=original.descripcion)
-    nueva_rutina.ejercicios = _build_ejercicios([
-        {
-            "nombre": ejercicio.nombre,
-            "dia_semana": ejercicio.dia_semana,
-            "series": ejercicio.series,
-            "repeticiones": ejercicio.repeticiones,
-            "peso": ejercicio.peso,
-            "notas": ejercicio.notas,
-            "orden": ejercicio.orden,
-        }
-        for ejercicio in original.ejercicios
-    ])
-
-    session.add(nueva_rutina)
+    # Todo se copia dentro de la base: INSERT ... SELECT de la rutina y de sus ejercicios,
+    # ambos con RETURNING para armar la respuesta sin volver a consultar
+    ahora = literal(datetime.utcnow(), DateTime)
     try:
+        nueva_rutina = session.scalars(
+            insert(Rutina)
+            .from_select(
+                ["nombre", "descripcion", "fecha_creacion", "updated_at"],
+                select(
+                    literal(payload.nuevo_nombre, String),
+                    Rutina.descripcion,
+                    ahora,
+                    ahora,
+                ).where(_rutina_id_attr() == rutina_id),
+            )
+            .returning(Rutina)
+        ).first()
+        if nueva_rutina is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rutina no encontrada")
+
+        ejercicios = session.scalars(
+            insert(Ejercicio)
+            .from_select(
+                ["rutina_id", *COLUMNAS_EJERCICIO_COPIADAS],
+                select(
+                    literal(nueva_rutina.id, Integer),
+                    *(getattr(Ejercicio, columna) for columna in COLUMNAS_EJERCICIO_COPIADAS),
+                )
+                .where(Ejercicio.rutina_id == rutina_id)
+                .order_by(Ejercicio.id),
+            )
+            .returning(Ejercicio)
+        ).all()
+        estadisticas.copiar(session, rutina_id, cast(int, nueva_rutina.id))
         session.commit()
     except IntegrityError as exc:
         session.rollback()
@@ -217,10 +834,263 @@ def duplicate_rutina(
             detail="Ya existe una rutina con ese nombre",
         ) from exc
 
-    session.refresh(nueva_rutina)
+    set_committed_value(nueva_rutina, "ejercicios", sorted(ejercicios, key=lambda ejercicio: cast(int, ejercicio.id)))
+    _conteos_cache.clear()
+    rutinas_cache.invalidar(nueva_rutina.id)
+    difusor.publicar(EventoRutina("duplicada", nueva_rutina.id, nueva_rutina.version, origen_id=rutina_id))
     return nueva_rutina
 
 
+@router.post(
+    "/duplicar-lote",
+    response_model=RutinaDuplicateBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def duplicate_rutinas_lote(
+    payload: RutinaDuplicateBatchPayload,
+    session: Session = Depends(get_session),
+) -> RutinaDuplicateBatchResponse:
+    # Clona rutinas_ids x copias en una sola transacción con dos INSERT ... SELECT
+    # (rutinas y ejercicios); Python solo recibe los ids nuevos, nunca objetos por fila
+    originales = dict(
+        session.exec(select(Rutina.id, Rutina.nombre).where(_rutina_id_attr().in_(payload.rutina_ids))).all()
+    )
+    faltantes = [rutina_id for rutina_id in payload.rutina_ids if rutina_id not in originales]
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rutinas no encontradas: {', '.join(map(str, faltantes))}",
+        )
+    largo_maximo = max(
+        len(payload.nombre_patron.format(nombre=nombre, n=payload.copias)) for nombre in originales.values()
+    )
+    if largo_maximo > MAX_LARGO_NOMBRE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Los nombres generados superan los {MAX_LARGO_NOMBRE} caracteres",
+        )
+
+    # Serie 1..copias generada en la base (WITH RECURSIVE funciona en SQLite y PostgreSQL)
+    copias = select(literal_column("1").label("n")).cte("copias", recursive=True)
+    copias = copias.union_all(select(copias.c.n + 1).where(copias.c.n < payload.copias))
+    original = aliased(Rutina, name="original")
+    nueva = aliased(Rutina, name="nueva")
+    nombre_copia = _nombre_desde_patron(payload.nombre_patron, original.nombre, copias.c.n)
+    ahora = literal(datetime.utcnow(), DateTime)
+
+    try:
+        ids = sorted(
+            session.scalars(
+                insert(Rutina)
+                .from_select(
+                    ["nombre", "descripcion", "fecha_creacion", "updated_at"],
+                    select(nombre_copia, original.descripcion, ahora, ahora)
+                    .join(copias, true())
+                    .where(original.id.in_(payload.rutina_ids))
+                    .order_by(original.id, copias.c.n),
+                )
+                .returning(Rutina.id)
+            ).all()
+        )
+        # Cada copia se reconoce por su nombre generado (único): así no hace falta mapear ids en Python.
+        # RETURNING id solo para contar: sqlite3 no informa rowcount en sentencias que empiezan con WITH
+        ids_ejercicios = session.scalars(
+            insert(Ejercicio).from_select(
+                ["rutina_id", *COLUMNAS_EJERCICIO_COPIADAS],
+                select(nueva.id, *(getattr(Ejercicio, columna) for columna in COLUMNAS_EJERCICIO_COPIADAS))
+                .join(original, original.id == Ejercicio.rutina_id)
+                .join(copias, true())
+                .join(nueva, nueva.nombre == nombre_copia)
+                .where(original.id.in_(payload.rutina_ids))
+                .order_by(nueva.id, Ejercicio.id),
+            )
+            .returning(Ejercicio.id)
+        ).all()
+        estadisticas.recalcular(session, ids, nuevas=True)
+        session.commit()
+    except IntegrityError as exc:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ya existe una rutina con alguno de los nombres generados",
+        ) from exc
+
+    _conteos_cache.clear()
+    for rutina_id in ids:
+        difusor.publicar(EventoRutina("duplicada", rutina_id, 1))
+    return RutinaDuplicateBatchResponse(
+        ids=ids,
+        rutinas_creadas=len(ids),
+        ejercicios_creados=len(ids_ejercicios),
+    )
+
+
+def _filtrar_rutinas(statement: Any, params: ParametrosListado) -> Any:
+    if params.search:
+        coincidencias = get_backend_busqueda(engine).coincidencias(params.search)
+        if coincidencias is not None:
+            ids = coincidencias.subquery("coincidencias")
+            statement = statement.where(_rutina_id_attr().in_(select(ids.c.rutina_id)))
+        else:
+            statement = statement.where(_rutina_nombre_attr().ilike(f"%{params.search}%"))
+
+    if params.dia_semana:
+        # EXISTS en lugar de JOIN + DISTINCT: no multiplica filas por cada ejercicio
+        statement = statement.where(_rutina_ejercicios_attr().any(Ejercicio.dia_semana == params.dia_semana))
+
+    return statement
+
+
+def _paginar_rutinas(statement: Any, params: ParametrosListado) -> Any:
+    # Orden estable (fecha, id) para que el cursor identifique una posición única
+    statement = statement.order_by(_rutina_fecha_attr().desc(), _rutina_id_attr().desc())
+
+    if params.cursor:
+        fecha_cursor, id_cursor = decode_cursor(params.cursor)
+        # Keyset: busca directo las filas posteriores al cursor sin recorrer las anteriores
+        # La comparación de filas (fecha, id) < (x, y) se resuelve como un rango sobre ix_rutinas_fecha_creacion_id
+        statement = statement.where(
+            tuple_(_rutina_fecha_attr(), _rutina_id_attr()) < tuple_(literal(fecha_cursor), literal(id_cursor))
+        )
+    else:
+        statement = statement.offset((params.page - 1) * params.page_size)
+
+    # Se pide una fila extra para saber si existe una página siguiente
+    return statement.limit(params.page_size + 1)
+
+
+def _recortar_pagina(filas: list[Any], page_size: int) -> tuple[list[Any], str | None]:
+    if len(filas) <= page_size:
+        return filas, None
+    filas = filas[:page_size]
+    return filas, encode_cursor(filas[-1].fecha_creacion, filas[-1].id)
+
+
+def _metadatos_pagina(total: int | None, total_estimado: bool, params: ParametrosListado) -> dict[str, Any]:
+    total_pages = None
+    if total is not None:
+        total_pages = (total + params.page_size - 1) // params.page_size if total else 0
+    return {
+        "total": total,
+        "page": params.page,
+        "page_size": params.page_size,
+        "total_pages": total_pages,
+        "total_estimado": total_estimado,
+    }
+
+
+def _contar_rutinas(session: Session, statement: Any, params: ParametrosListado) -> tuple[int | None, bool]:
+    """Devuelve (total, es_estimado) según el modo pedido."""
+    if params.count is CountMode.NONE:
+        return None, False
+
+    clave = (params.search, params.dia_semana)
+    total = _conteos_cache.get(clave)
+    if total is not None:
+        return total, False
+
+    if params.count is CountMode.ESTIMATED and not params.search and not params.dia_semana:
+        estimado = _estimar_total_rutinas(session)
+        if estimado is not None:
+            return estimado, True
+
+    count_subquery = statement.order_by(None).subquery()
+    total = session.exec(select(func.count()).select_from(count_subquery)).one()
+    _conteos_cache.set(clave, total)
+    return total, False
+
+
+def _estimar_total_rutinas(session: Session) -> int | None:
+    # Ambos motores guardan una estimación de filas que actualiza ANALYZE (en PostgreSQL también autovacuum):
+    # pg_class.reltuples y la primera cifra de sqlite_stat1.stat. Es el valor del último ANALYZE, no una cota:
+    # puede quedar por arriba o por abajo del total real. Sin estadísticas devuelve None (se cuenta exacto y
+    # ese total queda en _conteos_cache)
+    dialecto = session.get_bind().dialect.name
+    if dialecto == "postgresql":
+        estimado = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'rutinas'::regclass")
+        ).scalar()
+        return int(estimado) if estimado is not None and estimado >= 0 else None
+    if dialecto == "sqlite":
+        hay_estadisticas = session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        ).first()
+        if hay_estadisticas is None:
+            return None
+        estimado = session.execute(
+            text("SELECT max(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = 'rutinas'")
+        ).scalar()
+        return int(estimado) if estimado is not None else None
+    return None
+
+
+def _reconciliar_ejercicios(session: Session, rutina: Rutina, items: Sequence[dict[str, Any]]) -> bool:
+    # Empareja cada ejercicio recibido con uno existente (por id o, sin id, por (dia_semana, orden))
+    # y solo escribe lo que cambió: el unit of work agrupa los UPDATE con las mismas columnas y
+    # los DELETE (delete-orphan) en executemany; los nuevos van en un INSERT ... RETURNING (multi-fila en
+    # PostgreSQL; SQLite no garantiza el orden de RETURNING y el ORM inserta de a una fila)
+    existentes = list(rutina.ejercicios)
+    por_id = {ejercicio.id: ejercicio for ejercicio in existentes}
+    por_clave: dict[tuple[DiaSemana, int], Ejercicio] = {}
+    for ejercicio in existentes:
+        por_clave.setdefault((ejercicio.dia_semana, ejercicio.orden), ejercicio)
+
+    usados: set[int] = set()
+    resultado: list[Ejercicio | None] = []
+    nuevos: list[tuple[int, dict[str, Any]]] = []
+    for item in items:
+        datos = {campo: valor for campo, valor in item.items() if campo != "id"}
+        candidato = por_id.get(item.get("id"))
+        if candidato is None or id(candidato) in usados:
+            candidato = por_clave.get((datos["dia_semana"], datos["orden"]))
+        if candidato is None or id(candidato) in usados:
+            nuevos.append((len(resultado), {**datos, "rutina_id": rutina.id}))
+            resultado.append(None)
+            continue
+
+        usados.add(id(candidato))
+        for campo, valor in datos.items():
+            if getattr(candidato, campo) != valor:
+                setattr(candidato, campo, valor)
+        resultado.append(candidato)
+
+    if nuevos:
+        # RETURNING de un INSERT multi-fila no garantiza el orden: sort_by_parameter_order devuelve las filas
+        # en el orden de los parámetros enviados.
+        # render_nulls: sin él el ORM agrupa las filas según qué columnas son None y parte el INSERT
+        insertados = session.scalars(
+            insert(Ejercicio).returning(Ejercicio, sort_by_parameter_order=True).execution_options(render_nulls=True),
+            [datos for _, datos in nuevos],
+        ).all()
+        for (posicion, _), ejercicio in zip(nuevos, insertados):
+            resultado[posicion] = ejercicio
+
+    # Reasignar la colección borra los ejercicios que no se emparejaron (delete-orphan)
+    rutina.ejercicios = cast(list[Ejercicio], resultado)
+    # Devuelve si algo cambió: ejercicios nuevos, borrados o con alguna columna distinta
+    return (
+        bool(nuevos)
+        or len(usados) < len(existentes)
+        or any(session.is_modified(ejercicio) for ejercicio in existentes)
+    )
+
+
+def _nombre_desde_patron(patron: str, nombre: Any, numero: Any) -> Any:
+    # Traduce "{nombre} (copia {n})" a una concatenación SQL: literal || nombre || literal || CAST(n)
+    partes: list[Any] = []
+    for texto, campo, _, _ in Formatter().parse(patron):
+        if texto:
+            partes.append(literal(texto, String))
+        if campo == "nombre":
+            partes.append(nombre)
+        elif campo == "n":
+            partes.append(cast_sql(numero, String))
+    expresion = partes[0]
+    for parte in partes[1:]:
+        expresion = expresion + parte
+    return expresion
+
+
 def _build_ejercicios(items: Sequence[Union[EjercicioCreate, dict[str, Any]]]) -> list[Ejercicio]:
     ejercicios: list[Ejercicio] = []
     for ejercicio in items:
@@ -231,3 +1101,57 @@ def _build_ejercicios(items: Sequence[Union[EjercicioCreate, dict[str, Any]]]) -
         )
         ejercicios.append(Ejercicio(**payload))
     return ejercicios
+
+
+def _etag_rutina(rutina_id: int, version: int) -> str:
+    return f'W/"rutina-{rutina_id}-v{version}"'
+
+
+def _etag_listado(filas: Sequence[Any], total: int | None, total_estimado: bool, hay_siguiente: bool) -> str:
+    # La página cambia si cambia alguna rutina (id o version), el total o si aparece/desaparece la siguiente
+    contenido = json.dumps(
+        [[[fila.id, fila.version] for fila in filas], total, total_estimado, hay_siguiente],
+        separators=(",", ":"),
+    )
+    return f'W/"rutinas-{hashlib.sha1(contenido.encode("utf-8")).hexdigest()}"'
+
+
+def _etag_con_campos(etag: str, campos: SeleccionCampos | None) -> str:
+    # Cada selección de fields es otra representación: necesita su propio ETag
+    if campos is None:
+        return etag
+    sufijo = hashlib.sha1(campos.clave.encode("utf-8")).hexdigest()[:12]
+    return f'{etag[:-1]}-f{sufijo}"'
+
+
+def _coincide_etag(if_none_match: str, etag: str) -> bool:
+    # Comparación débil (RFC 9110): se ignora el prefijo W/
+    if if_none_match.strip() == "*":
+        return True
+    candidatos = {candidato.strip().removeprefix("W/") for candidato in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidatos
+
+
+def _agregar_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def _respuesta_json(cuerpo: bytes, etag: str) -> Response:
+    return Response(
+        content=cuerpo,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def _no_modificado(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def _mensaje_sse(evento: str, datos: str) -> bytes:
+    return f"event: {evento}\ndata: {datos}\n\n".encode("utf-8")
+
@@ -0,0 +1,182 @@
+# este archivo define las versiones async del CRUD de rutinas, activas con DB_ASYNC=true
+# cada handler usa una AsyncSession y ejecuta la misma lógica que app.api.rutinas mediante
+# AsyncSession.run_sync: las consultas viajan por el driver async (aiosqlite / psycopg async)
+# y el request no ocupa un hilo del threadpool mientras espera a la base
+# ojo: run_sync corre el cuerpo del handler en el hilo del event loop; solo la I/O de la base es no
+# bloqueante (y solo con esos drivers). La lectura de la caché compartida se hace en un hilo
+# (obtener_o_cargar_async), pero las invalidaciones de las escrituras y el cómputo de Python
+# (armar/serializar respuestas) siguen en el loop: con CACHE_BACKEND=redis cada escritura hace un DEL
+# bloqueante. DB_ASYNC es para despliegues con driver async; con psycopg síncrono conviene dejarlo apagado
+# build_router() arma el router final reemplazando solo las rutas del CRUD y dejando el resto como están
+
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import rutinas
+from app.api.deps import get_current_user
+from app.api.rutinas import ParametrosListado, get_ids_batch, get_parametros_listado, get_seleccion_campos
+from app.db.session import get_async_session
+from app.models import DiaSemana, Ejercicio, Rutina
+from app.schemas.rutina import (
+    DEFAULT_RUTINAS_ESTADISTICAS,
+    EjercicioRead,
+    EjercicioUpdate,
+    MAX_CAMBIOS,
+    MAX_RUTINAS_ESTADISTICAS,
+    RutinaBatchResponse,
+    RutinaCambiosResponse,
+    RutinaCreate,
+    RutinaDuplicateBatchPayload,
+    RutinaDuplicateBatchResponse,
+    RutinaDuplicatePayload,
+    RutinaEstadisticasResponse,
+    RutinaPaginatedResponse,
+    RutinaRead,
+    RutinaUpdate,
+)
+from app.schemas.serializacion import SeleccionCampos
+
+router = APIRouter(
+    prefix="/rutinas",
+    tags=["rutinas"],
+    dependencies=[Depends(get_current_user)],
+)
+
+
+@router.get("/", response_model=RutinaPaginatedResponse)
+async def list_rutinas_async(
+    response: Response,
+    params: ParametrosListado = Depends(get_parametros_listado),
+    if_none_match: str | None = Header(default=None),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: AsyncSession = Depends(get_async_session),
+) -> RutinaPaginatedResponse | Response:
+    return await session.run_sync(
+        lambda sync_session: rutinas.list_rutinas(response, params, if_none_match, campos, sync_session)
+    )
+
+
+@router.get("/batch", response_model=RutinaBatchResponse)
+async def get_rutinas_batch_async(
+    ids: list[int] = Depends(get_ids_batch),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: AsyncSession = Depends(get_async_session),
+) -> RutinaBatchResponse | Response:
+    return await session.run_sync(lambda sync_session: rutinas.get_rutinas_batch(ids, campos, sync_session))
+
+
+@router.get("/cambios", response_model=RutinaCambiosResponse)
+async def list_cambios_async(
+    since: str | None = Query(
+        default=None,
+        description="next_token de la respuesta anterior; sin token devuelve todo el catálogo",
+    ),
+    limit: int = Query(default=100, ge=1, le=MAX_CAMBIOS, description="Cambios por página"),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: AsyncSession = Depends(get_async_session),
+) -> RutinaCambiosResponse | Response:
+    return await session.run_sync(lambda sync_session: rutinas.list_cambios(since, limit, campos, sync_session))
+
+
+@router.get("/estadisticas", response_model=RutinaEstadisticasResponse)
+async def get_estadisticas_async(
+    limit: int = Query(
+        default=DEFAULT_RUTINAS_ESTADISTICAS,
+        ge=1,
+        le=MAX_RUTINAS_ESTADISTICAS,
+        description="Rutinas del ranking por volumen",
+    ),
+    dia_semana: DiaSemana | None = Query(default=None, description="Ranking por el volumen de este día"),
+    session: AsyncSession = Depends(get_async_session),
+) -> RutinaEstadisticasResponse:
+    return await session.run_sync(lambda sync_session: rutinas.get_estadisticas(limit, dia_semana, sync_session))
+
+
+@router.get("/{rutina_id}", response_model=RutinaRead)
+async def get_rutina_async(
+    rutina_id: int,
+    if_none_match: str | None = Header(default=None),
+    campos: SeleccionCampos | None = Depends(get_seleccion_campos),
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    if if_none_match:
+        no_modificado = await session.run_sync(
+            lambda sync_session: rutinas.revalidar_rutina(sync_session, rutina_id, if_none_match, campos)
+        )
+        if no_modificado is not None:
+            return no_modificado
+
+    # La espera de cargas concurrentes usa futures del event loop: run_sync corre en este mismo hilo
+    entrada = await rutinas.rutinas_cache.obtener_o_cargar_async(
+        rutina_id,
+        lambda: session.run_sync(lambda sync_session: rutinas.cargar_rutina_serializada(sync_session, rutina_id)),
+    )
+    return rutinas.respuesta_rutina(entrada, campos)
+
+
+@router.post("/", response_model=RutinaRead, status_code=status.HTTP_201_CREATED)
+async def create_rutina_async(payload: RutinaCreate, session: AsyncSession = Depends(get_async_session)) -> Rutina:
+    return await session.run_sync(lambda sync_session: rutinas.create_rutina(payload, sync_session))
+
+
+@router.put("/{rutina_id}", response_model=RutinaRead)
+async def update_rutina_async(
+    rutina_id: int,
+    payload: RutinaUpdate,
+    session: AsyncSession = Depends(get_async_session),
+) -> Rutina:
+    return await session.run_sync(lambda sync_session: rutinas.update_rutina(rutina_id, payload, sync_session))
+
+
+@router.patch("/{rutina_id}/ejercicios/{ejercicio_id}", response_model=EjercicioRead)
+async def update_ejercicio_async(
+    rutina_id: int,
+    ejercicio_id: int,
+    payload: EjercicioUpdate,
+    session: AsyncSession = Depends(get_async_session),
+) -> Ejercicio:
+    return await session.run_sync(
+        lambda sync_session: rutinas.update_ejercicio(rutina_id, ejercicio_id, payload, sync_session)
+    )
+
+
+@router.delete("/{rutina_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rutina_async(rutina_id: int, session: AsyncSession = Depends(get_async_session)) -> None:
+    await session.run_sync(lambda sync_session: rutinas.delete_rutina(rutina_id, sync_session))
+
+
+@router.post("/{rutina_id}/duplicar", response_model=RutinaRead, status_code=status.HTTP_201_CREATED)
+async def duplicate_rutina_async(
+    rutina_id: int,
+    payload: RutinaDuplicatePayload,
+    session: AsyncSession = Depends(get_async_session),
+) -> Rutina:
+    return await session.run_sync(lambda sync_session: rutinas.duplicate_rutina(rutina_id, payload, sync_session))
+
+
+@router.post(
+    "/duplicar-lote",
+    response_model=RutinaDuplicateBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def duplicate_rutinas_lote_async(
+    payload: RutinaDuplicateBatchPayload,
+    session: AsyncSession = Depends(get_async_session),
+) -> RutinaDuplicateBatchResponse:
+    return await session.run_sync(lambda sync_session: rutinas.duplicate_rutinas_lote(payload, sync_session))
+
+
+def build_router() -> APIRouter:
+    # Conserva el orden de las rutas síncronas (importa para /resumen y /buscar frente a /{rutina_id})
+    # y cambia cada ruta del CRUD por su versión async
+    reemplazos = {
+        (route.path, frozenset(route.methods)): route
+        for route in router.routes
+        if hasattr(route, "methods")
+    }
+    combinado = APIRouter()
+    combinado.routes.extend(
+        reemplazos.get((route.path, frozenset(getattr(route, "methods", ()))), route)
+        for route in rutinas.router.routes
+    )
+    return combinado
@@ -0,0 +1,267 @@
+# este archivo define la caché de respuestas ya serializadas (bytes JSON listos para enviar)
+# - nivel local: TTLCache (LRU + TTL) por proceso
+# - nivel compartido opcional (CACHE_BACKEND): "redis" para varios procesos/réplicas, o "memoria",
+#   un reemplazo local con la misma interfaz para desarrollo sin Redis; si está configurado reemplaza
+#   al nivel local, así una invalidación alcanza a todos los procesos
+# obtener_o_cargar colapsa las cargas concurrentes de una misma clave en una sola consulta a la base
+# (una estampida de requests sobre una rutina recién invalidada hace un solo SELECT)
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from threading import Event, Lock
+from typing import Any, Protocol
+
+from app.core.cache import TTLCache
+from app.core.config import Settings
+
+# Espera máxima de un request que aguarda la carga iniciada por otro
+ESPERA_CARGA_SEGUNDOS = 10.0
+
+
+class BackendCompartido(Protocol):
+    def get(self, clave: str) -> bytes | None: ...
+
+    def set(self, clave: str, valor: bytes, ttl_seconds: float) -> None: ...
+
+    def delete(self, clave: str) -> None: ...
+
+
+class BackendMemoria:
+    # Reemplazo local del backend compartido: misma interfaz y semántica de TTL que Redis
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, bytes]] = {}
+        self._lock = Lock()
+
+    def get(self, clave: str) -> bytes | None:
+        with self._lock:
+            entrada = self._data.get(clave)
+            if entrada is None or entrada[0] <= time.monotonic():
+                self._data.pop(clave, None)
+                return None
+            return entrada[1]
+
+    def set(self, clave: str, valor: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._data[clave] = (time.monotonic() + ttl_seconds, valor)
+
+    def delete(self, clave: str) -> None:
+        with self._lock:
+            self._data.pop(clave, None)
+
+
+class BackendRedis:
+    def __init__(self, url: str) -> None:
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - dependencia opcional
+            raise RuntimeError("CACHE_BACKEND=redis requiere el paquete redis (pip install redis)") from exc
+        self._cliente = redis.Redis.from_url(url)
+
+    def get(self, clave: str) -> bytes | None:
+        return self._cliente.get(clave)  # type: ignore[return-value]
+
+    def set(self, clave: str, valor: bytes, ttl_seconds: float) -> None:
+        self._cliente.set(clave, valor, px=max(1, int(ttl_seconds * 1000)))
+
+    def delete(self, clave: str) -> None:
+        self._cliente.delete(clave)
+
+
+@dataclass
+class MetricasCache:
+    hits_local: int = 0
+    hits_compartida: int = 0
+    misses: int = 0 # Incluye las cargas colapsadas
+    cargas_colapsadas: int = 0 # Requests que esperaron la carga de otro en vez de ir a la base
+    invalidaciones: int = 0
+
+
+@dataclass
+class _Carga:
+    evento: Event
+    resultado: bytes | None = None
+    error: BaseException | None = None
+
+
+class CacheRespuestas:
+    def __init__(
+        self,
+        prefijo: str,
+        ttl_seconds: float,
+        maxsize: int,
+        compartida: BackendCompartido | None = None,
+    ) -> None:
+        self.prefijo = prefijo
+        self.ttl_seconds = ttl_seconds
+        self._local: TTLCache[str, bytes] = TTLCache(ttl_seconds=ttl_seconds, maxsize=maxsize)
+        self._compartida = compartida
+        self._metricas = MetricasCache()
+        self._lock = Lock()
+        self._cargas: dict[str, _Carga] = {}
+        self._cargas_async: dict[str, asyncio.Future[bytes | None]] = {}
+        # Se incrementa en cada invalidación: una carga que empezó antes no guarda su resultado
+        self._generacion = 0
+
+    @property
+    def activa(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _clave(self, clave: Any) -> str:
+        return f"{self.prefijo}:{clave}"
+
+    def _contar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self._metricas, campo, getattr(self._metricas, campo) + 1)
+
+    def get(self, clave: Any) -> bytes | None:
+        clave_completa = self._clave(clave)
+        if self._compartida is not None:
+            # Con backend compartido no hay nivel local: invalidar() solo vacía la copia local del proceso
+            # que atendió la escritura, y los demás servirían el cuerpo (y el ETag) viejo hasta el TTL
+            valor = self._compartida.get(clave_completa)
+            if valor is not None:
+                self._contar("hits_compartida")
+                return valor
+        else:
+            valor = self._local.get(clave_completa)
+            if valor is not None:
+                self._contar("hits_local")
+                return valor
+        self._contar("misses")
+        return None
+
+    def _guardar(self, clave: Any, valor: bytes, generacion: int) -> None:
+        clave_completa = self._clave(clave)
+        with self._lock:
+            if generacion != self._generacion:
+                return
+        if self._compartida is not None:
+            self._compartida.set(clave_completa, valor, self.ttl_seconds)
+        else:
+            self._local.set(clave_completa, valor)
+
+    def invalidar(self, *claves: Any) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._metricas.invalidaciones += len(claves)
+        for clave in claves:
+            clave_completa = self._clave(clave)
+            self._local.pop(clave_completa)
+            if self._compartida is not None:
+                self._compartida.delete(clave_completa)
+
+    def obtener_o_cargar(self, clave: Any, cargar: Callable[[], bytes | None]) -> bytes | None:
+        # Versión para handlers síncronos (threadpool): el primero carga, el resto espera su resultado
+        if not self.activa:
+            return cargar()
+        valor = self.get(clave)
+        if valor is not None:
+            return valor
+
+        with self._lock:
+            carga = self._cargas.get(clave)
+            lider = carga is None
+            if lider:
+                carga = self._cargas[clave] = _Carga(evento=Event())
+            generacion = self._generacion
+        assert carga is not None
+
+        if not lider:
+            self._contar("cargas_colapsadas")
+            if not carga.evento.wait(ESPERA_CARGA_SEGUNDOS):
+                return cargar()
+            if carga.error is not None:
+                raise carga.error
+            return carga.resultado
+
+        try:
+            carga.resultado = cargar()
+            if carga.resultado is not None:
+                self._guardar(clave, carga.resultado, generacion)
+            return carga.resultado
+        except BaseException as exc:
+            carga.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._cargas.pop(clave, None)
+            carga.evento.set()
+
+    async def obtener_o_cargar_async(
+        self,
+        clave: Any,
+        cargar: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        # Igual que obtener_o_cargar pero esperando con futures del event loop (modo DB_ASYNC)
+        if not self.activa:
+            return await cargar()
+        valor = await self._en_hilo(self.get, clave)
+        if valor is not None:
+            return valor
+
+        pendiente = self._cargas_async.get(clave)
+        if pendiente is not None:
+            self._contar("cargas_colapsadas")
+            return await asyncio.shield(pendiente)
+
+        futuro: asyncio.Future[bytes | None] = asyncio.get_running_loop().create_future()
+        self._cargas_async[clave] = futuro
+        generacion = self._generacion
+        try:
+            resultado = await cargar()
+            if resultado is not None:
+                await self._en_hilo(self._guardar, clave, resultado, generacion)
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as exc:
+            futuro.set_exception(exc)
+            # Evita el aviso de "exception never retrieved" si nadie más esperaba
+            futuro.exception()
+            raise
+        finally:
+            self._cargas_async.pop(clave, None)
+
+    async def _en_hilo(self, funcion: Callable[..., Any], *args: Any) -> Any:
+        # El backend compartido es I/O bloqueante (Redis): fuera del event loop para no frenar otros requests
+        if self._compartida is None:
+            return funcion(*args)
+        return await asyncio.to_thread(funcion, *args)
+
+    def metricas(self) -> dict[str, Any]:
+        with self._lock:
+            datos = asdict(self._metricas)
+        consultas = datos["hits_local"] + datos["hits_compartida"] + datos["misses"]
+        datos["tasa_hits"] = round((consultas - datos["misses"]) / consultas, 4) if consultas else None
+        datos["entradas_locales"] = len(self._local)
+        datos["backend_compartido"] = type(self._compartida).__name__ if self._compartida else None
+        return datos
+
+
+_caches: dict[str, CacheRespuestas] = {}
+
+
+def crear_backend_compartido(settings: Settings) -> BackendCompartido | None:
+    if settings.cache_backend == "redis":
+        if not settings.cache_url:
+            raise RuntimeError("CACHE_BACKEND=redis requiere CACHE_URL")
+        return BackendRedis(settings.cache_url)
+    if settings.cache_backend == "memoria":
+        return BackendMemoria()
+    return None
+
+
+def crear_cache_respuestas(settings: Settings, prefijo: str) -> CacheRespuestas:
+    cache = CacheRespuestas(
+        prefijo=prefijo,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        maxsize=settings.response_cache_maxsize,
+        compartida=crear_backend_compartido(settings),
+    )
+    _caches[prefijo] = cache
+    return cache
+
+
+def metricas_caches() -> dict[str, dict[str, Any]]:
+    return {prefijo: cache.metricas() for prefijo, cache in _caches.items()}
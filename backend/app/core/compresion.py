@@ -0,0 +1,190 @@
+# este archivo define el middleware de compresión de respuestas
+# - gzip siempre disponible; brotli ("br") solo si está instalado el paquete brotli (dependencia opcional)
+# - se elige la codificación según Accept-Encoding (respeta q=0) y se prefiere br cuando el cliente lo acepta
+# - las respuestas completas más chicas que minimum_size se envían sin comprimir
+# - las respuestas por stream (export, eventos) se comprimen de a chunk con flush, así cada chunk
+#   llega al cliente sin esperar al final (GZipMiddleware de Starlette los retiene en su buffer)
+
+import zlib
+from typing import Any, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None  # type: ignore[assignment]
+
+# Contenidos que ya vienen comprimidos: recomprimirlos gasta CPU sin ahorrar bytes
+# text/event-stream: cada evento SSE tiene que llegar apenas se envía, sin pasar por el compresor
+TIPOS_SIN_COMPRESION = ("image/", "audio/", "video/", "application/zip", "application/gzip", "text/event-stream")
+
+
+class _Compresor(Protocol):
+    def comprimir(self, datos: bytes) -> bytes: ...
+
+    def vaciar(self) -> bytes: ...
+
+    def terminar(self) -> bytes: ...
+
+
+class _CompresorGzip:
+    def __init__(self, nivel: int) -> None:
+        # wbits=31: formato gzip (cabecera + CRC) en vez de zlib crudo
+        self._compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._compresor.compress(datos)
+
+    def vaciar(self) -> bytes:
+        return self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self) -> bytes:
+        return self._compresor.flush(zlib.Z_FINISH)
+
+
+class _CompresorBrotli:
+    def __init__(self, calidad: int) -> None:
+        self._compresor = brotli.Compressor(quality=calidad)
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._compresor.process(datos)
+
+    def vaciar(self) -> bytes:
+        return self._compresor.flush()
+
+    def terminar(self) -> bytes:
+        return self._compresor.finish()
+
+
+def brotli_disponible() -> bool:
+    return brotli is not None
+
+
+def _codificaciones_aceptadas(accept_encoding: str) -> dict[str, float]:
+    aceptadas: dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.partition(";")
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametro, _, valor = parametros.strip().partition("=")
+        if parametro.strip() == "q":
+            try:
+                calidad = float(valor)
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre] = calidad
+    return aceptadas
+
+
+class CompresionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int | None = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        # None (o sin el paquete brotli) deja solo gzip
+        self.brotli_quality = brotli_quality if brotli_disponible() else None
+
+    def elegir_codificacion(self, accept_encoding: str) -> str | None:
+        aceptadas = _codificaciones_aceptadas(accept_encoding)
+        comodin = aceptadas.get("*", 0.0)
+        if self.brotli_quality is not None and aceptadas.get("br", comodin) > 0:
+            return "br"
+        if aceptadas.get("gzip", comodin) > 0:
+            return "gzip"
+        return None
+
+    def crear_compresor(self, codificacion: str) -> _Compresor:
+        if codificacion == "br":
+            assert self.brotli_quality is not None
+            return _CompresorBrotli(self.brotli_quality)
+        return _CompresorGzip(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = self.elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+        await _Respondedor(self, codificacion, send)(scope, receive)
+
+
+class _Respondedor:
+    # Retiene el inicio de la respuesta hasta ver el primer chunk del cuerpo:
+    # recién ahí se sabe si conviene comprimir y qué headers mandar
+    def __init__(self, middleware: CompresionMiddleware, codificacion: str, send: Send) -> None:
+        self.middleware = middleware
+        self.codificacion = codificacion
+        self.send = send
+        self.inicio: Message | None = None
+        self.compresor: _Compresor | None = None
+        self.sin_compresion = False
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.enviar)
+
+    def _comprimible(self, headers: Headers) -> bool:
+        assert self.inicio is not None
+        if self.inicio["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        tipo = headers.get("content-type", "")
+        return not tipo.startswith(TIPOS_SIN_COMPRESION)
+
+    async def enviar(self, message: Message) -> None:
+        tipo = message["type"]
+        if tipo == "http.response.start":
+            self.inicio = message
+            return
+        if tipo != "http.response.body" or self.sin_compresion:
+            await self.send(message)
+            return
+
+        cuerpo: bytes = message.get("body", b"")
+        hay_mas: bool = message.get("more_body", False)
+        if self.compresor is None:
+            assert self.inicio is not None
+            headers = MutableHeaders(raw=self.inicio["headers"])
+            chica = not hay_mas and len(cuerpo) < self.middleware.minimum_size
+            if chica or not self._comprimible(headers):
+                self.sin_compresion = True
+                await self.send(self.inicio)
+                await self.send(message)
+                return
+
+            self.compresor = self.middleware.crear_compresor(self.codificacion)
+            headers["Content-Encoding"] = self.codificacion
+            headers.add_vary_header("Accept-Encoding")
+            if hay_mas:
+                del headers["Content-Length"]
+            else:
+                comprimido = self.compresor.comprimir(cuerpo) + self.compresor.terminar()
+                headers["Content-Length"] = str(len(comprimido))
+                await self.send(self.inicio)
+                await self.send({**message, "body": comprimido})
+                return
+            await self.send(self.inicio)
+
+        datos = self.compresor.comprimir(cuerpo)
+        datos += self.compresor.vaciar() if hay_mas else self.compresor.terminar()
+        await self.send({**message, "body": datos})
+
+
+def opciones_compresion(settings: Settings) -> dict[str, Any]:
+    return {
+        "minimum_size": settings.compression_minimum_size,
+        "gzip_level": settings.compression_gzip_level,
+        "brotli_quality": settings.compression_brotli_quality if settings.compression_brotli else None,
+    }
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Annotated
+from typing import Annotated, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -19,10 +19,58 @@ class Settings(BaseSettings):
     db_password: str = Field(default="123456")
 
     database_url: Annotated[str | None, Field(alias="DATABASE_URL")] = None
+    # Usa AsyncEngine/AsyncSession y handlers async para el CRUD de rutinas (requiere aiosqlite para SQLite)
+    # Solo la I/O de la base es no bloqueante (driver async): el resto del handler corre en el event loop
+    db_async: bool = Field(default=False)
+    # Pool de conexiones (QueuePool); pool_recycle=-1 no recicla conexiones
+    db_pool_size: int = Field(default=5, ge=1)
+    db_max_overflow: int = Field(default=10, ge=0)
+    db_pool_timeout: float = Field(default=30.0, gt=0)
+    db_pool_recycle: int = Field(default=1800, ge=-1)
+    db_pool_pre_ping: bool = Field(default=True)
+    # Perfil SQLite aplicado en cada conexión (vacío deja el valor por defecto de SQLite)
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", ""] = Field(default="WAL")
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA", ""] = Field(default="NORMAL")
+    sqlite_busy_timeout_ms: int = Field(default=5000, ge=0)
 
     secret_key: str = Field(default="insecure-secret", min_length=16)
     access_token_expire_minutes: int = Field(default=60, ge=1)
     jwt_algorithm: str = Field(default="HS256")
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31)
+    password_hash_workers: int = Field(default=2, ge=1)
+    user_cache_ttl_seconds: float = Field(default=60.0, ge=0)
+    user_cache_maxsize: int = Field(default=1024, ge=1)
+
+    # Métricas en /metrics (formato Prometheus); con app_debug se agrega el header Server-Timing
+    metrics_enabled: bool = Field(default=True)
+
+    # Diagnóstico de consultas para desarrollo/staging: log de consultas lentas con EXPLAIN y aviso de N+1
+    sql_diagnostics: bool = Field(default=False)
+    sql_slow_query_ms: float = Field(default=100.0, ge=0) # 0 no loguea consultas lentas
+    sql_n_plus_one_threshold: int = Field(default=5, ge=2) # Repeticiones de un mismo SELECT en un request
+
+    # Compresión de respuestas: gzip y br (este último solo con el paquete brotli instalado)
+    compression_enabled: bool = Field(default=True)
+    compression_minimum_size: int = Field(default=1024, ge=0) # Bytes; las respuestas más chicas van sin comprimir
+    compression_gzip_level: int = Field(default=6, ge=1, le=9)
+    compression_brotli: bool = Field(default=True)
+    compression_brotli_quality: int = Field(default=4, ge=0, le=11)
+
+    # Stream de cambios (GET /rutinas/stream): eventos pendientes por cliente y comentario de keep-alive
+    sse_queue_size: int = Field(default=100, ge=1) # Si se llena se descartan los más viejos (evento resync)
+    sse_heartbeat_seconds: float = Field(default=15.0, gt=0)
+    # Duración máxima de cada conexión: el navegador reconecta solo (y vuelve a validar el token)
+    sse_max_connection_seconds: float = Field(default=300.0, gt=0)
+
+    count_cache_ttl_seconds: float = Field(default=30.0, ge=0)
+    # Serializa listados y lecturas de rutinas desde el ORM sin revalidar con response_model
+    fast_json_responses: bool = Field(default=False)
+    # Caché de respuestas serializadas (GET /rutinas/{id}); TTL 0 la desactiva
+    response_cache_ttl_seconds: float = Field(default=30.0, ge=0)
+    response_cache_maxsize: int = Field(default=1024, ge=1)
+    # Nivel compartido opcional: "redis" (requiere CACHE_URL y el paquete redis) o "memoria" (reemplazo local)
+    cache_backend: Literal["", "memoria", "redis"] = Field(default="")
+    cache_url: str | None = Field(default=None)
 
     @property
     def sqlmodel_database_uri(self) -> str:
@@ -33,6 +81,20 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def sqlmodel_async_database_uri(self) -> str:
+        # Mismo destino que sqlmodel_database_uri pero con un driver async
+        uri = self.sqlmodel_database_uri
+        scheme, _, resto = uri.partition("://")
+        drivers_async = {
+            "sqlite": "sqlite+aiosqlite",
+            "sqlite+pysqlite": "sqlite+aiosqlite",
+            "postgresql": "postgresql+psycopg",  # psycopg 3 soporta sync y async con el mismo dialecto
+            "postgres": "postgresql+psycopg",
+            "postgresql+psycopg2": "postgresql+psycopg",
+        }
+        return f"{drivers_async.get(scheme, scheme)}://{resto}"
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -0,0 +1,82 @@
+# este archivo reparte dentro del proceso los eventos de cambios de rutinas (GET /rutinas/stream, SSE)
+# los handlers publican con publicar() después de confirmar cada escritura; cada cliente conectado
+# tiene su propia cola acotada y, si no lee a tiempo, se descartan sus eventos más viejos: el stream
+# le avisa con un evento "resync" para que recupere lo perdido con GET /rutinas/cambios
+# publicar() no bloquea y se puede llamar desde el threadpool (handlers síncronos) o desde el event loop
+# el reparto es por proceso: con varios workers o réplicas cada cliente ve los cambios hechos en el suyo
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import asdict, dataclass
+from threading import Lock
+
+from app.core.metricas import sse_descartados
+
+
+@dataclass(frozen=True)
+class EventoRutina:
+    tipo: str # creada, actualizada, eliminada, duplicada o importacion
+    rutina_id: int | None = None
+    version: int | None = None # Versión de la rutina tras el cambio (la del ETag)
+    origen_id: int | None = None # Rutina copiada (duplicada)
+    cantidad: int | None = None # Rutinas importadas (importacion)
+
+    def datos(self) -> str:
+        return json.dumps({campo: valor for campo, valor in asdict(self).items() if valor is not None})
+
+
+class Suscripcion:
+    def __init__(self, loop: asyncio.AbstractEventLoop, capacidad: int) -> None:
+        self.loop = loop
+        self._eventos: deque[EventoRutina] = deque(maxlen=capacidad)
+        self._hay_eventos = asyncio.Event()
+        self._descartados = 0 # Desde la última lectura
+
+    def encolar(self, evento: EventoRutina) -> None:
+        # Corre en el event loop de la suscripción; la deque llena descarta sola el más viejo
+        if len(self._eventos) == self._eventos.maxlen:
+            self._descartados += 1
+            sse_descartados.incrementar()
+        self._eventos.append(evento)
+        self._hay_eventos.set()
+
+    async def siguientes(self, espera_segundos: float) -> tuple[list[EventoRutina], int]:
+        # Eventos pendientes (espera hasta espera_segundos si no hay) y cuántos se descartaron antes de ellos
+        if not self._eventos:
+            try:
+                await asyncio.wait_for(self._hay_eventos.wait(), espera_segundos)
+            except TimeoutError:
+                pass
+        self._hay_eventos.clear()
+        eventos = list(self._eventos)
+        self._eventos.clear()
+        descartados, self._descartados = self._descartados, 0
+        return eventos, descartados
+
+
+class DifusorEventos:
+    def __init__(self, capacidad_cola: int) -> None:
+        self.capacidad_cola = capacidad_cola
+        self._suscripciones: set[Suscripcion] = set()
+        self._lock = Lock()
+
+    def suscribir(self) -> Suscripcion:
+        # Se llama desde el event loop que va a leer la suscripción
+        suscripcion = Suscripcion(asyncio.get_running_loop(), self.capacidad_cola)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, evento: EventoRutina) -> None:
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.encolar, evento)
+            except RuntimeError:  # event loop ya cerrado: la suscripción se descarta al terminar su stream
+                pass
@@ -0,0 +1,246 @@
+# este archivo mide dónde se va el tiempo de cada request y lo expone en formato Prometheus (/metrics)
+# - MetricasMiddleware: latencia por ruta (la plantilla, p. ej. /rutinas/{rutina_id}), método y estado
+# - instrumentar_sql(): cantidad y duración de sentencias con before/after_cursor_execute del engine
+# - medir_password(): tiempo de bcrypt (hash y verificación) en el pool de hashing
+# lo medido dentro de un request también se suma a su MedicionRequest (contextvar), que alimenta el
+# histograma de sentencias por request y, con APP_DEBUG, el header Server-Timing de la respuesta
+# la implementación es propia (sin prometheus_client): histogramas y contadores en memoria por proceso
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, ParamSpec, TypeVar
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BUCKETS_SENTENCIAS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BUCKETS_PASSWORD = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+# Etiqueta de ruta para requests que no coinciden con ninguna (evita una serie por URL inventada)
+RUTA_DESCONOCIDA = "<sin_ruta>"
+OPERACIONES_SQL = frozenset({"select", "insert", "update", "delete", "with", "pragma"})
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: tuple[str, ...], valores: tuple[str, ...], extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> None:
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores: dict[tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def incrementar(self, *valores: str, cantidad: float = 1) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            for valores, total in sorted(self._valores.items()):
+                lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {total:g}")
+        return lineas
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, buckets: tuple[float, ...], etiquetas: tuple[str, ...] = ()) -> None:
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.etiquetas = etiquetas
+        # Por combinación de etiquetas: [conteo por bucket (no acumulado; el último es +Inf), suma]
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = Lock()
+
+    def observar(self, valor: float, *valores: str) -> None:
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = ([0] * (len(self.buckets) + 1), [0.0])
+            serie[0][indice] += 1
+            serie[1][0] += valor
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = sorted((valores, list(conteos), suma[0]) for valores, (conteos, suma) in self._series.items())
+        for valores, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip((*self.buckets, float("inf")), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                etiquetas = _etiquetas(self.etiquetas, valores, f'le="{le}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma:.6f}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}")
+        return lineas
+
+
+http_duracion = Histograma(
+    "http_request_duration_seconds",
+    "Latencia de los requests HTTP por ruta",
+    BUCKETS_HTTP,
+    ("method", "route", "status"),
+)
+http_sentencias = Histograma(
+    "http_request_db_statements",
+    "Sentencias SQL ejecutadas por request",
+    BUCKETS_SENTENCIAS,
+    ("method", "route"),
+)
+sql_duracion = Histograma(
+    "db_statement_duration_seconds",
+    "Duración de las sentencias SQL por tipo",
+    BUCKETS_SQL,
+    ("operation",),
+)
+sql_errores = Contador("db_statement_errors_total", "Sentencias SQL que terminaron con error", ("operation",))
+password_duracion = Histograma(
+    "password_hash_duration_seconds",
+    "Tiempo de bcrypt por operación (sin la espera en el pool de hashing)",
+    BUCKETS_PASSWORD,
+    ("operation",),
+)
+sse_descartados = Contador("sse_events_dropped_total", "Eventos SSE descartados por clientes que no leen a tiempo")
+METRICAS: tuple[Contador | Histograma, ...] = (
+    http_duracion,
+    http_sentencias,
+    sql_duracion,
+    sql_errores,
+    password_duracion,
+    sse_descartados,
+)
+
+
+@dataclass
+class MedicionRequest:
+    sentencias: int = 0
+    sql_segundos: float = 0.0
+    password_segundos: float = 0.0
+
+
+_medicion_actual: ContextVar[MedicionRequest | None] = ContextVar("medicion_request", default=None)
+
+
+def medicion_actual() -> MedicionRequest | None:
+    # Los handlers síncronos corren en el threadpool con una copia del contexto: ven el mismo objeto
+    return _medicion_actual.get()
+
+
+def exponer_metricas() -> str:
+    lineas: list[str] = []
+    for metrica in METRICAS:
+        lineas.extend(metrica.exponer())
+    return "\n".join(lineas) + "\n"
+
+
+def _operacion_sql(statement: str) -> str:
+    primera = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return primera if primera in OPERACIONES_SQL else "otra"
+
+
+def instrumentar_sql(sync_engine: Engine) -> None:
+    # Una pila por conexión: el inicio se guarda en before y se consume en after (o en handle_error)
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn: Any, _cursor: Any, _statement: str, *_args: Any) -> None:
+        conn.info.setdefault("metricas_inicios", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _despues(conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        segundos = time.perf_counter() - conn.info["metricas_inicios"].pop()
+        sql_duracion.observar(segundos, _operacion_sql(statement))
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.sentencias += 1
+            medicion.sql_segundos += segundos
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(contexto: Any) -> None:
+        inicios = contexto.connection.info.get("metricas_inicios") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+        if contexto.statement:
+            sql_errores.incrementar(_operacion_sql(contexto.statement))
+
+
+def medir_password(operacion: str, funcion: Callable[P, T]) -> Callable[P, T]:
+    # Envuelve la función que corre en el pool de hashing; ese hilo no hereda el contexto del request,
+    # así que la medición del request se captura acá (en el hilo que llama) y se completa allá
+    medicion = _medicion_actual.get()
+
+    def _medida(*args: P.args, **kwargs: P.kwargs) -> T:
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            segundos = time.perf_counter() - inicio
+            password_duracion.observar(segundos, operacion)
+            if medicion is not None:
+                medicion.password_segundos += segundos
+
+    return _medida
+
+
+class MetricasMiddleware:
+    def __init__(self, app: ASGIApp, server_timing: bool = False) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = MedicionRequest()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def _enviar(message: Message) -> None:
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers.append("Server-Timing", _server_timing(medicion, time.perf_counter() - inicio))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _enviar)
+        finally:
+            _medicion_actual.reset(token)
+            # El router deja en el scope la ruta que atendió el request
+            ruta = getattr(scope.get("route"), "path", RUTA_DESCONOCIDA)
+            metodo = scope["method"]
+            http_duracion.observar(time.perf_counter() - inicio, metodo, ruta, str(estado))
+            http_sentencias.observar(medicion.sentencias, metodo, ruta)
+
+
+def _server_timing(medicion: MedicionRequest, segundos: float) -> str:
+    partes = [
+        f"app;dur={segundos * 1000:.1f}",
+        f'db;dur={medicion.sql_segundos * 1000:.1f};desc="{medicion.sentencias} sentencias"',
+    ]
+    if medicion.password_segundos:
+        partes.append(f"bcrypt;dur={medicion.password_segundos * 1000:.1f}")
+    return ", ".join(partes)
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
@@ -6,6 +8,7 @@ from passlib.context import CryptContext
 from passlib.handlers import bcrypt as passlib_bcrypt
 
 from app.core.config import get_settings
+from app.core.metricas import medir_password
 
 try:  # pragma: no cover - solo garantiza compatibilidad cuando bcrypt carece de __about__
     import bcrypt as _bcrypt
@@ -28,8 +31,16 @@ if not _wrap_bug_patch_applied:
     setattr(passlib_bcrypt, "detect_wrap_bug", _safe_detect_wrap_bug)
     setattr(passlib_bcrypt, "_wrap_bug_patch_applied", True)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
+# Los hashes con un costo distinto al configurado se marcan para actualizar (ver verify_and_update_password)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+# bcrypt tarda cientos de ms por operación: se ejecuta en un pool propio y acotado para que
+# una ráfaga de logins no ocupe los hilos del threadpool de FastAPI que atienden al resto de los endpoints
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
 
 
 def _clamp_password(password: str) -> str:
@@ -47,9 +58,29 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(_clamp_password(password))
 
 
-def create_access_token(subject: int, expires_delta: timedelta | None = None) -> str:
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verifica y, si el hash usa un costo distinto al configurado, devuelve uno nuevo para guardar."""
+    return pwd_context.verify_and_update(_clamp_password(plain_password), hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, medir_password("hash", get_password_hash), password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor,
+        medir_password("verify", verify_and_update_password),
+        plain_password,
+        hashed_password,
+    )
+
+
+def create_access_token(subject: int, token_version: int = 0, expires_delta: timedelta | None = None) -> str:
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "ver": token_version}
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.jwt_algorithm)
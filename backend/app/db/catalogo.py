@@ -0,0 +1,272 @@
+# este archivo implementa la importación y exportación masiva del catálogo de rutinas
+# formatos:
+# - NDJSON: una rutina por línea con la forma de RutinaCreate (la exportación agrega id y fecha_creacion)
+# - CSV: una fila por ejercicio con las columnas de COLUMNAS_CSV; las filas consecutivas con el mismo
+#   rutina_nombre forman una rutina y una fila sin ejercicio_nombre es una rutina sin ejercicios
+# la importación valida cada rutina con RutinaCreate e inserta por lotes (executemany);
+# la exportación recorre la tabla por id en bloques, sin cargar todo el catálogo en memoria
+
+import codecs
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.db import estadisticas
+from app.models import Ejercicio, Rutina
+from app.schemas.rutina import ErrorImportacion, RutinaCreate
+
+TAMAÑO_LOTE_IMPORTACION = 500 # Rutinas por INSERT/commit
+TAMAÑO_BLOQUE_EXPORTACION = 500 # Rutinas leídas por consulta al exportar
+MAX_ERRORES_REPORTADOS = 1000 # El resto solo se cuenta en total_errores
+
+COLUMNAS_CSV = (
+    "rutina_nombre",
+    "rutina_descripcion",
+    "ejercicio_nombre",
+    "dia_semana",
+    "series",
+    "repeticiones",
+    "peso",
+    "notas",
+    "orden",
+)
+COLUMNAS_EJERCICIO = ("nombre", "dia_semana", "series", "repeticiones", "peso", "notas", "orden")
+
+
+@dataclass
+class ResultadoImportacion:
+    importadas: int = 0
+    total_errores: int = 0
+    errores: list[ErrorImportacion] = field(default_factory=list)
+
+    def registrar_error(self, linea: int, nombre: str | None, detalle: str) -> None:
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append(ErrorImportacion(linea=linea, nombre=nombre, detalle=detalle))
+
+
+def lineas_desde_bytes(chunks: Iterable[bytes]) -> Iterator[str]:
+    # Corta el cuerpo recibido en líneas (con su salto) sin juntarlo entero en memoria
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    for chunk in chunks:
+        pendiente += decoder.decode(chunk)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea + "\n"
+    pendiente += decoder.decode(b"", final=True)
+    if pendiente:
+        yield pendiente
+
+
+def leer_ndjson(lineas: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except json.JSONDecodeError as exc:
+            yield numero, ValueError(f"JSON inválido: {exc.msg}")
+
+
+def leer_csv(lineas: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    # Agrupa las filas por rutina; devuelve (línea de la primera fila, datos crudos de la rutina)
+    lineas = iter(lineas)
+    encabezado = next(lineas, "")
+    separador = ";" if encabezado.count(";") > encabezado.count(",") else ","
+    columnas = [columna.strip() for columna in next(csv.reader([encabezado], delimiter=separador), [])]
+    faltantes = [columna for columna in ("rutina_nombre", "ejercicio_nombre") if columna not in columnas]
+    if faltantes:
+        yield 1, ValueError(f"Faltan columnas en el encabezado: {', '.join(faltantes)}")
+        return
+
+    lector = csv.DictReader(lineas, fieldnames=columnas, delimiter=separador)
+    actual: dict[str, Any] | None = None
+    linea_actual = 0
+    linea_fila = 2
+    for fila in lector:
+        valores = {clave: (valor or "").strip() for clave, valor in fila.items() if clave}
+        if not any(valores.values()):
+            linea_fila = lector.line_num + 1
+            continue
+        if actual is None or valores["rutina_nombre"] != actual["nombre"]:
+            if actual is not None:
+                yield linea_actual, actual
+            actual = {
+                "nombre": valores["rutina_nombre"],
+                "descripcion": valores.get("rutina_descripcion") or None,
+                "ejercicios": [],
+            }
+            linea_actual = linea_fila
+        if valores["ejercicio_nombre"]:
+            ejercicio = {"nombre": valores["ejercicio_nombre"]}
+            for columna in COLUMNAS_EJERCICIO[1:]:
+                if valores.get(columna):
+                    ejercicio[columna] = valores[columna]
+            actual["ejercicios"].append(ejercicio)
+        linea_fila = lector.line_num + 1
+    if actual is not None:
+        yield linea_actual, actual
+
+
+def _detalle_validacion(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in error['loc']) or 'rutina'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def importar_rutinas(session: Session, filas: Iterable[tuple[int, Any]]) -> ResultadoImportacion:
+    resultado = ResultadoImportacion()
+    lote: list[tuple[int, RutinaCreate]] = []
+    for linea, datos in filas:
+        if isinstance(datos, Exception):
+            resultado.registrar_error(linea, None, str(datos))
+            continue
+        try:
+            rutina = RutinaCreate.model_validate(datos)
+        except ValidationError as exc:
+            nombre = datos.get("nombre") if isinstance(datos, dict) else None
+            resultado.registrar_error(linea, nombre if isinstance(nombre, str) else None, _detalle_validacion(exc))
+            continue
+        lote.append((linea, rutina))
+        if len(lote) >= TAMAÑO_LOTE_IMPORTACION:
+            _insertar_lote(session, lote, resultado)
+            lote = []
+    if lote:
+        _insertar_lote(session, lote, resultado)
+    # Los duplicados se detectan al insertar cada lote: se reordena para informar por línea
+    resultado.errores.sort(key=lambda error: error.linea)
+    return resultado
+
+
+def _insertar_lote(session: Session, lote: list[tuple[int, RutinaCreate]], resultado: ResultadoImportacion) -> None:
+    # Descarta antes de insertar los nombres repetidos (en el lote o ya guardados) para que un
+    # duplicado no haga fallar al resto del lote
+    nombres = [rutina.nombre for _, rutina in lote]
+    existentes = set(session.exec(select(Rutina.nombre).where(Rutina.nombre.in_(nombres))).all())  # type: ignore[attr-defined]
+    validas: list[tuple[int, RutinaCreate]] = []
+    for linea, rutina in lote:
+        if rutina.nombre in existentes:
+            resultado.registrar_error(linea, rutina.nombre, "Ya existe una rutina con ese nombre")
+            continue
+        existentes.add(rutina.nombre)
+        validas.append((linea, rutina))
+    if not validas:
+        return
+
+    try:
+        _insertar(session, [rutina for _, rutina in validas])
+        session.commit()
+        resultado.importadas += len(validas)
+    except IntegrityError:
+        # Otra escritura ganó alguno de los nombres entre la verificación y el INSERT:
+        # se reintenta de a una rutina para informar exactamente cuáles fallan
+        session.rollback()
+        for linea, rutina in validas:
+            try:
+                _insertar(session, [rutina])
+                session.commit()
+                resultado.importadas += 1
+            except IntegrityError:
+                session.rollback()
+                resultado.registrar_error(linea, rutina.nombre, "Ya existe una rutina con ese nombre")
+
+
+def _insertar(session: Session, rutinas: list[RutinaCreate]) -> None:
+    # Un INSERT multi-fila de rutinas con RETURNING y un executemany de ejercicios;
+    # los ids nuevos se asocian por nombre (único), sin crear objetos ORM por fila
+    fecha_creacion = datetime.utcnow()
+    filas = (
+        session.execute(
+            insert(Rutina).returning(Rutina.nombre, Rutina.id),
+            [
+                {
+                    "nombre": rutina.nombre,
+                    "descripcion": rutina.descripcion,
+                    "fecha_creacion": fecha_creacion,
+                    "updated_at": fecha_creacion,
+                }
+                for rutina in rutinas
+            ],
+        )
+        .tuples()
+        .all()
+    )
+    ids = dict(filas)
+    ejercicios = [
+        {"rutina_id": ids[rutina.nombre], **ejercicio.model_dump()}
+        for rutina in rutinas
+        for ejercicio in rutina.ejercicios
+    ]
+    if ejercicios:
+        # INSERT de Core sobre la tabla: el bulk del ORM separa las filas según qué columnas son None
+        # y terminaría en un INSERT por ejercicio
+        session.execute(insert(Ejercicio.__table__), ejercicios)  # type: ignore[attr-defined]
+        estadisticas.recalcular(session, {ejercicio["rutina_id"] for ejercicio in ejercicios}, nuevas=True)
+
+
+def _bloques_exportacion(session: Session, statement: Any) -> Iterator[list[dict[str, Any]]]:
+    # Recorre las rutinas por id (keyset) y trae los ejercicios de cada bloque en una sola consulta
+    ultimo_id = 0
+    while True:
+        filas = session.exec(
+            statement.where(Rutina.id > ultimo_id).order_by(Rutina.id).limit(TAMAÑO_BLOQUE_EXPORTACION)  # type: ignore[operator]
+        ).all()
+        if not filas:
+            return
+        rutinas = {
+            fila.id: {
+                "id": fila.id,
+                "nombre": fila.nombre,
+                "descripcion": fila.descripcion,
+                "fecha_creacion": fila.fecha_creacion.isoformat(),
+                "ejercicios": [],
+            }
+            for fila in filas
+        }
+        columnas = [getattr(Ejercicio, columna) for columna in ("rutina_id", *COLUMNAS_EJERCICIO)]
+        ejercicios = session.exec(
+            select(*columnas)
+            .where(Ejercicio.rutina_id.in_(list(rutinas)))  # type: ignore[attr-defined]
+            .order_by(Ejercicio.rutina_id, Ejercicio.orden, Ejercicio.id)
+        ).all()
+        for ejercicio in ejercicios:
+            datos = dict(zip(COLUMNAS_EJERCICIO, ejercicio[1:]))
+            datos["dia_semana"] = datos["dia_semana"].value
+            rutinas[ejercicio[0]]["ejercicios"].append(datos)
+        yield list(rutinas.values())
+        if len(filas) < TAMAÑO_BLOQUE_EXPORTACION:
+            return
+        ultimo_id = filas[-1].id
+
+
+def exportar_ndjson(session: Session, statement: Any) -> Iterator[bytes]:
+    for bloque in _bloques_exportacion(session, statement):
+        yield "".join(json.dumps(rutina, ensure_ascii=False) + "\n" for rutina in bloque).encode("utf-8")
+
+
+def exportar_csv(session: Session, statement: Any) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(COLUMNAS_CSV)
+    for bloque in _bloques_exportacion(session, statement):
+        for rutina in bloque:
+            base = [rutina["nombre"], rutina["descripcion"] or ""]
+            if not rutina["ejercicios"]:
+                escritor.writerow([*base, *([""] * len(COLUMNAS_EJERCICIO))])
+            for ejercicio in rutina["ejercicios"]:
+                escritor.writerow([*base, *("" if ejercicio[c] is None else ejercicio[c] for c in COLUMNAS_EJERCICIO)])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
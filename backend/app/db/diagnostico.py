@@ -0,0 +1,129 @@
+# este archivo agrega diagnósticos de consultas para desarrollo/staging (SQL_DIAGNOSTICS=true)
+# - consultas lentas: toda sentencia que supera SQL_SLOW_QUERY_MS se loguea con su plan (EXPLAIN)
+# - N+1: DiagnosticoSQLMiddleware agrupa las sentencias de cada request por su forma (huella sin
+#   valores literales ni largos de listas IN) y avisa si un mismo SELECT se repite SQL_N_PLUS_ONE_THRESHOLD
+#   veces o más, el patrón típico de una relación cargada de a una fila
+# benchmarks/query_counts usa detectar_repetidas() para fallar también ante un N+1
+
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterable
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de EXPLAIN por dialecto (sin ANALYZE: no vuelve a ejecutar la sentencia)
+PREFIJOS_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETROS = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_LISTAS = re.compile(r"\?(?:\s*,\s*\?)+")
+_ESPACIOS = re.compile(r"\s+")
+
+_consultas_request: ContextVar[Counter[str] | None] = ContextVar("consultas_request", default=None)
+
+
+def huella_sentencia(statement: str) -> str:
+    # Misma huella para la misma consulta con otros valores: literales, parámetros y largo de IN (...)
+    huella = _PARAMETROS.sub("?", _LITERALES.sub("?", statement))
+    huella = _LISTAS.sub("?", huella)
+    return _ESPACIOS.sub(" ", huella).strip()
+
+
+def _es_lectura(statement: str) -> bool:
+    return statement.lstrip()[:6].lower().startswith(("select", "with"))
+
+
+def detectar_repetidas(sentencias: Iterable[str], umbral: int) -> list[tuple[str, int]]:
+    # SELECTs con la misma huella ejecutados umbral veces o más (el resto de los tipos se repite a propósito,
+    # p. ej. un INSERT por lote)
+    conteo = Counter(
+        huella_sentencia(sentencia)
+        for sentencia in sentencias
+        if _es_lectura(sentencia)
+    )
+    return [(huella, veces) for huella, veces in conteo.most_common() if veces >= umbral]
+
+
+def _plan(conexion_dbapi: Any, dialecto: str, statement: str, parameters: Any) -> str:
+    prefijo = PREFIJOS_EXPLAIN.get(dialecto)
+    if prefijo is None:
+        return "(EXPLAIN no disponible para este motor)"
+    # Cursor propio sobre la misma conexión DBAPI (o su adaptador async): no dispara los eventos del engine
+    # ni ocupa otra conexión del pool
+    cursor_plan = conexion_dbapi.cursor()
+    try:
+        cursor_plan.execute(prefijo + statement, parameters or ())
+        return "\n".join("    " + " | ".join(str(valor) for valor in fila) for fila in cursor_plan.fetchall())
+    finally:
+        cursor_plan.close()
+
+
+def instrumentar_diagnostico(sync_engine: Engine, settings: Settings) -> None:
+    umbral = settings.sql_slow_query_ms / 1000
+    dialecto = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn: Any, _cursor: Any, _statement: str, *_args: Any) -> None:
+        conn.info.setdefault("diagnostico_inicios", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _despues(conn: Any, _cursor: Any, statement: str, parameters: Any, _context: Any, executemany: bool) -> None:
+        segundos = time.perf_counter() - conn.info["diagnostico_inicios"].pop()
+        consultas = _consultas_request.get()
+        if consultas is not None:
+            consultas[statement] += 1
+        if umbral <= 0 or segundos < umbral:
+            return
+        plan = "(executemany: sin plan)"
+        if not executemany and _es_lectura(statement):
+            try:
+                plan = _plan(conn.connection, dialecto, statement, parameters)
+            except Exception as exc:  # el diagnóstico nunca debe romper el request
+                plan = f"(no se pudo obtener el plan: {exc})"
+        logger.warning(
+            "Consulta lenta (%.1f ms): %s\n  parámetros: %r\n  plan:\n%s",
+            segundos * 1000,
+            " ".join(statement.split()),
+            parameters,
+            plan,
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(contexto: Any) -> None:
+        inicios = contexto.connection.info.get("diagnostico_inicios") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+
+
+class DiagnosticoSQLMiddleware:
+    def __init__(self, app: ASGIApp, umbral_repeticiones: int) -> None:
+        self.app = app
+        self.umbral_repeticiones = umbral_repeticiones
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        consultas: Counter[str] = Counter()
+        token = _consultas_request.set(consultas)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _consultas_request.reset(token)
+            for huella, veces in detectar_repetidas(consultas.elements(), self.umbral_repeticiones):
+                logger.warning(
+                    "Posible N+1 en %s %s: la misma consulta se ejecutó %d veces: %s",
+                    scope["method"],
+                    getattr(scope.get("route"), "path", scope["path"]),
+                    veces,
+                    huella,
+                )
@@ -0,0 +1,226 @@
+# este archivo mantiene y consulta los rollups de volumen de entrenamiento (GET /rutinas/estadisticas)
+# - estadisticas_rutinas_dias: una fila por (rutina, día) con las sumas de los ejercicios de ese día
+# - estadisticas_rutinas: los totales de cada rutina (ranking general por índice, sin agrupar)
+# - estadisticas_dias: la distribución semanal del catálogo (7 filas)
+# cada escritura de rutinas llama a recalcular() (o copiar()/descontar()) con los ids que tocó, dentro
+# de su transacción: las filas de esas rutinas se rehacen con INSERT ... SELECT ... GROUP BY sobre sus
+# ejercicios (índice por rutina_id) y la diferencia entre las filas borradas y las nuevas (RETURNING)
+# se suma a estadisticas_dias; el costo depende de las rutinas modificadas y no del tamaño del catálogo
+# reconstruir() recalcula todo desde los ejercicios (siembras por Core, bases creadas antes de las tablas)
+
+from collections import defaultdict
+from collections.abc import Collection, Iterable, Sequence
+from typing import Any, cast
+
+from sqlalchemy import Connection, Integer, bindparam, delete, func, insert, update
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlmodel import Session, select
+
+from app.models import DiaSemana, Ejercicio, EstadisticaDia, EstadisticaRutina, EstadisticaRutinaDia, Rutina
+
+SUMAS = ("ejercicios", "series", "repeticiones", "volumen")
+COLUMNAS_DIA = ("rutina_id", "dia_semana", *SUMAS)
+
+_ejercicios = Ejercicio.__table__  # type: ignore[attr-defined]
+_rutinas_dias = EstadisticaRutinaDia.__table__  # type: ignore[attr-defined]
+_rutinas = EstadisticaRutina.__table__  # type: ignore[attr-defined]
+_dias = EstadisticaDia.__table__  # type: ignore[attr-defined]
+
+# Filas de estadisticas_rutinas_dias calculadas desde los ejercicios
+_AGREGADO_EJERCICIOS = (
+    select(
+        _ejercicios.c.rutina_id,
+        _ejercicios.c.dia_semana,
+        func.count(),
+        func.sum(_ejercicios.c.series),
+        func.sum(_ejercicios.c.series * _ejercicios.c.repeticiones),
+        func.coalesce(func.sum(_ejercicios.c.series * _ejercicios.c.repeticiones * _ejercicios.c.peso), 0.0),
+    )
+    .where(_ejercicios.c.dia_semana.is_not(None))
+    .group_by(_ejercicios.c.rutina_id, _ejercicios.c.dia_semana)
+)
+_FILAS_DIA = tuple(_rutinas_dias.c[columna] for columna in COLUMNAS_DIA)
+
+# Las sentencias de las escrituras se arman una sola vez (la lista de ids va como parámetro expandible):
+# construirlas en cada request costaba más que ejecutarlas
+_INSERTAR_DIAS = (
+    insert(_rutinas_dias)
+    .from_select(
+        COLUMNAS_DIA,
+        _AGREGADO_EJERCICIOS.where(_ejercicios.c.rutina_id.in_(bindparam("ids", expanding=True))),
+    )
+    .returning(*_FILAS_DIA)
+)
+_COPIAR_DIAS = (
+    insert(_rutinas_dias)
+    .from_select(
+        COLUMNAS_DIA,
+        select(bindparam("rutina_id", type_=Integer), *_FILAS_DIA[1:]).where(
+            _rutinas_dias.c.rutina_id == bindparam("origen_id")
+        ),
+    )
+    .returning(*_FILAS_DIA)
+)
+_BORRAR_DIAS = (
+    delete(_rutinas_dias).where(_rutinas_dias.c.rutina_id.in_(bindparam("ids", expanding=True))).returning(*_FILAS_DIA)
+)
+_INSERTAR_TOTALES = insert(_rutinas)
+_BORRAR_TOTALES = delete(_rutinas).where(_rutinas.c.rutina_id.in_(bindparam("ids", expanding=True)))
+# Suma una diferencia a la fila de un día (executemany con un juego de parámetros por día)
+_SUMAR_DIA = (
+    update(_dias)
+    .where(_dias.c.dia_semana == bindparam("b_dia_semana"))
+    .values(
+        rutinas=_dias.c.rutinas + bindparam("b_rutinas"),
+        **{suma: _dias.c[suma] + bindparam(f"b_{suma}") for suma in SUMAS},
+    )
+)
+
+
+def _columna(modelo: Any, nombre: str) -> InstrumentedAttribute[Any]:
+    return cast(InstrumentedAttribute[Any], getattr(modelo, nombre))
+
+
+def _preparar(conexion: Session | Connection) -> None:
+    # Las sentencias de Core no disparan el autoflush: los ejercicios pendientes del ORM se escriben antes
+    if isinstance(conexion, Session):
+        conexion.flush()
+
+
+def recalcular(conexion: Session | Connection, rutina_ids: Collection[int], nuevas: bool = False) -> None:
+    """Rehace el rollup de esas rutinas; con nuevas=True no hay filas previas que borrar."""
+    if not rutina_ids:
+        return
+    _preparar(conexion)
+    ids = {"ids": list(rutina_ids)}
+    anteriores: Sequence[Any] = []
+    if not nuevas:
+        anteriores = conexion.execute(_BORRAR_DIAS, ids).all()
+        conexion.execute(_BORRAR_TOTALES, ids)
+    nuevas_filas = conexion.execute(_INSERTAR_DIAS, ids).all()
+    _agregar_totales(conexion, nuevas_filas)
+    _sumar_dias(conexion, anteriores, nuevas_filas)
+
+
+def copiar(conexion: Session | Connection, origen_id: int, rutina_id: int) -> None:
+    """Una copia exacta de los ejercicios tiene el mismo rollup: se copian las filas sin leer ejercicios."""
+    _preparar(conexion)
+    nuevas_filas = conexion.execute(_COPIAR_DIAS, {"origen_id": origen_id, "rutina_id": rutina_id}).all()
+    _agregar_totales(conexion, nuevas_filas)
+    _sumar_dias(conexion, [], nuevas_filas)
+
+
+def descontar(conexion: Session | Connection, rutina_ids: Collection[int]) -> None:
+    """Antes de borrar rutinas: resta sus filas de la distribución semanal (el resto lo borra la cascada)."""
+    _preparar(conexion)
+    _sumar_dias(conexion, conexion.execute(_BORRAR_DIAS, {"ids": list(rutina_ids)}).all(), [])
+
+
+def reconstruir(conexion: Session | Connection) -> None:
+    """Recalcula los tres rollups desde los ejercicios."""
+    _preparar(conexion)
+    for tabla in (_rutinas_dias, _rutinas, _dias):
+        conexion.execute(delete(tabla))
+    conexion.execute(insert(_rutinas_dias).from_select(COLUMNAS_DIA, _AGREGADO_EJERCICIOS))
+    conexion.execute(
+        insert(_rutinas).from_select(
+            ("rutina_id", *SUMAS),
+            select(_rutinas_dias.c.rutina_id, *_sumas(_rutinas_dias)).group_by(_rutinas_dias.c.rutina_id),
+        )
+    )
+    por_dia = {
+        fila.dia_semana: fila
+        for fila in conexion.execute(
+            select(_rutinas_dias.c.dia_semana, func.count().label("rutinas"), *_sumas(_rutinas_dias)).group_by(
+                _rutinas_dias.c.dia_semana
+            )
+        ).all()
+    }
+    # Los 7 días siempre existen: las escrituras solo suman diferencias a filas ya creadas
+    conexion.execute(
+        insert(_dias),
+        [
+            {"dia_semana": dia, "rutinas": por_dia[dia].rutinas, **_valores(por_dia[dia])}
+            if dia in por_dia
+            else {"dia_semana": dia, "rutinas": 0, **dict.fromkeys(SUMAS, 0)}
+            for dia in DiaSemana
+        ],
+    )
+
+
+def _valores(fila: Any) -> dict[str, Any]:
+    return {suma: getattr(fila, suma) for suma in SUMAS}
+
+
+def _sumas(tabla: Any) -> list[Any]:
+    return [func.sum(tabla.c[suma]).label(suma) for suma in SUMAS]
+
+
+def _agregar_totales(conexion: Session | Connection, filas: Iterable[Any]) -> None:
+    # Totales por rutina desde las filas por día recién insertadas (ya están en memoria por RETURNING)
+    totales: dict[int, dict[str, Any]] = {}
+    for fila in filas:
+        total = totales.setdefault(fila.rutina_id, {"rutina_id": fila.rutina_id, **dict.fromkeys(SUMAS, 0)})
+        for suma in SUMAS:
+            total[suma] += getattr(fila, suma)
+    if totales:
+        conexion.execute(_INSERTAR_TOTALES, list(totales.values()))
+
+
+def _sumar_dias(conexion: Session | Connection, anteriores: Iterable[Any], nuevas: Iterable[Any]) -> None:
+    # Diferencia por día entre las filas que salen y las que entran; los días sin cambios no se tocan
+    diferencias: dict[DiaSemana, dict[str, Any]] = {}
+    for signo, filas in ((-1, anteriores), (1, nuevas)):
+        for fila in filas:
+            diferencia = diferencias.setdefault(
+                fila.dia_semana,
+                {"b_dia_semana": fila.dia_semana, "b_rutinas": 0, **{f"b_{suma}": 0 for suma in SUMAS}},
+            )
+            diferencia["b_rutinas"] += signo
+            for suma in SUMAS:
+                diferencia[f"b_{suma}"] += signo * getattr(fila, suma)
+    parametros = [
+        diferencia
+        for diferencia in diferencias.values()
+        if any(valor for clave, valor in diferencia.items() if clave != "b_dia_semana")
+    ]
+    if parametros:
+        conexion.execute(_SUMAR_DIA, parametros)
+
+
+def distribucion_semanal(session: Session) -> list[EstadisticaDia]:
+    return list(session.exec(select(EstadisticaDia)).all())
+
+
+def ranking_rutinas(session: Session, limite: int, dia_semana: DiaSemana | None = None) -> list[Any]:
+    # Las rutinas de mayor volumen (total o de un día) leyendo las primeras filas de un índice;
+    # el desempate por id también es descendente para recorrer el índice en un solo sentido
+    columnas = (_columna(Rutina, "nombre"), *(_rutinas.c[columna] for columna in ("rutina_id", *SUMAS)))
+    rutina_id = _columna(Rutina, "id")
+    if dia_semana is None:
+        statement = (
+            select(*columnas)
+            .join_from(_rutinas, Rutina, rutina_id == _rutinas.c.rutina_id)
+            .order_by(_rutinas.c.volumen.desc(), _rutinas.c.rutina_id.desc())
+        )
+    else:
+        statement = (
+            select(*columnas)
+            .join_from(_rutinas_dias, _rutinas, _rutinas.c.rutina_id == _rutinas_dias.c.rutina_id)
+            .join(Rutina, rutina_id == _rutinas_dias.c.rutina_id)
+            .where(_rutinas_dias.c.dia_semana == dia_semana)
+            .order_by(_rutinas_dias.c.volumen.desc(), _rutinas_dias.c.rutina_id.desc())
+        )
+    return list(session.execute(statement.limit(limite)).all())
+
+
+def por_dia_rutinas(session: Session, rutina_ids: Collection[int]) -> dict[int, list[EstadisticaRutinaDia]]:
+    # Detalle por día de varias rutinas en una consulta (clave primaria rutina_id, dia_semana)
+    detalle: dict[int, list[EstadisticaRutinaDia]] = defaultdict(list)
+    if not rutina_ids:
+        return detalle
+    for fila in session.exec(
+        select(EstadisticaRutinaDia).where(_columna(EstadisticaRutinaDia, "rutina_id").in_(rutina_ids))
+    ).all():
+        detalle[fila.rutina_id].append(fila)
+    return detalle
@@ -0,0 +1,27 @@
+# este archivo centraliza las estrategias de carga de relaciones para cada endpoint
+# Rutina.ejercicios es lazy por defecto, así que ningún endpoint trae ejercicios sin pedirlos
+# cada handler elige explícitamente si necesita los ejercicios (selectinload) o no (raiseload)
+# raiseload hace que un acceso accidental a una relación no cargada falle en lugar de
+# disparar consultas extra silenciosas (N+1)
+
+from typing import Any, cast
+
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql.base import ExecutableOption
+
+from app.models import Rutina
+
+
+def _rutina_ejercicios_attr() -> InstrumentedAttribute[Any]:
+    return cast(InstrumentedAttribute[Any], Rutina.ejercicios)
+
+
+def rutina_con_ejercicios() -> list[ExecutableOption]:
+    """Rutina + ejercicios en una segunda consulta (WHERE rutina_id IN ...), sin JOIN ni filas duplicadas."""
+    return [selectinload(_rutina_ejercicios_attr()).raiseload("*"), raiseload("*")]
+
+
+def rutina_sin_relaciones() -> list[ExecutableOption]:
+    """Solo las columnas de la rutina; cualquier acceso a relaciones lanza un error."""
+    return [raiseload("*")]
@@ -0,0 +1,150 @@
+# este archivo arma las opciones de pool de los engines y mide su uso
+# - opciones_engine(): pool_size/max_overflow/timeout/recycle/pre_ping desde Settings
+# - perfil SQLite: WAL, synchronous y busy_timeout en cada conexión nueva (además de las claves foráneas)
+# - QueuePoolMedido / AsyncQueuePoolMedido: cuentan checkouts, esperas y timeouts para /health/db
+
+import time
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import Settings
+
+# Una espera por una conexión más larga que esto se cuenta como "espera con bloqueo"
+UMBRAL_ESPERA_SEGUNDOS = 0.001
+
+
+@dataclass
+class MetricasPool:
+    checkouts: int = 0
+    checkins: int = 0
+    conexiones_creadas: int = 0
+    esperas: int = 0
+    timeouts: int = 0
+    espera_total_ms: float = 0.0
+    espera_max_ms: float = 0.0
+
+
+class _RegistroMetricas:
+    def __init__(self) -> None:
+        self._metricas = MetricasPool()
+        self._lock = Lock()
+
+    def registrar_obtencion(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self._metricas.timeouts += 1
+            if segundos >= UMBRAL_ESPERA_SEGUNDOS:
+                self._metricas.esperas += 1
+            milisegundos = segundos * 1000
+            self._metricas.espera_total_ms += milisegundos
+            self._metricas.espera_max_ms = max(self._metricas.espera_max_ms, milisegundos)
+
+    def incrementar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self._metricas, campo, getattr(self._metricas, campo) + 1)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return asdict(self._metricas)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metricas = MetricasPool()
+
+
+class QueuePoolMedido(QueuePool):
+    # _do_get es donde QueuePool bloquea esperando una conexión libre (hasta pool_timeout)
+    metricas = _RegistroMetricas()
+
+    def _do_get(self) -> Any:
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_obtencion(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar_obtencion(time.perf_counter() - inicio)
+        return conexion
+
+
+class AsyncQueuePoolMedido(AsyncAdaptedQueuePool, QueuePoolMedido):
+    metricas = _RegistroMetricas()
+
+
+def _es_sqlite_en_memoria(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def opciones_engine(settings: Settings, url: str, asincrono: bool = False) -> dict[str, Any]:
+    # SQLite en memoria usa un pool de una conexión por hilo; ahí las opciones de QueuePool no aplican
+    if _es_sqlite_en_memoria(url):
+        return {}
+    opciones: dict[str, Any] = {
+        "poolclass": AsyncQueuePoolMedido if asincrono else QueuePoolMedido,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if make_url(url).get_backend_name() == "sqlite":
+        # Espera del driver ante una base bloqueada; PRAGMA busy_timeout la fija también por conexión
+        opciones["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
+    return opciones
+
+
+def configurar_sqlite(sync_engine: Engine, settings: Settings) -> None:
+    def _on_connect(dbapi_connection: Any, _connection_record: Any) -> None:
+        # SQLite no aplica las claves foráneas (ni ON DELETE CASCADE) salvo que se active por conexión.
+        # WAL deja leer mientras otra conexión escribe; synchronous=NORMAL es seguro con WAL
+        # (solo se pueden perder las últimas transacciones ante un corte de luz, nunca se corrompe)
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        if settings.sqlite_journal_mode and not _es_sqlite_en_memoria(str(sync_engine.url)):
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        if settings.sqlite_synchronous:
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.close()
+
+    event.listen(sync_engine, "connect", _on_connect)
+
+
+def instrumentar_pool(sync_engine: Engine) -> None:
+    registro = getattr(type(sync_engine.pool), "metricas", None)
+    if registro is None:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _conexion_creada(*_args: Any) -> None:
+        registro.incrementar("conexiones_creadas")
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checkout(*_args: Any) -> None:
+        registro.incrementar("checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def _checkin(*_args: Any) -> None:
+        registro.incrementar("checkins")
+
+
+def estado_pool(pool: Pool) -> dict[str, Any]:
+    estado: dict[str, Any] = {"clase": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamaño=pool.size(),
+            en_uso=pool.checkedout(),
+            libres=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    registro = getattr(type(pool), "metricas", None)
+    if registro is not None:
+        estado.update(registro.snapshot())
+    return estado
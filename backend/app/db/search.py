@@ -0,0 +1,214 @@
+# este archivo implementa la búsqueda de rutinas por texto sobre nombre, descripción y nombres de ejercicios
+# hay un backend por motor de base de datos, elegido automáticamente según el dialecto del engine:
+# - PostgreSQL: tsvector + pg_trgm, ambos respaldados por índices GIN (ver migración de Alembic)
+# - SQLite: tabla virtual FTS5 rutinas_fts mantenida por triggers
+# - cualquier otro caso: ILIKE sobre las columnas (sin índice, solo como respaldo)
+# todos devuelven un select con las columnas (rutina_id, rank), donde un rank mayor es un mejor resultado
+
+import re
+from functools import lru_cache
+from typing import Any, Protocol, cast
+
+from sqlalchemy import Connection, Engine, column, func, literal, literal_column, or_, select, table, text, union_all
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+from app.models import Ejercicio, Rutina
+
+# Configuración de texto de PostgreSQL; debe coincidir con la usada en los índices de la migración
+TS_CONFIG = "spanish"
+# Los ejercicios pesan menos que el nombre/descripción de la propia rutina
+PESO_EJERCICIOS = 0.5
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BackendBusqueda(Protocol):
+    nombre: str
+
+    def coincidencias(self, termino: str) -> Select[Any] | None:
+        """Select (rutina_id, rank) con las rutinas que coinciden; None si el término no tiene palabras."""
+        ...
+
+
+def _col(attr: Any) -> InstrumentedAttribute[Any]:
+    return cast(InstrumentedAttribute[Any], attr)
+
+
+def _patron_like(termino: str) -> str:
+    return f"%{termino.strip()}%"
+
+
+class BusquedaPostgres:
+    nombre = "postgresql"
+
+    def __init__(self, trigramas: bool) -> None:
+        self.trigramas = trigramas
+
+    def coincidencias(self, termino: str) -> Select[Any] | None:
+        termino = termino.strip()
+        if not termino:
+            return None
+
+        consulta = func.plainto_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), termino)
+        patron = _patron_like(termino)
+
+        # Las expresiones son idénticas a las de los índices GIN para que el planner pueda usarlos
+        vector_rutina = literal_column(
+            f"to_tsvector('{TS_CONFIG}'::regconfig, "
+            "coalesce(rutinas.nombre, '') || ' ' || coalesce(rutinas.descripcion, ''))"
+        )
+        vector_ejercicio = literal_column(f"to_tsvector('{TS_CONFIG}'::regconfig, ejercicios.nombre)")
+
+        rank_rutina: Any = func.ts_rank(vector_rutina, consulta)
+        rank_ejercicio: Any = func.ts_rank(vector_ejercicio, consulta)
+        if self.trigramas:
+            rank_rutina = func.greatest(rank_rutina, func.similarity(_col(Rutina.nombre), termino))
+            rank_ejercicio = func.greatest(rank_ejercicio, func.similarity(_col(Ejercicio.nombre), termino))
+
+        por_rutina = select(_col(Rutina.id).label("rutina_id"), rank_rutina.label("rank")).where(
+            or_(
+                vector_rutina.op("@@")(consulta),
+                _col(Rutina.nombre).ilike(patron),  # usa el índice gin_trgm_ops
+            )
+        )
+        por_ejercicio = select(
+            _col(Ejercicio.rutina_id).label("rutina_id"),
+            (rank_ejercicio * PESO_EJERCICIOS).label("rank"),
+        ).where(
+            or_(
+                vector_ejercicio.op("@@")(consulta),
+                _col(Ejercicio.nombre).ilike(patron),
+            )
+        )
+        candidatos = union_all(por_rutina, por_ejercicio).subquery("candidatos")
+        return select(
+            candidatos.c.rutina_id,
+            func.max(candidatos.c.rank).label("rank"),
+        ).group_by(candidatos.c.rutina_id)
+
+
+class BusquedaSQLite:
+    nombre = "sqlite-fts5"
+
+    _fts = table("rutinas_fts", column("rowid"))
+
+    def coincidencias(self, termino: str) -> Select[Any] | None:
+        tokens = _TOKEN_RE.findall(termino)
+        if not tokens:
+            return None
+        # Cada palabra se busca como prefijo y todas deben aparecer: "press banca" -> "press"* "banca"*
+        expresion = " ".join(f'"{token}"*' for token in tokens)
+        # bm25 devuelve valores negativos (más chico = mejor); se invierte el signo
+        rank = -func.bm25(literal_column("rutinas_fts"), 10.0, 3.0, 10.0 * PESO_EJERCICIOS)
+        return select(
+            self._fts.c.rowid.label("rutina_id"),
+            rank.label("rank"),
+        ).where(literal_column("rutinas_fts").op("MATCH")(expresion))
+
+
+class BusquedaLike:
+    nombre = "like"
+
+    def coincidencias(self, termino: str) -> Select[Any] | None:
+        termino = termino.strip()
+        if not termino:
+            return None
+        patron = _patron_like(termino)
+        en_ejercicios = select(_col(Ejercicio.rutina_id)).where(_col(Ejercicio.nombre).ilike(patron))
+        return select(_col(Rutina.id).label("rutina_id"), literal(1.0).label("rank")).where(
+            or_(
+                _col(Rutina.nombre).ilike(patron),
+                _col(Rutina.descripcion).ilike(patron),
+                _col(Rutina.id).in_(en_ejercicios),
+            )
+        )
+
+
+@lru_cache(maxsize=8)
+def get_backend_busqueda(engine: Engine) -> BackendBusqueda:
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            trigramas = connection.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first()
+            return BusquedaPostgres(trigramas=trigramas is not None)
+        if engine.dialect.name == "sqlite" and _existe_fts_sqlite(connection):
+            return BusquedaSQLite()
+    return BusquedaLike()
+
+
+def _existe_fts_sqlite(connection: Connection) -> bool:
+    fila = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rutinas_fts'")
+    ).first()
+    return fila is not None
+
+
+# DDL de SQLite, idéntico al de la migración de Alembic; init_db lo aplica en las bases creadas con create_all
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS rutinas_fts USING fts5("
+    "nombre, descripcion, ejercicios, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ai AFTER INSERT ON rutinas BEGIN "
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "VALUES (new.id, new.nombre, coalesce(new.descripcion, ''), ''); END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_au AFTER UPDATE OF nombre, descripcion ON rutinas BEGIN "
+    "UPDATE rutinas_fts SET nombre = new.nombre, descripcion = coalesce(new.descripcion, '') "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS rutinas_fts_ad AFTER DELETE ON rutinas BEGIN "
+    "DELETE FROM rutinas_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ai AFTER INSERT ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = new.rutina_id) WHERE rowid = new.rutina_id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_au AFTER UPDATE OF nombre, rutina_id ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = old.rutina_id) WHERE rowid = old.rutina_id; "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = new.rutina_id) WHERE rowid = new.rutina_id; END",
+    "CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ad AFTER DELETE ON ejercicios BEGIN "
+    "UPDATE rutinas_fts SET ejercicios = (SELECT coalesce(group_concat(nombre, ' '), '') "
+    "FROM ejercicios WHERE rutina_id = old.rutina_id) WHERE rowid = old.rutina_id; END",
+)
+
+SQLITE_FTS_TRIGGERS = (
+    "rutinas_fts_ai",
+    "rutinas_fts_au",
+    "rutinas_fts_ad",
+    "ejercicios_fts_ai",
+    "ejercicios_fts_au",
+    "ejercicios_fts_ad",
+)
+
+SQLITE_FTS_BACKFILL = (
+    "INSERT INTO rutinas_fts(rowid, nombre, descripcion, ejercicios) "
+    "SELECT r.id, r.nombre, coalesce(r.descripcion, ''), "
+    "coalesce((SELECT group_concat(e.nombre, ' ') FROM ejercicios e WHERE e.rutina_id = r.id), '') "
+    "FROM rutinas r"
+)
+
+
+def instalar_busqueda_sqlite(engine: Engine) -> None:
+    """Crea la tabla FTS5 y sus triggers si faltan, e indexa las rutinas existentes."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        reparar_fts_sqlite(connection)
+
+
+def reparar_fts_sqlite(connection: Connection) -> bool:
+    """Crea lo que falte de la búsqueda FTS5 y reindexa si hubo que crear algo; devuelve si reparó."""
+    # Reconstruir rutinas (p. ej. batch_alter_table de Alembic en SQLite) borra sus triggers sin avisar:
+    # no alcanza con que exista rutinas_fts, se revisan también los seis triggers
+    existentes = set(
+        connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE '%fts%'")
+        ).scalars()
+    )
+    if existentes.issuperset(("rutinas_fts", *SQLITE_FTS_TRIGGERS)):
+        return False
+    for sentencia in SQLITE_FTS_DDL:
+        connection.exec_driver_sql(sentencia)
+    # Mientras faltaban triggers el índice pudo quedar desactualizado: se rehace completo
+    connection.exec_driver_sql("DELETE FROM rutinas_fts")
+    connection.exec_driver_sql(SQLITE_FTS_BACKFILL)
+    return True
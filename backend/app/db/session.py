@@ -1,17 +1,113 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
+from typing import Any
+
+from sqlalchemy import Engine, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.schema import CreateColumn
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import get_settings # Importa la función para obtener la configuración
+from app.core.metricas import instrumentar_sql
+from app.db import estadisticas
+from app.db.diagnostico import instrumentar_diagnostico
+from app.db.pool import configurar_sqlite, estado_pool, instrumentar_pool, opciones_engine
+from app.db.search import instalar_busqueda_sqlite
+
+# Columnas NOT NULL sin default de servidor agregadas a tablas existentes: SQLite no admite agregarlas así,
+# en la base de docker-compose se agregan nullable y se completan con esta expresión
+RELLENO_COLUMNAS_SQLITE = {("rutinas", "updated_at"): "fecha_creacion"}
+# Tablas calculadas a partir de otras: si create_all las crea en una base con datos, se completan acá
+RELLENO_TABLAS = {
+    ("estadisticas_rutinas_dias", "estadisticas_rutinas", "estadisticas_dias"): estadisticas.reconstruir,
+}
 
 settings = get_settings()
-engine = create_engine(settings.sqlmodel_database_uri, echo=settings.app_debug, future=True)
+engine = create_engine(
+    settings.sqlmodel_database_uri,
+    echo=settings.app_debug,
+    future=True,
+    **opciones_engine(settings, settings.sqlmodel_database_uri),
+)
+
+
+def _configurar_engine(sync_engine: Engine) -> None:
+    if sync_engine.dialect.name == "sqlite":
+        configurar_sqlite(sync_engine, settings)
+    instrumentar_pool(sync_engine)
+    if settings.metrics_enabled:
+        instrumentar_sql(sync_engine)
+    if settings.sql_diagnostics:
+        instrumentar_diagnostico(sync_engine, settings)
+
+
+_configurar_engine(engine)
+
+# El engine async solo se crea en modo DB_ASYNC, así el driver async (p. ej. aiosqlite) es opcional
+async_engine: AsyncEngine | None = None
+if settings.db_async:
+    async_engine = create_async_engine(
+        settings.sqlmodel_async_database_uri,
+        echo=settings.app_debug,
+        **opciones_engine(settings, settings.sqlmodel_async_database_uri, asincrono=True),
+    )
+    _configurar_engine(async_engine.sync_engine)
+
+
+def estado_pools() -> dict[str, Any]:
+    estado = {"sync": estado_pool(engine.pool)}
+    if async_engine is not None:
+        estado["async"] = estado_pool(async_engine.sync_engine.pool)
+    return estado
 
 
 def init_db() -> None:
+    existentes = set(inspect(engine).get_table_names())
     SQLModel.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for tablas, rellenar in RELLENO_TABLAS.items():
+            if not existentes.issuperset(tablas):
+                rellenar(connection)
+    _agregar_columnas_faltantes_sqlite()
+    # create_all no agrega índices nuevos a tablas que ya existían (p. ej. la base SQLite de docker-compose)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    instalar_busqueda_sqlite(engine)
+
+
+def _agregar_columnas_faltantes_sqlite() -> None:
+    # La base SQLite de docker-compose se crea con create_all y no pasa por Alembic:
+    # las columnas nuevas de los modelos (con default o nullable) se agregan acá con ALTER TABLE
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            existentes = {columna["name"] for columna in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existentes:
+                    continue
+                relleno = RELLENO_COLUMNAS_SQLITE.get((table.name, column.name))
+                if relleno is None:
+                    definicion = CreateColumn(column).compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {definicion}")
+                    continue
+                tipo = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {tipo}")
+                connection.exec_driver_sql(f"UPDATE {table.name} SET {column.name} = {relleno}")
 
 
 def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # expire_on_commit=False: tras el commit los objetos conservan sus valores (ids incluidos),
+    # así las respuestas se arman sin volver a consultar la base
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    if async_engine is None:
+        raise RuntimeError("get_async_session requiere DB_ASYNC=true")
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
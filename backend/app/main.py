@@ -5,12 +5,22 @@
 # La función on_startup inicializa la base de datos al iniciar la aplicación.
 # Finalmente, se incluye el router de rutinas para gestionar las operaciones relacionadas con las rutinas de ejercicios.
 
+from typing import Any
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, rutinas # Importa los routers
+from app.api import auth, entrenamientos, rutinas, rutinas_async # Importa los routers
+from app.core.cache_respuestas import metricas_caches
+from app.core.compresion import CompresionMiddleware, opciones_compresion
+from app.core.config import get_settings
+from app.core.metricas import MetricasMiddleware, exponer_metricas
+from app.db.diagnostico import DiagnosticoSQLMiddleware
+from app.db.search import get_backend_busqueda
+from app.db.session import engine, estado_pools, init_db
 
-from app.db.session import init_db
+settings = get_settings()
 
 app = FastAPI(title="Administrador de Rutinas - Gym Tormund")
 
@@ -37,16 +47,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Comprime con gzip/br las respuestas de más de COMPRESSION_MINIMUM_SIZE bytes (listados, export)
+if settings.compression_enabled:
+    app.add_middleware(CompresionMiddleware, **opciones_compresion(settings))
+
+# Solo en desarrollo/staging: avisa en el log cuando un request repite la misma consulta (N+1)
+if settings.sql_diagnostics:
+    app.add_middleware(DiagnosticoSQLMiddleware, umbral_repeticiones=settings.sql_n_plus_one_threshold)
+
+# Se agrega último para quedar por fuera del resto: mide el request completo (compresión incluida)
+if settings.metrics_enabled:
+    app.add_middleware(MetricasMiddleware, server_timing=settings.app_debug)
+
 
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    # Detecta el backend de búsqueda acá y no en el primer request: la detección usa el engine síncrono
+    # y con DB_ASYNC=true ese request la haría dentro de run_sync, bloqueando el event loop
+    get_backend_busqueda(engine)
 
 
 app.include_router(auth.router)
-app.include_router(rutinas.router) # Incluye el router de rutinas en la aplicación
+# /rutinas/stream antes que /rutinas/{rutina_id}
+app.include_router(rutinas.router_stream)
+# Incluye el router de rutinas en la aplicación; con DB_ASYNC=true el CRUD usa los handlers async
+app.include_router(rutinas_async.build_router() if settings.db_async else rutinas.router)
+app.include_router(entrenamientos.router)
 
 
 @app.get("/health", tags=["health"])
 def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/health/db", tags=["health"])
+def health_db() -> dict[str, Any]:
+    # Estado del pool (conexiones en uso/libres) y métricas de checkout/espera desde el arranque
+    return {"status": "ok", "pools": estado_pools()}
+
+
+@app.get("/health/cache", tags=["health"])
+def health_cache() -> dict[str, Any]:
+    # Hits/misses, cargas colapsadas e invalidaciones de las cachés de respuestas
+    return {"status": "ok", "caches": metricas_caches()}
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse, include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    # Formato de texto de Prometheus: latencias por ruta, sentencias SQL y tiempos de bcrypt
+    return PlainTextResponse(exponer_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -14,7 +14,27 @@
 # facilita la escalabilidad del proyecto a medida que se agregan más modelos en el futuro
 
 
-from app.models.rutina import DiaSemana, Ejercicio, Rutina
+from app.models.entrenamiento import SerieRealizada, SesionEntrenamiento
+from app.models.rutina import (
+    DiaSemana,
+    Ejercicio,
+    EstadisticaDia,
+    EstadisticaRutina,
+    EstadisticaRutinaDia,
+    Rutina,
+    RutinaEliminada,
+)
 from app.models.usuario import Usuario
 
-__all__ = ["DiaSemana", "Ejercicio", "Rutina", "Usuario"]
+__all__ = [
+    "DiaSemana",
+    "Ejercicio",
+    "EstadisticaDia",
+    "EstadisticaRutina",
+    "EstadisticaRutinaDia",
+    "Rutina",
+    "RutinaEliminada",
+    "SerieRealizada",
+    "SesionEntrenamiento",
+    "Usuario",
+]
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class SesionEntrenamiento(SQLModel, table=True):
+    # Entrenamiento realizado por un usuario (opcionalmente siguiendo una rutina); solo se agregan filas
+
+    __tablename__ = "sesiones_entrenamiento"  # type: ignore[assignment]
+    __table_args__ = (
+        # Historial de un usuario: rango sobre (usuario_id, performed_at)
+        Index("ix_sesiones_entrenamiento_usuario_id_performed_at", "usuario_id", "performed_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    usuario_id: int = Field(foreign_key="usuarios.id", ondelete="CASCADE")
+    # Referencia sin clave foránea (se valida al registrar): la sesión queda aunque se borre la rutina
+    # y borrar rutinas no tiene que recorrer el historial buscando filas que la apunten
+    rutina_id: int | None = Field(default=None)
+    performed_at: datetime = Field(nullable=False) # Inicio de la sesión (UTC)
+    duracion_minutos: int | None = Field(default=None, ge=0)
+    notas: str | None = Field(default=None, max_length=500)
+
+
+class SerieRealizada(SQLModel, table=True):
+    # Cada serie hecha en una sesión. usuario_id se repite acá para leer el historial de series
+    # de un usuario con un rango sobre su índice, sin pasar por las sesiones
+
+    __tablename__ = "series_realizadas"  # type: ignore[assignment]
+    __table_args__ = (
+        Index("ix_series_realizadas_usuario_id_performed_at", "usuario_id", "performed_at"),
+        # Series de una sesión (y borrado en cascada)
+        Index("ix_series_realizadas_sesion_id", "sesion_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    sesion_id: int = Field(foreign_key="sesiones_entrenamiento.id", ondelete="CASCADE")
+    usuario_id: int = Field(foreign_key="usuarios.id", ondelete="CASCADE")
+    # El ejercicio del plan puede cambiar o borrarse (sin clave foránea, como rutina_id en la sesión):
+    # el nombre se guarda tal como se hizo
+    ejercicio_id: int | None = Field(default=None)
+    nombre: str = Field(max_length=120)
+    numero: int = Field(ge=1) # Posición de la serie dentro de la sesión
+    repeticiones: int = Field(gt=0)
+    peso: float | None = Field(default=None, ge=0)
+    performed_at: datetime = Field(nullable=False)
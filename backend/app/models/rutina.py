@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List
 
-from sqlalchemy import Column, Enum as SqlEnum
+from sqlalchemy import Column, Enum as SqlEnum, Index
 from sqlmodel import Field, Relationship, SQLModel
 
 class DiaSemana(str, Enum):
@@ -18,6 +18,12 @@ class DiaSemana(str, Enum):
 class Rutina(SQLModel, table=True):
     
     __tablename__ = "rutinas"  # type: ignore[assignment]
+    __table_args__ = (
+        # Orden por defecto del listado y posición del cursor: (fecha_creacion, id)
+        Index("ix_rutinas_fecha_creacion_id", "fecha_creacion", "id"),
+        # Feed de cambios: rango (updated_at, id) > token
+        Index("ix_rutinas_updated_at_id", "updated_at", "id"),
+    )
     
     # Definición de las columnas de la tabla rutinas
 
@@ -25,16 +31,41 @@ class Rutina(SQLModel, table=True):
     nombre: str = Field(max_length=120, unique=True, index=True)
     descripcion: str | None = Field(default=None, max_length=500)
     fecha_creacion: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # Se incrementa en cada modificación de la rutina o de sus ejercicios (ETag de las respuestas)
+    version: int = Field(default=1, nullable=False, sa_column_kwargs={"server_default": "1"})
+    # Última modificación de la rutina o de sus ejercicios (GET /rutinas/cambios)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
+    # Sin carga ansiosa por defecto: cada endpoint elige su estrategia en app.db.loading
     ejercicios: List["Ejercicio"] = Relationship(
         back_populates="rutina",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "joined"},
+        passive_deletes=True,
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "lazy": "select"},
+    )
+
+
+class RutinaEliminada(SQLModel, table=True):
+    # Registro de bajas para el feed de cambios: los clientes sincronizados borran estas rutinas
+
+    __tablename__ = "rutinas_eliminadas"  # type: ignore[assignment]
+    __table_args__ = (
+        Index("ix_rutinas_eliminadas_eliminada_at_rutina_id", "eliminada_at", "rutina_id"),
     )
 
+    id: int | None = Field(default=None, primary_key=True)
+    rutina_id: int = Field(nullable=False) # Sin clave foránea: la rutina ya no existe
+    eliminada_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
 
 class Ejercicio(SQLModel, table=True):
     
     __tablename__ = "ejercicios"  # type: ignore[assignment]
+    __table_args__ = (
+        # Carga de ejercicios por rutina (selectinload) y borrado en cascada
+        Index("ix_ejercicios_rutina_id_orden", "rutina_id", "orden"),
+        # Filtro dia_semana del listado (EXISTS por rutina)
+        Index("ix_ejercicios_dia_semana_rutina_id", "dia_semana", "rutina_id"),
+    )
     
     # Definición de las columnas de la tabla ejercicios
     # Incluye una clave foránea que referencia a la tabla rutinas
@@ -52,3 +83,53 @@ class Ejercicio(SQLModel, table=True):
     orden: int = Field(default=1, ge=1)
 
     rutina: "Rutina" = Relationship(back_populates="ejercicios")
+
+
+
+# Rollups del volumen de entrenamiento (GET /rutinas/estadisticas), mantenidos por app.db.estadisticas:
+# cada escritura de rutinas rehace las filas de las rutinas que toca y suma la diferencia a los totales
+# por día de la semana, en la misma transacción
+
+class VolumenEjercicios(SQLModel):
+    ejercicios: int = Field(default=0, nullable=False)
+    series: int = Field(default=0, nullable=False) # Suma de series
+    repeticiones: int = Field(default=0, nullable=False) # Suma de series * repeticiones
+    volumen: float = Field(default=0, nullable=False) # Suma de series * repeticiones * peso (sin peso suma 0)
+
+
+class EstadisticaRutinaDia(VolumenEjercicios, table=True):
+    # Una fila por rutina y día con ejercicios; se borra con la rutina (ON DELETE CASCADE)
+
+    __tablename__ = "estadisticas_rutinas_dias"  # type: ignore[assignment]
+    __table_args__ = (
+        # Ranking de un día: rango por dia_semana ya ordenado por volumen
+        Index("ix_estadisticas_rutinas_dias_dia_semana_volumen", "dia_semana", "volumen", "rutina_id"),
+    )
+
+    rutina_id: int = Field(foreign_key="rutinas.id", ondelete="CASCADE", primary_key=True)
+    dia_semana: DiaSemana = Field(
+        sa_column=Column(SqlEnum(DiaSemana, name="dia_semana_enum", create_constraint=True), primary_key=True),
+    )
+
+
+class EstadisticaRutina(VolumenEjercicios, table=True):
+    # Totales de cada rutina con ejercicios
+
+    __tablename__ = "estadisticas_rutinas"  # type: ignore[assignment]
+    __table_args__ = (
+        # Ranking general: las primeras filas del índice, sin agrupar
+        Index("ix_estadisticas_rutinas_volumen", "volumen", "rutina_id"),
+    )
+
+    rutina_id: int = Field(foreign_key="rutinas.id", ondelete="CASCADE", primary_key=True)
+
+
+class EstadisticaDia(VolumenEjercicios, table=True):
+    # Distribución semanal de todo el catálogo: siempre 7 filas, una por día
+
+    __tablename__ = "estadisticas_dias"  # type: ignore[assignment]
+
+    dia_semana: DiaSemana = Field(
+        sa_column=Column(SqlEnum(DiaSemana, name="dia_semana_enum", create_constraint=True), primary_key=True),
+    )
+    rutinas: int = Field(default=0, nullable=False) # Rutinas con ejercicios ese día
@@ -11,3 +11,5 @@ class Usuario(SQLModel, table=True):
     email: str = Field(max_length=255, unique=True, index=True)
     password_hash: str = Field(max_length=255)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # Se incrementa para invalidar todos los tokens emitidos antes (claim "ver" del JWT)
+    token_version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
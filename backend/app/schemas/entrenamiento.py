@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+MAX_SERIES_SESION = 500 # Series por request de POST /entrenamientos/sesiones
+DEFAULT_PAGE_SIZE_HISTORIAL = 20
+MAX_PAGE_SIZE_HISTORIAL = 200
+
+
+def fecha_utc(valor: Optional[datetime]) -> Optional[datetime]:
+    # La base guarda fechas UTC sin zona horaria (como fecha_creacion de las rutinas)
+    if valor is None or valor.tzinfo is None:
+        return valor
+    return valor.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class SerieCreate(BaseModel):
+    ejercicio_id: Optional[int] = None # Ejercicio de la rutina, si la serie sigue un plan
+    nombre: Optional[str] = Field(default=None, max_length=120) # Obligatorio sin ejercicio_id
+    repeticiones: int = Field(..., gt=0, le=1000)
+    peso: Optional[float] = Field(default=None, ge=0)
+    performed_at: Optional[datetime] = None # Por defecto, el inicio de la sesión
+
+    _normalizar_fecha = field_validator("performed_at")(fecha_utc)
+
+    @model_validator(mode="after")
+    def _validar_nombre(self) -> "SerieCreate":
+        if self.ejercicio_id is None and not self.nombre:
+            raise ValueError("Cada serie necesita ejercicio_id o nombre")
+        return self
+
+
+class SesionCreate(BaseModel):
+    # Sesión completa con todas sus series: se registra en un solo request
+    performed_at: datetime = Field(default_factory=datetime.utcnow)
+    rutina_id: Optional[int] = None
+    duracion_minutos: Optional[int] = Field(default=None, ge=0, le=24 * 60)
+    notas: Optional[str] = Field(default=None, max_length=500)
+    series: List[SerieCreate] = Field(..., min_length=1, max_length=MAX_SERIES_SESION)
+
+    _normalizar_fecha = field_validator("performed_at")(fecha_utc)
+
+
+class SesionCreada(BaseModel):
+    id: int
+    series_registradas: int
+
+
+class SerieRead(BaseModel):
+    id: int
+    sesion_id: int
+    ejercicio_id: Optional[int] = None
+    nombre: str
+    numero: int
+    repeticiones: int
+    peso: Optional[float] = None
+    performed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SesionRead(BaseModel):
+    id: int
+    performed_at: datetime
+    rutina_id: Optional[int] = None
+    duracion_minutos: Optional[int] = None
+    notas: Optional[str] = None
+    series: List[SerieRead] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
+
+
+class SesionesPaginadas(BaseModel):
+    items: List[SesionRead] # De la más reciente a la más antigua
+    next_cursor: Optional[str] = None # Cursor para pedir la página siguiente (None si no hay más)
+
+
+class SeriesPaginadas(BaseModel):
+    items: List[SerieRead] # De la más reciente a la más antigua
+    next_cursor: Optional[str] = None
@@ -11,9 +11,11 @@
 # asegurando que los datos cumplan con las reglas definidas antes de ser procesados o almacenados
 
 from datetime import datetime
+from enum import Enum
+from string import Formatter
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.models import DiaSemana
 
@@ -42,6 +44,11 @@ class EjercicioRead(EjercicioBase):
         from_attributes = True # Permite crear instancias desde objetos ORM
 
 
+class EjercicioUpsert(EjercicioBase):
+    # En PUT /rutinas/{id}: con id actualiza ese ejercicio; sin id se busca por (dia_semana, orden)
+    id: Optional[int] = None
+
+
 class EjercicioUpdate(BaseModel):
     nombre: Optional[str] = Field(default=None, max_length=120)
     dia_semana: Optional[DiaSemana] = None
@@ -73,20 +80,147 @@ class RutinaRead(RutinaBase):
 class RutinaUpdate(BaseModel):
     nombre: Optional[str] = Field(default=None, max_length=120)
     descripcion: Optional[str] = Field(default=None, max_length=500)
-    ejercicios: Optional[List[EjercicioCreate]] = None
+    ejercicios: Optional[List[EjercicioUpsert]] = None
 
 
 class RutinaSearchResponse(BaseModel):
     resultados: List[RutinaRead]
 
 
+MAX_RUTINAS_BATCH = 100 # Ids por request de GET /rutinas/batch
+
+
+class RutinaBatchResponse(BaseModel):
+    resultados: List[RutinaRead] # En el orden en que se pidieron los ids
+    faltantes: List[int] # Ids pedidos que no existen
+
+
+MAX_CAMBIOS = 500 # Cambios por página de GET /rutinas/cambios
+
+
+class RutinaCambiosResponse(BaseModel):
+    # Cada id aparece una sola vez por página, con su último cambio: en actualizadas o en eliminadas
+    actualizadas: List[RutinaRead] # Creadas o modificadas después del token
+    eliminadas: List[int] # Ids borrados después del token
+    next_token: str # Valor de since para el próximo pedido
+    hay_mas: bool # True si quedan cambios pendientes: pedir enseguida con next_token
+
+
 class RutinaDuplicatePayload(BaseModel):
     nuevo_nombre: str = Field(..., max_length=120)
 
 
-class RutinaPaginatedResponse(BaseModel):
-    items: List[RutinaRead]
-    total: int
+MAX_COPIAS_LOTE = 1000 # Rutinas nuevas por request de duplicación en lote
+
+
+class RutinaDuplicateBatchPayload(BaseModel):
+    # Clona cada rutina de rutina_ids `copias` veces; los nombres salen de nombre_patron,
+    # donde {nombre} es el nombre de la original y {n} el número de copia (1..copias)
+    rutina_ids: List[int] = Field(..., min_length=1, max_length=MAX_COPIAS_LOTE)
+    copias: int = Field(default=1, ge=1, le=MAX_COPIAS_LOTE)
+    nombre_patron: str = Field(default="{nombre} (copia {n})", min_length=1, max_length=120)
+
+    @model_validator(mode="after")
+    def _validar_lote(self) -> "RutinaDuplicateBatchPayload":
+        if len(set(self.rutina_ids)) != len(self.rutina_ids):
+            raise ValueError("rutina_ids tiene ids repetidos")
+        if len(self.rutina_ids) * self.copias > MAX_COPIAS_LOTE:
+            raise ValueError(f"Se pueden crear hasta {MAX_COPIAS_LOTE} rutinas por request")
+        campos: set[str] = set()
+        for _, campo, formato, conversion in Formatter().parse(self.nombre_patron):
+            if campo is None:
+                continue
+            if campo not in {"nombre", "n"} or formato or conversion:
+                raise ValueError("nombre_patron solo admite los campos {nombre} y {n}, sin formato")
+            campos.add(campo)
+        # Los nombres de rutina son únicos: el patrón tiene que distinguir cada copia
+        if self.copias > 1 and "n" not in campos:
+            raise ValueError("Con más de una copia nombre_patron debe incluir {n}")
+        if len(self.rutina_ids) > 1 and "nombre" not in campos:
+            raise ValueError("Con varias rutinas nombre_patron debe incluir {nombre}")
+        return self
+
+
+class RutinaDuplicateBatchResponse(BaseModel):
+    ids: List[int] # Ids de las rutinas creadas, en orden ascendente
+    rutinas_creadas: int
+    ejercicios_creados: int
+
+
+class CountMode(str, Enum):
+    EXACT = "exact" # COUNT(*) real (reutiliza la caché mientras no haya escrituras)
+    ESTIMATED = "estimated" # Aproximación barata a partir de estadísticas de la base
+    NONE = "none" # No calcula el total (scroll infinito con next_cursor)
+
+
+class RutinaResumen(RutinaBase):
+    # Proyección liviana para las tarjetas del listado: sin el detalle de ejercicios
+    id: int
+    fecha_creacion: datetime
+    cantidad_ejercicios: int = Field(ge=0)
+    dias: List[DiaSemana] = Field(default_factory=list) # Días con al menos un ejercicio, en orden semanal
+
+
+class PaginacionBase(BaseModel):
+    total: Optional[int] = None # None cuando count=none
     page: int = Field(ge=1)
     page_size: int = Field(ge=1)
-    total_pages: int = Field(ge=0)
\ No newline at end of file
+    total_pages: Optional[int] = Field(default=None, ge=0)
+    total_estimado: bool = False # True si total es una aproximación
+    next_cursor: Optional[str] = None # Cursor para pedir la página siguiente (None si no hay más)
+
+
+class RutinaPaginatedResponse(PaginacionBase):
+    items: List[RutinaRead]
+
+
+class RutinaResumenPaginatedResponse(PaginacionBase):
+    items: List[RutinaResumen]
+
+
+class FormatoCatalogo(str, Enum):
+    NDJSON = "ndjson" # Una rutina JSON por línea
+    CSV = "csv" # Una fila por ejercicio (ver app.db.catalogo.COLUMNAS_CSV)
+
+
+class ErrorImportacion(BaseModel):
+    linea: int # Línea del archivo donde empieza la rutina con error
+    nombre: Optional[str] = None
+    detalle: str
+
+
+class RutinaImportResponse(BaseModel):
+    importadas: int
+    total_errores: int
+    errores: List[ErrorImportacion] # Los primeros errores (hasta MAX_ERRORES_REPORTADOS)
+
+
+DEFAULT_RUTINAS_ESTADISTICAS = 10
+MAX_RUTINAS_ESTADISTICAS = 100 # Rutinas del ranking de GET /rutinas/estadisticas
+
+
+class VolumenBase(BaseModel):
+    ejercicios: int = 0
+    series: int = 0 # Suma de series
+    repeticiones: int = 0 # Suma de series * repeticiones
+    volumen: float = 0 # Suma de series * repeticiones * peso (los ejercicios sin peso suman 0)
+
+
+class VolumenDia(VolumenBase):
+    dia_semana: DiaSemana
+
+
+class VolumenSemanal(VolumenDia):
+    rutinas: int = 0 # Rutinas con ejercicios ese día
+
+
+class VolumenRutina(VolumenBase):
+    rutina_id: int
+    nombre: str
+    por_dia: List[VolumenDia] # Solo los días con ejercicios, en orden semanal
+
+
+class RutinaEstadisticasResponse(BaseModel):
+    totales: VolumenBase # Todo el catálogo
+    por_dia: List[VolumenSemanal] # Distribución semanal del catálogo: los 7 días, de lunes a domingo
+    rutinas: List[VolumenRutina] # Rutinas de mayor volumen total (o de ese día, si se filtra por dia_semana)
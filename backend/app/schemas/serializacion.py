@@ -0,0 +1,135 @@
+# este archivo arma el JSON de las respuestas de rutinas directamente desde los objetos ORM
+# con response_model, FastAPI valida cada rutina y cada ejercicio contra RutinaRead/EjercicioRead,
+# los vuelve a convertir a dicts y recién ahí los pasa a json.dumps
+# acá los datos se copian a dicts con las mismas claves (y el mismo orden) que esos esquemas
+# y pydantic-core los serializa a bytes en un solo paso, sin instanciar ni revalidar modelos:
+# los valores ya vienen de la base, que solo guarda datos validados al escribirlos
+# se usa con FAST_JSON_RESPONSES=true; el JSON resultante es el mismo que con response_model
+# también arma las respuestas parciales de ?fields= (SeleccionCampos), que no encajan en RutinaRead
+
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.models import Ejercicio, Rutina
+from app.schemas.rutina import EjercicioRead, PaginacionBase, RutinaRead
+
+# Campos en el orden de los esquemas de lectura; se toman de los modelos para no desincronizarse
+CAMPOS_EJERCICIO = tuple(EjercicioRead.model_fields)
+CAMPOS_RUTINA = tuple(campo for campo in RutinaRead.model_fields if campo != "ejercicios")
+CAMPOS_PAGINACION = tuple(PaginacionBase.model_fields)
+CAMPOS_SELECCIONABLES = frozenset({*CAMPOS_RUTINA, "ejercicios", *(f"ejercicios.{campo}" for campo in CAMPOS_EJERCICIO)})
+
+# Serializador sin esquema de validación: convierte datetime, Enum y None según su tipo
+_json: TypeAdapter[Any] = TypeAdapter(Any)
+
+
+@dataclass(frozen=True)
+class SeleccionCampos:
+    # Campos pedidos con ?fields=, en el orden de los esquemas de lectura
+    rutina: tuple[str, ...]
+    ejercicio: tuple[str, ...] | None # None: la respuesta no incluye ejercicios
+
+    @property
+    def clave(self) -> str:
+        # Forma canónica (distingue representaciones en el ETag)
+        ejercicios = () if self.ejercicio is None else ("ejercicios", *(f"ejercicios.{c}" for c in self.ejercicio))
+        return ",".join((*self.rutina, *ejercicios))
+
+
+def parsear_campos(valor: str) -> SeleccionCampos:
+    # "nombre,ejercicios.nombre": campos de la rutina y, con el prefijo ejercicios., de cada ejercicio;
+    # "ejercicios" solo incluye los ejercicios completos
+    pedidos = {parte.strip() for parte in valor.split(",") if parte.strip()}
+    if not pedidos:
+        raise ValueError("fields no puede estar vacío")
+    desconocidos = sorted(pedidos - CAMPOS_SELECCIONABLES)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos en fields: {', '.join(desconocidos)}")
+
+    ejercicio: tuple[str, ...] | None = None
+    if "ejercicios" in pedidos:
+        ejercicio = CAMPOS_EJERCICIO
+    elif any(campo.startswith("ejercicios.") for campo in pedidos):
+        ejercicio = tuple(campo for campo in CAMPOS_EJERCICIO if f"ejercicios.{campo}" in pedidos)
+    return SeleccionCampos(rutina=tuple(campo for campo in CAMPOS_RUTINA if campo in pedidos), ejercicio=ejercicio)
+
+
+def _atributos(objeto: Any, campos: tuple[str, ...]) -> dict[str, Any]:
+    # Las columnas cargadas están en el __dict__ de la instancia: leerlas de ahí evita el descriptor
+    # del ORM por atributo, que es lo más caro de armar la respuesta
+    valores = objeto.__dict__
+    try:
+        return {campo: valores[campo] for campo in campos}
+    except KeyError:
+        # Algún atributo expirado o diferido: que lo cargue el ORM
+        return {campo: getattr(objeto, campo) for campo in campos}
+
+
+def ejercicio_a_dict(ejercicio: Ejercicio) -> dict[str, Any]:
+    return _atributos(ejercicio, CAMPOS_EJERCICIO)
+
+
+def rutina_a_dict(rutina: Rutina, seleccion: SeleccionCampos | None = None) -> dict[str, Any]:
+    # Requiere los ejercicios ya cargados (rutina_con_ejercicios) salvo que la selección los excluya
+    datos = _atributos(rutina, CAMPOS_RUTINA if seleccion is None else seleccion.rutina)
+    campos_ejercicio = CAMPOS_EJERCICIO if seleccion is None else seleccion.ejercicio
+    if campos_ejercicio is not None:
+        datos["ejercicios"] = [_atributos(ejercicio, campos_ejercicio) for ejercicio in rutina.ejercicios]
+    return datos
+
+
+def rutina_json(rutina: Rutina, seleccion: SeleccionCampos | None = None) -> bytes:
+    return _json.dump_json(rutina_a_dict(rutina, seleccion))
+
+
+def recortar_rutina_json(cuerpo: bytes, seleccion: SeleccionCampos) -> bytes:
+    # Parte de la representación completa (p. ej. la guardada en la caché de respuestas)
+    datos = json.loads(cuerpo)
+    parcial = {campo: datos[campo] for campo in seleccion.rutina}
+    if seleccion.ejercicio is not None:
+        parcial["ejercicios"] = [
+            {campo: ejercicio[campo] for campo in seleccion.ejercicio} for ejercicio in datos["ejercicios"]
+        ]
+    return _json.dump_json(parcial)
+
+
+def listado_json(
+    rutinas: Sequence[Rutina],
+    metadatos: dict[str, Any],
+    seleccion: SeleccionCampos | None = None,
+) -> bytes:
+    # metadatos: los campos de PaginacionBase (total, page, ..., next_cursor)
+    datos = {campo: metadatos.get(campo) for campo in CAMPOS_PAGINACION}
+    datos["items"] = [rutina_a_dict(rutina, seleccion) for rutina in rutinas]
+    return _json.dump_json(datos)
+
+
+def busqueda_json(rutinas: Sequence[Rutina]) -> bytes:
+    return _json.dump_json({"resultados": [rutina_a_dict(rutina) for rutina in rutinas]})
+
+
+def batch_json(rutinas: Sequence[Rutina], faltantes: Sequence[int], seleccion: SeleccionCampos | None = None) -> bytes:
+    return _json.dump_json(
+        {"resultados": [rutina_a_dict(rutina, seleccion) for rutina in rutinas], "faltantes": list(faltantes)}
+    )
+
+
+def cambios_json(
+    rutinas: Sequence[Rutina],
+    eliminadas: Sequence[int],
+    next_token: str,
+    hay_mas: bool,
+    seleccion: SeleccionCampos | None = None,
+) -> bytes:
+    return _json.dump_json(
+        {
+            "actualizadas": [rutina_a_dict(rutina, seleccion) for rutina in rutinas],
+            "eliminadas": list(eliminadas),
+            "next_token": next_token,
+            "hay_mas": hay_mas,
+        }
+    )
@@ -33,3 +33,4 @@ class Token(BaseModel):
 class TokenPayload(BaseModel):
     sub: int | None = None
     exp: int | None = None
+    ver: int = 0 # Versión de token del usuario al emitirlo; los tokens viejos sin claim valen como 0
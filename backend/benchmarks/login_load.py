@@ -0,0 +1,125 @@
+# este script mide cuánto se degrada la latencia de GET /rutinas durante una ráfaga de logins
+# compara dos variantes del login sobre la misma app y la misma base SQLite temporal:
+# - "bloqueante": bcrypt síncrono dentro de un handler def (como era antes), ocupa hilos del threadpool
+# - "pool acotado": POST /auth/login actual, bcrypt en el executor propio de app.core.security
+#
+# uso (desde la carpeta backend):
+#   python -m benchmarks.login_load --logins 60 --lecturas 200
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+_tmpdir = tempfile.mkdtemp(prefix="gym-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'login.db')}"
+os.environ["APP_DEBUG"] = "0"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
+
+import httpx  # noqa: E402
+from fastapi import Depends, HTTPException, status  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.core.security import create_access_token, verify_password  # noqa: E402
+from app.db.session import get_session, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Usuario  # noqa: E402
+from app.schemas.usuario import Token, UsuarioLogin  # noqa: E402
+
+
+@app.post("/_bench/login-bloqueante", response_model=Token, include_in_schema=False)
+def _login_bloqueante(payload: UsuarioLogin, session: Session = Depends(get_session)) -> Token:
+    # Réplica del login original: bcrypt corre dentro del hilo del threadpool que atiende el request.
+    # Se libera la conexión antes de bcrypt para medir solo el efecto sobre el threadpool
+    # (el original además retenía la conexión y agotaba el pool del engine).
+    usuario = session.exec(select(Usuario).where(Usuario.email == payload.email)).first()
+    session.close()
+    if not usuario or not verify_password(payload.password, usuario.password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
+    return Token(access_token=create_access_token(usuario.id, usuario.token_version))
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+async def _lecturas(client: httpx.AsyncClient, cantidad: int, concurrencia: int) -> list[float]:
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias: list[float] = []
+
+    async def _una() -> None:
+        async with semaforo:
+            inicio = time.perf_counter()
+            respuesta = await client.get("/rutinas/", params={"count": "none"})
+            respuesta.raise_for_status()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    await asyncio.gather(*(_una() for _ in range(cantidad)))
+    return latencias
+
+
+async def _escenario(
+    client: httpx.AsyncClient,
+    ruta_login: str | None,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    credenciales = {"email": "bench@gym.com", "password": "bench123"}
+    logins: list[asyncio.Task[httpx.Response]] = []
+    inicio_logins = time.perf_counter()
+    if ruta_login:
+        logins = [asyncio.create_task(client.post(ruta_login, json=credenciales)) for _ in range(args.logins)]
+        await asyncio.sleep(0.05)  # las lecturas arrancan con la ráfaga ya en curso
+
+    latencias = await _lecturas(client, args.lecturas, args.concurrencia)
+    respuestas = await asyncio.gather(*logins)
+    duracion_logins = time.perf_counter() - inicio_logins
+    assert all(r.status_code == 200 for r in respuestas)
+
+    return {
+        "p50": statistics.median(latencias),
+        "p95": _percentil(latencias, 95),
+        "max": max(latencias),
+        "logins_por_segundo": (len(respuestas) / duracion_logins) if respuestas else None,
+    }
+
+
+async def _main(args: argparse.Namespace) -> int:
+    init_db()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/auth/register", json={"nombre": "bench", "email": "bench@gym.com", "password": "bench123"})
+        token = (await client.post("/auth/login", json={"email": "bench@gym.com", "password": "bench123"})).json()
+        client.headers["Authorization"] = f"Bearer {token['access_token']}"
+        for i in range(20):
+            await client.post("/rutinas/", json={"nombre": f"Rutina {i}", "ejercicios": []})
+
+        resultados = {
+            "sin logins": await _escenario(client, None, args),
+            "login bloqueante": await _escenario(client, "/_bench/login-bloqueante", args),
+            "login con pool acotado": await _escenario(client, "/auth/login", args),
+        }
+
+    print(f"{args.logins} logins concurrentes, {args.lecturas} GET /rutinas (concurrencia {args.concurrencia})")
+    print(f"{'escenario':<24} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'logins/s':>9}")
+    for nombre, r in resultados.items():
+        logins_s = f"{r['logins_por_segundo']:.1f}" if r["logins_por_segundo"] else "-"
+        print(f"{nombre:<24} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['max']:>8.1f} {logins_s:>9}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latencia de /rutinas durante una ráfaga de logins")
+    parser.add_argument("--logins", type=int, default=60, help="Logins concurrentes de la ráfaga")
+    parser.add_argument("--lecturas", type=int, default=200, help="Cantidad de GET /rutinas medidos")
+    parser.add_argument("--concurrencia", type=int, default=10, help="GET /rutinas en paralelo")
+    return asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
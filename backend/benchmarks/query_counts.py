@@ -0,0 +1,221 @@
+# este script fija cuántas sentencias SQL ejecuta cada endpoint de rutinas
+# levanta la app contra una base SQLite temporal, ejecuta cada operación y compara
+# la cantidad de sentencias con el presupuesto definido en PRESUPUESTOS
+# si algún endpoint se pasa del presupuesto o repite un mismo SELECT UMBRAL_N_MAS_1 veces o más (N+1)
+# termina con código 1 (sirve como chequeo de regresión); tests/test_query_counts.py corre los mismos
+# escenarios dentro de pytest
+#
+# uso (desde la carpeta backend):
+#   python -m benchmarks.query_counts
+#   python -m pytest tests/test_query_counts.py
+
+import json
+import os
+import sys
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+_tmpdir = tempfile.mkdtemp(prefix="gym-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+os.environ["APP_DEBUG"] = "0"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.db.diagnostico import detectar_repetidas  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+# Sentencias permitidas por request (el usuario autenticado sale de la caché de deps, sin consulta).
+# Las rutinas de prueba tienen 3 ejercicios; en SQLite el ORM inserta los ejercicios de a uno al crear, y
+# también el PUT: su INSERT ... RETURNING pide las filas en el orden enviado (sort_by_parameter_order) y
+# SQLite no lo garantiza en un INSERT multi-fila (en PostgreSQL es uno solo). Duplicar copia todo con
+# INSERT ... SELECT.
+# Toda escritura que cambia una rutina o sus ejercicios incrementa rutinas.version (un UPDATE más)
+# y cada borrado deja su baja en rutinas_eliminadas (un INSERT más).
+# Si cambian los ejercicios se rehacen sus rollups (app.db.estadisticas): DELETE ... RETURNING de las filas
+# por día y de los totales, INSERT ... SELECT ... RETURNING, INSERT de los totales y un UPDATE executemany
+# de estadisticas_dias (en rutinas nuevas o copiadas no hay DELETE; al eliminar solo DELETE + UPDATE).
+# Con 20 rutinas de 3 ejercicios, una relación cargada por fila repite su SELECT 3 veces o más
+UMBRAL_N_MAS_1 = 3
+
+PRESUPUESTOS: dict[str, int] = {
+    "listar": 3,
+    "listar_total_en_cache": 2,
+    "listar_por_dia": 3,
+    "listar_resumen": 1,
+    "buscar": 2,
+    "obtener": 2,
+    "obtener_en_cache": 0,
+    "obtener_lote": 2,
+    "cambios": 3,
+    "estadisticas": 3,
+    "crear": 7,
+    "actualizar_datos": 3,
+    "actualizar_ejercicios_sin_cambios": 2,
+    "actualizar_un_peso": 9,
+    "reemplazar_ejercicios": 12,
+    "patch_ejercicio": 8,
+    "patch_ejercicio_sin_cambios": 1,
+    "eliminar": 5,
+    "duplicar": 5,
+    "duplicar_lote": 6,
+    "importar": 6,
+    "exportar": 2,
+    "registrar_sesion": 4,
+    "historial_sesiones": 2,
+    "historial_series": 1,
+}
+
+
+def _ejercicio(nombre: str, dia: str, orden: int) -> dict[str, Any]:
+    return {"nombre": nombre, "dia_semana": dia, "series": 4, "repeticiones": 10, "peso": 40, "orden": orden}
+
+
+def _rutina(nombre: str) -> dict[str, Any]:
+    return {
+        "nombre": nombre,
+        "descripcion": "rutina de prueba",
+        "ejercicios": [_ejercicio(f"Ejercicio {i}", dia, i) for i, dia in enumerate(["lunes", "miercoles", "viernes"], 1)],
+    }
+
+
+def _ejercicios_con_peso(peso: float) -> list[dict[str, Any]]:
+    ejercicios = _rutina("x")["ejercicios"]
+    ejercicios[1]["peso"] = peso
+    return ejercicios
+
+
+def _ejercicios_nuevos() -> list[dict[str, Any]]:
+    # Otros días: no se empareja ninguno, se borran los 3 existentes y se insertan 3
+    return [_ejercicio(f"Nuevo {i}", dia, i) for i, dia in enumerate(["martes", "jueves", "sabado"], 1)]
+
+
+def _sesion(rutina_id: int, ejercicio_id: int) -> dict[str, Any]:
+    return {
+        "rutina_id": rutina_id,
+        "series": [
+            *({"ejercicio_id": ejercicio_id, "repeticiones": 8, "peso": 60 + i} for i in range(5)),
+            *({"nombre": "Plancha", "repeticiones": 1} for _ in range(3)),
+        ],
+    }
+
+
+def _ndjson(cantidad: int) -> bytes:
+    return "".join(json.dumps(_rutina(f"Importada {i}")) + "\n" for i in range(cantidad)).encode("utf-8")
+
+
+@dataclass
+class ResultadoEscenario:
+    nombre: str
+    status_code: int
+    sentencias: list[str]
+    presupuesto: int
+    repetidas: list[tuple[str, int]]
+
+    @property
+    def excedido(self) -> bool:
+        return len(self.sentencias) > self.presupuesto
+
+
+def medir_escenarios() -> list[ResultadoEscenario]:
+    """Ejecuta cada escenario contra la app y devuelve sus sentencias (también lo usa tests/test_query_counts)."""
+    sentencias: list[str] = []
+
+    def _registrar(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        sentencias.append(statement)
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"nombre": "bench", "email": "bench@gym.com", "password": "bench123"})
+        token = client.post("/auth/login", json={"email": "bench@gym.com", "password": "bench123"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        for i in range(20):
+            client.post("/rutinas/", json=_rutina(f"Semilla {i}"))
+
+        ejercicio_id = client.get("/rutinas/1").json()["ejercicios"][0]["id"]
+        token_cambios = client.get("/rutinas/cambios", params={"limit": 10}).json()["next_token"]
+
+        # (nombre, preparación que no se cuenta, operación medida)
+        escenarios: list[tuple[str, Callable[[], Any] | None, Callable[[], Any]]] = [
+            # la creación previa invalida la caché de totales para medir el conteo en frío
+            ("listar", lambda: client.post("/rutinas/", json=_rutina("Invalida cache")), lambda: client.get("/rutinas/")),
+            ("listar_total_en_cache", None, lambda: client.get("/rutinas/")),
+            ("listar_por_dia", None, lambda: client.get("/rutinas/", params={"dia_semana": "lunes"})),
+            ("listar_resumen", None, lambda: client.get("/rutinas/resumen")),
+            # la primera búsqueda detecta el backend del motor (una sola vez por proceso)
+            ("buscar", lambda: client.get("/rutinas/buscar", params={"q": "x"}), lambda: client.get("/rutinas/buscar", params={"q": "ejercicio"})),
+            # /rutinas/1 ya quedó en la caché de respuestas al leer ejercicio_id: se mide una rutina no leída
+            ("obtener", None, lambda: client.get("/rutinas/4")),
+            ("obtener_en_cache", None, lambda: client.get("/rutinas/4")),
+            # rutinas + ejercicios de todas, sin importar cuántos ids se pidan (999 no existe)
+            ("obtener_lote", None, lambda: client.get("/rutinas/batch", params={"ids": "9,5,999,6,7,8"})),
+            # rutinas modificadas + sus ejercicios + bajas posteriores al token
+            ("cambios", None, lambda: client.get("/rutinas/cambios", params={"since": token_cambios})),
+            # distribución semanal (7 filas) + ranking por índice + detalle por día del ranking
+            ("estadisticas", None, lambda: client.get("/rutinas/estadisticas")),
+            ("crear", None, lambda: client.post("/rutinas/", json=_rutina("Nueva"))),
+            ("actualizar_datos", None, lambda: client.put("/rutinas/2", json={"descripcion": "otra"})),
+            ("actualizar_ejercicios_sin_cambios", None, lambda: client.put("/rutinas/2", json={"ejercicios": _rutina("x")["ejercicios"]})),
+            ("actualizar_un_peso", None, lambda: client.put("/rutinas/2", json={"ejercicios": _ejercicios_con_peso(60)})),
+            ("reemplazar_ejercicios", None, lambda: client.put("/rutinas/2", json={"ejercicios": _ejercicios_nuevos()})),
+            ("patch_ejercicio", None, lambda: client.patch(f"/rutinas/1/ejercicios/{ejercicio_id}", json={"peso": 55})),
+            # el mismo valor otra vez: solo el SELECT del ejercicio, sin UPDATE de la versión
+            ("patch_ejercicio_sin_cambios", None, lambda: client.patch(f"/rutinas/1/ejercicios/{ejercicio_id}", json={"peso": 55})),
+            ("eliminar", None, lambda: client.delete("/rutinas/3")),
+            ("duplicar", None, lambda: client.post("/rutinas/1/duplicar", json={"nuevo_nombre": "Copia"})),
+            ("importar", None, lambda: client.post("/rutinas/import", content=_ndjson(100), headers={"content-type": "application/x-ndjson"})),
+            # un solo bloque de exportación: rutinas + ejercicios
+            ("exportar", None, lambda: client.get("/rutinas/export")),
+            ("duplicar_lote", None, lambda: client.post("/rutinas/duplicar-lote", json={"rutina_ids": [4, 5, 6], "copias": 10})),
+            # validar ejercicios + validar rutina + INSERT de la sesión + un executemany con todas las series
+            ("registrar_sesion", None, lambda: client.post("/entrenamientos/sesiones", json=_sesion(1, ejercicio_id))),
+            # sesiones de la página + series de todas ellas
+            ("historial_sesiones", lambda: [client.post("/entrenamientos/sesiones", json=_sesion(1, ejercicio_id)) for _ in range(5)], lambda: client.get("/entrenamientos/sesiones")),
+            ("historial_series", None, lambda: client.get("/entrenamientos/series", params={"ejercicio_id": ejercicio_id})),
+        ]
+
+        resultados: list[ResultadoEscenario] = []
+        event.listen(engine, "before_cursor_execute", _registrar)
+        try:
+            for nombre, preparar, accion in escenarios:
+                if preparar is not None:
+                    preparar()
+                sentencias.clear()
+                respuesta = accion()
+                resultados.append(
+                    ResultadoEscenario(
+                        nombre=nombre,
+                        status_code=respuesta.status_code,
+                        sentencias=list(sentencias),
+                        presupuesto=PRESUPUESTOS[nombre],
+                        repetidas=detectar_repetidas(sentencias, UMBRAL_N_MAS_1),
+                    )
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", _registrar)
+    return resultados
+
+
+def main() -> int:
+    excedidos = 0
+    for resultado in medir_escenarios():
+        cantidad = len(resultado.sentencias)
+        estado = "EXCEDIDO" if resultado.excedido else "N+1" if resultado.repetidas else "ok"
+        excedidos += resultado.excedido or bool(resultado.repetidas)
+        print(
+            f"{resultado.nombre:<24} {resultado.status_code}  sentencias={cantidad:<3} "
+            f"presupuesto={resultado.presupuesto:<3} {estado}"
+        )
+        if resultado.excedido:
+            for sql in resultado.sentencias:
+                print(f"    {' '.join(sql.split())[:160]}")
+        for huella, veces in resultado.repetidas:
+            print(f"    {veces}x {huella[:160]}")
+    return 1 if excedidos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
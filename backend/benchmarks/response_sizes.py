@@ -0,0 +1,107 @@
+# este script mide los bytes que viajan por la red en los listados de rutinas
+# compara la respuesta completa sin comprimir con gzip/br (si está instalado brotli) y con
+# selecciones de campos (?fields=), sobre rutinas con notas largas en cada ejercicio
+# los bytes son los del cuerpo tal como sale del servidor (antes de que el cliente lo descomprima)
+#
+# uso (desde la carpeta backend):
+#   python -m benchmarks.response_sizes --rutinas 200 --ejercicios 8 --page-size 50
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gym-bench-'), 'sizes.db')}"
+os.environ["APP_DEBUG"] = "0"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.compresion import brotli_disponible  # noqa: E402
+from app.main import app  # noqa: E402
+
+PALABRAS = (
+    "controlar la bajada mantener la espalda neutra respirar al subir pausa de dos segundos abajo "
+    "rango completo sin rebotar codos pegados al cuerpo apretar gluteos al final empujar con los talones "
+    "hombros atras mirada al frente subir el peso si sobran repeticiones descanso noventa segundos"
+).split()
+DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+
+def _notas(generador: random.Random) -> str:
+    texto = " ".join(generador.choice(PALABRAS) for _ in range(120))
+    return texto[:500]
+
+
+def _rutina(generador: random.Random, i: int, ejercicios: int) -> dict[str, Any]:
+    return {
+        "nombre": f"Rutina {i}",
+        "descripcion": _notas(generador)[:200],
+        "ejercicios": [
+            {
+                "nombre": f"Ejercicio {j}",
+                "dia_semana": DIAS[j % len(DIAS)],
+                "series": generador.randint(2, 5),
+                "repeticiones": generador.randint(6, 15),
+                "peso": round(generador.uniform(10, 120), 1),
+                "notas": _notas(generador),
+                "orden": j,
+            }
+            for j in range(1, ejercicios + 1)
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bytes de los listados de rutinas con compresión y fields")
+    parser.add_argument("--rutinas", type=int, default=200, help="Rutinas a generar")
+    parser.add_argument("--ejercicios", type=int, default=8, help="Ejercicios por rutina (cada uno con 500 caracteres de notas)")
+    parser.add_argument("--page-size", type=int, default=50, help="Rutinas por página del listado")
+    args = parser.parse_args()
+
+    generador = random.Random(17)
+    codificaciones = ["identity", "gzip", *(["br"] if brotli_disponible() else [])]
+    selecciones: dict[str, str | None] = {
+        "completo": None,
+        "sin notas": "id,nombre,descripcion,fecha_creacion,ejercicios.nombre,ejercicios.dia_semana,"
+        "ejercicios.series,ejercicios.repeticiones,ejercicios.peso,ejercicios.orden",
+        "nombres": "id,nombre,ejercicios.nombre",
+        "solo rutina": "id,nombre",
+    }
+
+    with TestClient(app) as client:
+        credenciales = {"nombre": "bench", "email": "bench@gym.com", "password": "bench123"}
+        client.post("/auth/register", json=credenciales)
+        token = client.post("/auth/login", json=credenciales).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        for i in range(args.rutinas):
+            client.post("/rutinas/", json=_rutina(generador, i, args.ejercicios))
+
+        base: int | None = None
+        print(f"GET /rutinas/?page_size={args.page_size} ({args.ejercicios} ejercicios por rutina)")
+        print(f"{'fields':<13} {'codificación':<32} {'bytes':>9} {'ahorro':>8} {'ms':>7}")
+        for nombre, fields in selecciones.items():
+            params: dict[str, Any] = {"page_size": args.page_size, "count": "none"}
+            if fields:
+                params["fields"] = fields
+            for codificacion in codificaciones:
+                inicio = time.perf_counter()
+                respuesta = client.get("/rutinas/", params=params, headers={"Accept-Encoding": codificacion})
+                duracion = (time.perf_counter() - inicio) * 1000
+                assert respuesta.status_code == 200, respuesta.text
+                # Las respuestas de menos de COMPRESSION_MINIMUM_SIZE bytes salen sin comprimir aunque se pida
+                usada = respuesta.headers.get("content-encoding", "identity")
+                etiqueta = codificacion if usada == codificacion else f"{codificacion}: sin comprimir (< mínimo)"
+                tamaño = respuesta.num_bytes_downloaded
+                base = base or tamaño
+                print(f"{nombre:<13} {etiqueta:<32} {tamaño:>9} {1 - tamaño / base:>7.1%} {duracion:>7.1f}")
+    if not brotli_disponible():
+        print("(br omitido: el paquete brotli no está instalado)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# este script mide cuánto cuesta serializar una página de GET /rutinas/ (sin contar la consulta)
+# compara el camino de response_model (el handler arma RutinaPaginatedResponse, FastAPI lo revalida
+# contra el response_model, lo convierte a dict y JSONResponse hace json.dumps) con el camino
+# rápido de app.schemas.serializacion (FAST_JSON_RESPONSES=true)
+# las rutinas se cargan de una base SQLite temporal con rutina_con_ejercicios, igual que el handler
+#
+# uso (desde la carpeta backend):
+#   python -m benchmarks.serializacion_listado --page-size 50 --ejercicios 8
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gym-bench-'), 'serializacion.db')}"
+os.environ["APP_DEBUG"] = "0"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from app.db.loading import rutina_con_ejercicios  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.models import DiaSemana, Ejercicio, Rutina  # noqa: E402
+from app.schemas import serializacion  # noqa: E402
+from app.schemas.rutina import RutinaPaginatedResponse  # noqa: E402
+
+
+def _sembrar(rutinas: int, ejercicios: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    dias = list(DiaSemana)
+    inicio = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        session.execute(
+            insert(Rutina.__table__),  # type: ignore[attr-defined]
+            [
+                {"nombre": f"Rutina {i}", "descripcion": f"Descripción de la rutina {i}", "fecha_creacion": inicio + timedelta(minutes=i), "version": 1}
+                for i in range(1, rutinas + 1)
+            ],
+        )
+        session.execute(
+            insert(Ejercicio.__table__),  # type: ignore[attr-defined]
+            [
+                {
+                    "rutina_id": i,
+                    "nombre": f"Ejercicio {j}",
+                    "dia_semana": dias[j % len(dias)].name,
+                    "series": 4,
+                    "repeticiones": 10,
+                    "peso": 42.5 if j % 2 else None,
+                    "notas": "controlar la bajada" if j % 3 == 0 else None,
+                    "orden": j,
+                }
+                for i in range(1, rutinas + 1)
+                for j in range(1, ejercicios + 1)
+            ],
+        )
+        session.commit()
+
+
+def _medir(funcion: Callable[[], bytes], repeticiones: int) -> dict[str, float]:
+    for _ in range(min(50, repeticiones)):
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1_000_000)
+    return {"mediana_us": statistics.median(tiempos), "min_us": min(tiempos)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Costo de serializar una página del listado de rutinas")
+    parser.add_argument("--page-size", type=int, default=50, help="Rutinas por página")
+    parser.add_argument("--ejercicios", type=int, default=8, help="Ejercicios por rutina")
+    parser.add_argument("--repeticiones", type=int, default=500, help="Serializaciones medidas por camino")
+    args = parser.parse_args()
+
+    _sembrar(args.page_size, args.ejercicios)
+    metadatos: dict[str, Any] = {
+        "total": args.page_size,
+        "page": 1,
+        "page_size": args.page_size,
+        "total_pages": 1,
+        "total_estimado": False,
+        "next_cursor": None,
+    }
+    campo = create_model_field(name="Response_list_rutinas", type_=RutinaPaginatedResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    with Session(engine) as session:
+        rutinas = list(session.exec(select(Rutina).options(*rutina_con_ejercicios())).all())
+
+        def _response_model() -> bytes:
+            contenido = RutinaPaginatedResponse(items=rutinas, **metadatos)
+            datos = loop.run_until_complete(serialize_response(field=campo, response_content=contenido))
+            return JSONResponse(datos).body
+
+        def _rapido() -> bytes:
+            return serializacion.listado_json(rutinas, metadatos)
+
+        clasico, rapido = _response_model(), _rapido()
+        # Mismo documento JSON (JSONResponse usa otros separadores, por eso se compara ya parseado)
+        assert JSONResponse(RutinaPaginatedResponse.model_validate_json(rapido).model_dump(mode="json")).body == clasico
+
+        resultados = {
+            "response_model": _medir(_response_model, args.repeticiones),
+            "fast_json": _medir(_rapido, args.repeticiones),
+        }
+    loop.close()
+
+    print(f"página de {args.page_size} rutinas x {args.ejercicios} ejercicios ({len(rapido)} bytes)")
+    print(f"{'camino':<16} {'mediana µs':>11} {'mín µs':>9}")
+    for nombre, valores in resultados.items():
+        print(f"{nombre:<16} {valores['mediana_us']:>11.0f} {valores['min_us']:>9.0f}")
+    base = resultados["response_model"]["mediana_us"]
+    print(f"aceleración: x{base / resultados['fast_json']['mediana_us']:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
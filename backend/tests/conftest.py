@@ -0,0 +1,9 @@
+# configuración común de los tests: una base SQLite temporal por corrida, fijada antes de importar la app
+# (app.core.config lee el entorno una sola vez)
+
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='gym-tests-'), 'tests.db')}"
+os.environ["APP_DEBUG"] = "0"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789")
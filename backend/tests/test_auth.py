@@ -0,0 +1,49 @@
+# este archivo verifica la revocación de tokens con la caché de usuarios de cada proceso (app.api.deps)
+
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.core.security import create_access_token
+from app.db.session import engine
+from app.main import app
+from app.models import Usuario
+
+
+@pytest.fixture(scope="module")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
+
+
+def _login(client: TestClient, email: str) -> tuple[int, str]:
+    credenciales = {"nombre": "test", "email": email, "password": "test1234"}
+    client.post("/auth/register", json=credenciales)
+    token = client.post("/auth/login", json=credenciales).json()["access_token"]
+    usuario_id = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).json()["id"]
+    return usuario_id, token
+
+
+def test_token_nuevo_con_cache_vieja(client: TestClient) -> None:
+    # Otro worker atendió un logout: subió token_version en la base sin vaciar la caché de este proceso
+    usuario_id, token_viejo = _login(client, "cache-vieja@gym.com")
+    with engine.begin() as connection:
+        connection.execute(
+            update(Usuario).where(Usuario.id == usuario_id).values(token_version=Usuario.token_version + 1)
+        )
+
+    # El login posterior (también en otro worker) emite un token con la versión nueva
+    token_nuevo = create_access_token(usuario_id, 1)
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {token_nuevo}"}).status_code == 200
+    respuesta = client.get("/auth/me", headers={"Authorization": f"Bearer {token_viejo}"})
+    assert respuesta.status_code == 401
+    assert respuesta.json()["detail"] == "Token revocado"
+
+
+def test_logout_revoca_el_token(client: TestClient) -> None:
+    _, token = _login(client, "logout@gym.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+    assert client.get("/auth/me", headers=headers).status_code == 401
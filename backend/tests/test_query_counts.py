@@ -0,0 +1,33 @@
+# este archivo corre los escenarios de benchmarks/query_counts dentro de pytest: cada endpoint debe
+# respetar su presupuesto de sentencias SQL y no repetir un mismo SELECT (N+1, detectar_repetidas)
+# el módulo del benchmark apunta DATABASE_URL a un SQLite temporal antes de importar la app
+
+import pytest
+
+from app.db.diagnostico import detectar_repetidas
+from benchmarks.query_counts import PRESUPUESTOS, UMBRAL_N_MAS_1, ResultadoEscenario, medir_escenarios
+
+
+@pytest.fixture(scope="module")
+def resultados() -> dict[str, ResultadoEscenario]:
+    # Los escenarios comparten la base y dependen del orden: se ejecutan una sola vez
+    return {resultado.nombre: resultado for resultado in medir_escenarios()}
+
+
+@pytest.mark.parametrize("nombre", list(PRESUPUESTOS))
+def test_sentencias_por_endpoint(resultados: dict[str, ResultadoEscenario], nombre: str) -> None:
+    resultado = resultados[nombre]
+    assert resultado.status_code < 400, f"{nombre} respondió {resultado.status_code}"
+    assert not resultado.repetidas, f"{nombre} repite SELECTs (N+1): {resultado.repetidas}"
+    assert not resultado.excedido, (
+        f"{nombre} ejecutó {len(resultado.sentencias)} sentencias (presupuesto {resultado.presupuesto}):\n"
+        + "\n".join(resultado.sentencias)
+    )
+
+
+def test_detecta_n_mas_1() -> None:
+    # Un SELECT por rutina con distintos parámetros tiene una sola huella
+    sentencias = [f"SELECT * FROM ejercicios WHERE rutina_id = {i}" for i in range(UMBRAL_N_MAS_1)]
+    sentencias += ["INSERT INTO ejercicios (nombre) VALUES (?)"] * UMBRAL_N_MAS_1
+    repetidas = detectar_repetidas(sentencias, UMBRAL_N_MAS_1)
+    assert [veces for _, veces in repetidas] == [UMBRAL_N_MAS_1]
@@ -53,7 +53,8 @@ function Dashboard() {
   }, [location.state, navigate]);
 
   useEffect(() => {
-    if (!data) return;
+    // Sin total (count=none) no hay cantidad de páginas para corregir la página actual
+    if (!data || data.total_pages === null) return;
     if (data.total_pages === 0 && page !== 1) {
       setPage(1);
       return;
@@ -54,8 +54,11 @@ export interface RutinaDuplicatePayload {
 
 export interface RutinaPaginatedResponse {
   items: Rutina[];
-  total: number;
+  // null con count=none; con count=estimated puede ser una estimación (total_estimado)
+  total: number | null;
   page: number;
   page_size: number;
-  total_pages: number;
+  total_pages: number | null;
+  total_estimado?: boolean;
+  next_cursor?: string | null;
 }